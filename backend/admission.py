@@ -0,0 +1,206 @@
+"""
+Admission control for the unauthenticated write endpoints.
+
+During a submission storm the public dashboard has to stay responsive, so
+POST /api/partisipasi (and /batch) and POST /api/upload/image are rejected
+early with 429 + Retry-After instead of queueing on the Mongo pool or in
+memory:
+
+- a token bucket per client IP and one global bucket per route group
+- uploads reserve their declared size from a budget of in-flight bytes
+  (UPLOAD_INFLIGHT_BYTES); oversized or unsized uploads get 413/411 before
+  the body is read
+- resumable PATCH chunks go through the same byte budget and size limit;
+  they are rate-limited by volume, so a whole photo sent in chunks costs
+  about one upload token
+
+Buckets are kept in process memory (there is no shared cache in this
+deployment); the configured rates are for the whole deployment and are
+divided across WEB_CONCURRENCY workers, which share the load roughly evenly.
+"""
+import json
+import math
+import time
+from typing import Dict, Optional, Tuple
+
+import metrics
+from config import (
+    RATE_LIMIT_IP_PER_MINUTE, RATE_LIMIT_IP_BURST, RATE_LIMIT_GLOBAL_PER_SECOND, RATE_LIMIT_GLOBAL_BURST,
+    RATE_LIMIT_FORWARDED_HOPS, WEB_CONCURRENCY, UPLOAD_MAX_BYTES, UPLOAD_INFLIGHT_BYTES,
+)
+
+# (method, path) -> grup; tiap grup punya bucket global sendiri
+LIMITED_ROUTES = {
+    ("POST", "/api/partisipasi"): "partisipasi",
+    ("POST", "/api/partisipasi/batch"): "partisipasi",  # satu token per batch; ukurannya dibatasi PARTISIPASI_BATCH_MAX
+    ("POST", "/api/upload/image"): "upload",
+    ("POST", "/api/upload/resumable"): "upload_session",
+}
+RESUMABLE_PREFIX = "/api/upload/resumable/"
+UPLOAD_GROUPS = {"upload", "upload_chunk"}
+CHUNK_MIN_COST = 0.05
+MULTIPART_OVERHEAD = 64 * 1024  # boundary dan header part di luar isi file
+MAX_TRACKED_IPS = 10000
+
+RATE_LIMITED = metrics.Counter(
+    "http_requests_rejected_total", "Requests rejected by admission control", ("group", "reason")
+)
+UPLOAD_INFLIGHT = metrics.Gauge("upload_inflight_bytes", "Declared bytes of uploads currently being received")
+
+class TokenBucket:
+
+    def __init__(self, rate: float, burst: float, now: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic() if now is None else now
+
+    def take(self, now: float, cost: float = 1) -> float:
+        """Take `cost` tokens; returns 0 on success, else seconds until enough tokens exist."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate if self.rate > 0 else 60.0
+
+    def idle_full(self, now: float) -> bool:
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+class AdmissionController:
+
+    def __init__(self, ip_per_minute: float = RATE_LIMIT_IP_PER_MINUTE, ip_burst: int = RATE_LIMIT_IP_BURST,
+                 global_per_second: float = RATE_LIMIT_GLOBAL_PER_SECOND,
+                 global_burst: int = RATE_LIMIT_GLOBAL_BURST, workers: int = WEB_CONCURRENCY,
+                 upload_max_bytes: int = UPLOAD_MAX_BYTES, upload_inflight_bytes: int = UPLOAD_INFLIGHT_BYTES,
+                 forwarded_hops: int = RATE_LIMIT_FORWARDED_HOPS, clock=time.monotonic):
+        self.ip_rate = ip_per_minute / 60 / workers
+        self.ip_burst = max(ip_burst / workers, 1)
+        self.global_rate = global_per_second / workers
+        self.global_burst = max(global_burst / workers, 1)
+        self.upload_max_bytes = upload_max_bytes
+        self.upload_inflight_limit = max(upload_inflight_bytes // workers, upload_max_bytes + MULTIPART_OVERHEAD)
+        self.upload_inflight = 0
+        self.forwarded_hops = forwarded_hops
+        self.clock = clock
+        self._ip_buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._global_buckets: Dict[str, TokenBucket] = {}
+
+    def client_ip(self, scope) -> str:
+        if self.forwarded_hops:
+            for name, value in scope.get("headers", []):
+                if name == b"x-forwarded-for":
+                    chain = [part.strip() for part in value.decode("latin-1").split(",") if part.strip()]
+                    if len(chain) >= self.forwarded_hops:
+                        # Entri paling kanan ditambahkan oleh proxy kita sendiri
+                        return chain[-self.forwarded_hops]
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def _prune(self, now: float):
+        if len(self._ip_buckets) > MAX_TRACKED_IPS:
+            # Bucket yang sudah penuh kembali sama dengan bucket baru, aman dibuang
+            self._ip_buckets = {k: b for k, b in self._ip_buckets.items() if not b.idle_full(now)}
+
+    def check_rate(self, group: str, ip: str, cost: float = 1) -> float:
+        """0 when admitted, otherwise the Retry-After in seconds."""
+        now = self.clock()
+        bucket = self._ip_buckets.get((group, ip))
+        if bucket is None:
+            self._prune(now)
+            bucket = self._ip_buckets[(group, ip)] = TokenBucket(self.ip_rate, self.ip_burst, now)
+        wait = bucket.take(now, cost)
+        if wait:
+            RATE_LIMITED.inc(group=group, reason="ip")
+            return wait
+        global_bucket = self._global_buckets.get(group)
+        if global_bucket is None:
+            global_bucket = self._global_buckets[group] = TokenBucket(self.global_rate, self.global_burst, now)
+        wait = global_bucket.take(now, cost)
+        if wait:
+            bucket.tokens = min(bucket.burst, bucket.tokens + cost)  # token IP dikembalikan
+            RATE_LIMITED.inc(group=group, reason="global")
+        return wait
+
+    def reserve_upload(self, size: int) -> bool:
+        if self.upload_inflight + size > self.upload_inflight_limit:
+            RATE_LIMITED.inc(group="upload", reason="inflight_bytes")
+            return False
+        self.upload_inflight += size
+        UPLOAD_INFLIGHT.set(self.upload_inflight)
+        return True
+
+    def release_upload(self, size: int):
+        self.upload_inflight -= size
+        UPLOAD_INFLIGHT.set(self.upload_inflight)
+
+def route_group(method: Optional[str], path: str) -> Optional[str]:
+    group = LIMITED_ROUTES.get((method, path))
+    if group is None and method == "PATCH" and path.startswith(RESUMABLE_PREFIX):
+        upload_id = path[len(RESUMABLE_PREFIX):]
+        if upload_id and "/" not in upload_id:
+            group = "upload_chunk"
+    return group
+
+def content_length(scope) -> Optional[int]:
+    for name, value in scope.get("headers", []):
+        if name == b"content-length":
+            try:
+                return int(value)
+            except ValueError:
+                return None
+    return None
+
+async def reject(send, status: int, detail: str, retry_after: Optional[float] = None):
+    headers = [(b"content-type", b"application/json"), (b"connection", b"close")]
+    if retry_after is not None:
+        headers.append((b"retry-after", str(max(1, math.ceil(retry_after))).encode()))
+    body = json.dumps({"detail": detail}).encode()
+    headers.append((b"content-length", str(len(body)).encode()))
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware: rejects before the request body is read."""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        group = route_group(scope.get("method"), scope.get("path", "")) if scope["type"] == "http" else None
+        if group is None:
+            await self.app(scope, receive, send)
+            return
+
+        controller = self.controller
+        reserved = 0
+        if group in UPLOAD_GROUPS:
+            size = content_length(scope)
+            if size is None:
+                await reject(send, 411, "Header Content-Length diperlukan untuk upload")
+                return
+            overhead = 0 if group == "upload_chunk" else MULTIPART_OVERHEAD  # potongan berisi byte mentah
+            if size > controller.upload_max_bytes + overhead:
+                RATE_LIMITED.inc(group=group, reason="too_large")
+                await reject(send, 413, f"Ukuran file maksimal {controller.upload_max_bytes // (1024 * 1024)}MB")
+                return
+
+        # Potongan resumable dihitung menurut volume: satu foto penuh kira-kira satu token,
+        # potongan kosong tetap berbayar dan biaya tak pernah melebihi burst
+        cost = min(max(size / controller.upload_max_bytes, CHUNK_MIN_COST), 1) if group == "upload_chunk" else 1
+        wait = controller.check_rate(group, controller.client_ip(scope), cost)
+        if wait:
+            await reject(send, 429, "Terlalu banyak permintaan, coba lagi nanti", retry_after=wait)
+            return
+
+        if group in UPLOAD_GROUPS:
+            if not controller.reserve_upload(size):
+                await reject(send, 429, "Server sedang menerima banyak upload, coba lagi nanti", retry_after=1)
+                return
+            reserved = size
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if reserved:
+                controller.release_upload(reserved)
@@ -0,0 +1,100 @@
+"""
+Agenda dates and the background scheduler that advances agenda statuses.
+"""
+import asyncio
+import logging
+from datetime import datetime, timezone, timedelta
+from typing import Optional
+
+from config import AGENDA_TZ_OFFSET_HOURS, AGENDA_SCHEDULER_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+AGENDA_TZ = timezone(timedelta(hours=AGENDA_TZ_OFFSET_HOURS))
+AGENDA_UPCOMING_LIMIT = 10
+AGENDA_DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y"]
+
+def parse_tanggal(tanggal: Optional[str]) -> Optional[datetime]:
+    """Parse the free-text tanggal into the UTC instant of local midnight, or None."""
+    if not tanggal:
+        return None
+    value = str(tanggal).strip()[:10]
+    for fmt in AGENDA_DATE_FORMATS:
+        try:
+            local = datetime.strptime(value, fmt).replace(tzinfo=AGENDA_TZ)
+        except ValueError:
+            continue
+        return local.astimezone(timezone.utc)
+    return None
+
+def local_day_start(now: datetime) -> datetime:
+    """UTC instant of the start of the local (WITA) day containing `now`."""
+    local = now.astimezone(AGENDA_TZ)
+    return local.replace(hour=0, minute=0, second=0, microsecond=0).astimezone(timezone.utc)
+
+def agenda_status_for(tanggal_date: Optional[datetime], now: datetime) -> str:
+    if tanggal_date is None:
+        return "upcoming"
+    today = local_day_start(now)
+    if tanggal_date < today:
+        return "completed"
+    if tanggal_date == today:
+        return "ongoing"
+    return "upcoming"
+
+async def backfill_agenda_dates(db):
+    """Isi tanggal_date untuk agenda lama yang hanya punya tanggal berupa teks."""
+    cursor = db.agenda.find({"tanggal_date": {"$exists": False}}, {"_id": 0, "id": 1, "tanggal": 1})
+    async for item in cursor:
+        tanggal_date = parse_tanggal(item.get("tanggal"))
+        if tanggal_date is None:
+            logger.warning(f"Tanggal agenda {item.get('id')} tidak dapat dibaca: {item.get('tanggal')!r}")
+        await db.agenda.update_one({"id": item["id"]}, {"$set": {"tanggal_date": tanggal_date}})
+
+class AgendaStatusScheduler:
+    """
+    Background task that advances agenda statuses in bulk:
+    upcoming -> ongoing on the agenda day, upcoming/ongoing -> completed after it.
+    Statuses only move forward, so a manual status set by an admin is never reverted.
+    """
+
+    def __init__(self, database, clock=lambda: datetime.now(timezone.utc), interval: int = AGENDA_SCHEDULER_INTERVAL):
+        self.db = database
+        self.clock = clock
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def run_once(self) -> dict:
+        today = local_day_start(self.clock())
+        completed = await self.db.agenda.update_many(
+            {"status": {"$in": ["upcoming", "ongoing"]}, "tanggal_date": {"$lt": today}},
+            {"$set": {"status": "completed"}}
+        )
+        ongoing = await self.db.agenda.update_many(
+            {"status": "upcoming", "tanggal_date": {"$gte": today, "$lt": today + timedelta(days=1)}},
+            {"$set": {"status": "ongoing"}}
+        )
+        return {"completed": completed.modified_count, "ongoing": ongoing.modified_count}
+
+    async def _run(self):
+        while True:
+            try:
+                result = await self.run_once()
+                if result["completed"] or result["ongoing"]:
+                    logger.info(f"Status agenda diperbarui: {result}")
+            except Exception as e:
+                logger.warning(f"Gagal memperbarui status agenda: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
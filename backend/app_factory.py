@@ -0,0 +1,144 @@
+"""
+Application factory.
+
+create_app() builds the FastAPI app, its middleware and routers. Everything
+that holds connections or background tasks (Mongo client, settings cache,
+agenda scheduler, daily snapshot job, loop monitors) is created in the
+lifespan and kept on app.state, so importing the app never touches the
+database and tests or the benchmark can build isolated apps against their
+own database.
+"""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import FastAPI
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from starlette.middleware.cors import CORSMiddleware
+
+import metrics
+from admission import AdmissionController, AdmissionMiddleware
+from agenda_schedule import AgendaStatusScheduler
+from change_feed import ChangeFeed
+from config import (
+    MONGO_URL, DB_NAME, CORS_ORIGINS, CHANGE_FEED,
+    HEAVY_MODULES_WARMUP, LOOP_BLOCK_DETECTOR, LOOP_BLOCK_THRESHOLD_MS, RATE_LIMIT,
+)
+from database import create_client, public_read_database
+from idempotency import IdempotencyMiddleware
+from lazy_modules import warm_heavy_modules
+from migrations import run_migrations
+from opd_directory import OPDDirectory
+from live_stats import StatsBroadcaster
+from progress import OPDCounterSync, ProgressSummaryCache
+from resumable_uploads import ResumableUploadStore
+from loop_watchdog import BlockingDetector, BlockingDetectorMiddleware
+from routers import api_router
+from settings_store import SettingsCache
+from timeseries import DailySnapshotJob
+
+logger = logging.getLogger(__name__)
+
+def create_app(
+    database: Optional[AsyncIOMotorDatabase] = None, admission: Optional[AdmissionController] = None
+) -> FastAPI:
+    """
+    Build the API app. Without `database` the lifespan opens a client on
+    MONGO_URL/DB_NAME and closes it on shutdown; an injected database is
+    used as-is and left open. `admission` replaces the rate limiter built
+    from the RATE_LIMIT_* settings.
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        client = None
+        db = database
+        if db is None:
+            if not MONGO_URL or not DB_NAME:
+                raise ValueError("MONGO_URL and DB_NAME environment variables are required")
+            client = create_client(MONGO_URL)
+            db = client[DB_NAME]
+        app.state.db = db
+        app.state.read_db = public_read_database(db)
+        app.state.settings_cache = SettingsCache(db)
+        app.state.agenda_scheduler = AgendaStatusScheduler(db)
+        app.state.daily_snapshot_job = DailySnapshotJob(db)
+        app.state.stats_broadcaster = StatsBroadcaster()
+        app.state.progress_summary = ProgressSummaryCache(db)
+        app.state.opd_directory = OPDDirectory(db)
+        app.state.opd_counters = counters = OPDCounterSync(db)
+        app.state.resumable_uploads = ResumableUploadStore()
+        app.state.stats_broadcaster.add_listener(app.state.progress_summary.invalidate)
+        app.state.change_feed = change_feed = ChangeFeed(db)
+        change_feed.subscribe("settings", lambda change: app.state.settings_cache.invalidate())
+        change_feed.subscribe("partisipasi", app.state.stats_broadcaster.apply_change)
+        change_feed.subscribe("partisipasi", counters.apply_change, leader_only=True)
+        change_feed.on_leader(counters.recompute_all)
+        change_feed.subscribe("opd", app.state.progress_summary.invalidate)
+        change_feed.subscribe("opd", app.state.opd_directory.apply_change)
+        change_feed.on_mode(lambda mode: app.state.stats_broadcaster.use_change_stream(mode == "change_stream"))
+        change_feed.on_mode(lambda mode: counters.use_change_stream(mode == "change_stream"))
+        app.state.loop_lag_monitor = metrics.LoopLagMonitor()
+
+        try:
+            await run_migrations(db)
+        except Exception as e:
+            logger.warning(f"Gagal menjalankan migrasi: {e}")
+        app.state.agenda_scheduler.start()
+        app.state.daily_snapshot_job.start()
+        app.state.loop_lag_monitor.start()
+        if CHANGE_FEED:
+            change_feed.start()
+        warmup_task = asyncio.create_task(warm_heavy_modules()) if HEAVY_MODULES_WARMUP else None
+        if blocking_detector:
+            blocking_detector.start()
+        try:
+            yield
+        finally:
+            app.state.stats_broadcaster.close()
+            if blocking_detector:
+                await blocking_detector.stop()
+            await change_feed.stop()
+            await counters.stop()
+            await app.state.loop_lag_monitor.stop()
+            await app.state.agenda_scheduler.stop()
+            await app.state.daily_snapshot_job.stop()
+            if warmup_task:
+                warmup_task.cancel()
+            if client is not None:
+                client.close()
+
+    app = FastAPI(title="Dashboard Agro Mopomulo API", lifespan=lifespan)
+
+    # Middleware yang ditambahkan pertama paling dalam: replay Idempotency-Key tetap dihitung
+    # admission control, dan respons 429/413 tetap mendapat header CORS serta tercatat di metrics
+    app.add_middleware(IdempotencyMiddleware)
+    if admission is None and RATE_LIMIT:
+        admission = AdmissionController()
+    app.state.admission = admission
+    if admission is not None:
+        app.add_middleware(AdmissionMiddleware, controller=admission)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=CORS_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[
+            "X-Next-Cursor", "X-DB-Round-Trips", "Server-Timing", "Retry-After", "Idempotent-Replayed",
+            "Location", "Upload-Offset", "Upload-Length", "Tus-Resumable",
+        ],
+    )
+    app.add_middleware(metrics.MetricsMiddleware)
+
+    # Debug: deteksi pekerjaan sinkron yang memblokir event loop (LOOP_BLOCK_DETECTOR=1)
+    blocking_detector = None
+    if LOOP_BLOCK_DETECTOR:
+        blocking_detector = BlockingDetector(threshold=LOOP_BLOCK_THRESHOLD_MS / 1000)
+        app.add_middleware(BlockingDetectorMiddleware, detector=blocking_detector)
+    app.state.blocking_detector = blocking_detector
+
+    app.include_router(api_router)
+    return app
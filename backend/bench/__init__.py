@@ -0,0 +1 @@
+"""Local benchmark harness: synthetic data seeding, endpoint benchmarks and result comparison."""
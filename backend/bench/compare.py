@@ -0,0 +1,60 @@
+"""
+Compare two benchmark result files and flag regressions.
+
+    python -m bench.compare bench_results/abc123-10k.json bench_results/def456-10k.json --threshold 0.2
+
+Exits with status 1 when any benchmark's p95 latency, DB round trips or
+RSS growth regressed by more than the threshold.
+"""
+import argparse
+import json
+import sys
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "db_round_trips", "rss_mb_after")
+GATED = ("p95_ms", "db_round_trips", "rss_mb_after")
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    regressions = []
+    for name, new in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            print(f"{name:<24} (new benchmark)")
+            continue
+        parts = []
+        for metric in METRICS:
+            before, after = old.get(metric), new.get(metric)
+            if before is None or after is None:
+                continue
+            change = (after - before) / before if before else (1.0 if after else 0.0)
+            parts.append(f"{metric}={before}->{after} ({change:+.0%})")
+            if metric in GATED and change > threshold:
+                regressions.append(f"{name}.{metric}: {before} -> {after} ({change:+.0%})")
+        print(f"{name:<24} " + "  ".join(parts))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two bench.run result files")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative regression")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    print(f"baseline {baseline['commit']} ({baseline['database']}, {baseline['scale']})"
+          f" vs current {current['commit']} ({current['database']}, {current['scale']})")
+
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print("\nRegressions:")
+        for r in regressions:
+            print(f"  {r}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
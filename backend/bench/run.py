@@ -0,0 +1,228 @@
+"""
+Endpoint benchmarks for the Agro Mopomulo API.
+
+Runs the FastAPI app in-process (httpx ASGI transport, no network) against a
+local mongod or an in-memory mongomock database seeded by bench.seed, and
+records p50/p95/p99 latency, response size, process RSS and database round
+trips (X-DB-Round-Trips, only populated with a real mongod) per endpoint.
+
+    python -m bench.run --scale 10k --mongo-url mongodb://localhost:27017 --db agro_bench
+    python -m bench.run --scale 1k --mongomock
+    python -m bench.compare bench_results/old.json bench_results/new.json
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from bench.seed import parse_scale, seed  # noqa: E402
+
+RESULTS_DIR = BACKEND_DIR / "bench_results"
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB (Linux), falling back to the peak RSS."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024, 1)
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * pct / 100
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def build_app(mongo_url: str, db_name: str, use_mongomock: bool):
+    """Build the API app against the benchmark database and return (app, database, client)."""
+    os.environ["MONGO_URL"] = mongo_url
+    os.environ["DB_NAME"] = db_name
+    os.environ.setdefault("JWT_SECRET", "bench-secret")
+    from app_factory import create_app
+    from database import create_client
+
+    if use_mongomock:
+        from mongomock_motor import AsyncMongoMockClient
+        client = AsyncMongoMockClient()
+    else:
+        client = create_client(mongo_url)
+    database = client[db_name]
+    return create_app(database=database), database, client
+
+
+def build_partisipasi_xlsx(rows: int, opd_names: list) -> bytes:
+    from openpyxl import Workbook
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Nama", "NIP", "Alamat", "No. WhatsApp", "OPD", "Jumlah Pohon", "Jenis Pohon",
+               "Sumber Bibit", "Lokasi Tanam", "Latitude", "Longitude"])
+    for i in range(rows):
+        ws.append([f"Peserta Import {i}", f"1990{i:014d}", "Kwandang", f"0812{i:08d}",
+                   opd_names[i % len(opd_names)], 10, "Mangga", "Swadaya",
+                   "Desa Molingkapoto", "0.8512", "122.8876"])
+    output = io.BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+def build_opd_xlsx(rows: int) -> bytes:
+    from openpyxl import Workbook
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["Nama", "Kode", "Alamat", "Jumlah_Personil"])
+    for i in range(rows):
+        ws.append([f"Unit Benchmark {time.time_ns()}-{i}", f"B{i}", "Kwandang", 25])
+    output = io.BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+async def measure(client, name: str, request, iterations: int, warmup: int = 1) -> dict:
+    for _ in range(warmup):
+        await request(client)
+    latencies, sizes, round_trips, statuses = [], [], [], {}
+    rss_before = rss_mb()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        response = await request(client)
+        latencies.append((time.perf_counter() - start) * 1000)
+        sizes.append(len(response.content))
+        statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+        if "x-db-round-trips" in response.headers:
+            round_trips.append(int(response.headers["x-db-round-trips"]))
+    result = {
+        "iterations": iterations,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(sum(latencies) / len(latencies), 2),
+        "response_bytes": int(sum(sizes) / len(sizes)),
+        "db_round_trips": max(round_trips) if round_trips else None,
+        "status_codes": statuses,
+        "rss_mb_before": rss_before,
+        "rss_mb_after": rss_mb(),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    print(f"{name:<24} p50={result['p50_ms']:>9.2f}ms p95={result['p95_ms']:>9.2f}ms "
+          f"p99={result['p99_ms']:>9.2f}ms db={result['db_round_trips']} rss={result['rss_mb_after']}MB")
+    return result
+
+
+async def run(args) -> dict:
+    import httpx
+
+    scale = parse_scale(args.scale)
+    app, database, db_client = build_app(args.mongo_url, args.db, args.mongomock)
+    if not args.skip_seed:
+        counts = await seed(database, scale, args.seed)
+        print(f"Seeded: {counts}")
+
+    from auth import create_token
+    token = create_token("bench-user", "bench@agro.local", "admin")
+    auth = {"Authorization": f"Bearer {token}"}
+    opd_names = [o["nama"] for o in await database.opd.find({}, {"_id": 0, "nama": 1}).to_list(None)]
+    partisipasi_xlsx = build_partisipasi_xlsx(args.import_rows, opd_names)
+
+    def get(path, headers=None):
+        return lambda c: c.get(path, headers=headers)
+
+    def import_partisipasi(c):
+        files = {"file": ("bench.xlsx", partisipasi_xlsx,
+                          "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
+        return c.post("/api/import/excel", files=files, headers=auth)
+
+    def import_opd(c):
+        files = {"file": ("opd.xlsx", build_opd_xlsx(args.import_rows),
+                          "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
+        return c.post("/api/opd/import", files=files, data={"kategori": "OPD"}, headers=auth)
+
+    # Reads first; imports last because they add documents
+    benchmarks = [
+        ("stats", get("/api/stats"), args.iterations),
+        ("progress", get("/api/progress"), args.iterations),
+        ("partisipasi", get("/api/partisipasi"), args.iterations),
+        ("export_excel", get("/api/export/excel", auth), args.heavy_iterations),
+        ("export_csv", get("/api/export/csv", auth), args.heavy_iterations),
+        ("export_parquet", get("/api/export/parquet", auth), args.heavy_iterations),
+        ("export_pdf", get("/api/export/pdf", auth), args.heavy_iterations),
+        ("import_excel", import_partisipasi, args.heavy_iterations),
+        ("import_opd_excel", import_opd, args.heavy_iterations),
+    ]
+    if args.only:
+        wanted = set(args.only.split(","))
+        benchmarks = [b for b in benchmarks if b[0] in wanted]
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    # ASGITransport does not send lifespan events; run startup (indexes, workers) explicitly
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for name, request, iterations in benchmarks:
+                results[name] = await measure(client, name, request, iterations)
+    db_client.close()
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "scale": scale,
+        "database": "mongomock" if args.mongomock else "mongod",
+        "python": sys.version.split()[0],
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Agro Mopomulo API endpoints")
+    parser.add_argument("--scale", default="10k", help="1k, 10k, 100k, 1m or a participant count")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="agro_bench")
+    parser.add_argument("--mongomock", action="store_true", help="use an in-memory mongomock database")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skip-seed", action="store_true", help="reuse data already in the database")
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--heavy-iterations", type=int, default=3, help="iterations for exports/imports")
+    parser.add_argument("--import-rows", type=int, default=500)
+    parser.add_argument("--only", help="comma separated benchmark names")
+    parser.add_argument("--output", help="result file (default bench_results/<commit>-<scale>.json)")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{report['commit']}-{args.scale}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Synthetic data generator for local benchmarks.
+
+Generates OPD/Desa/Kecamatan/Publik units, participants (with multi-location
+lokasi_list), berita and agenda in the same shape the API writes them.
+Output is deterministic for a given --seed.
+
+    python -m bench.seed --scale 10k --mongo-url mongodb://localhost:27017 --db agro_bench
+    python -m bench.seed --scale 1k --mongomock   # dry run, prints counts only
+"""
+import argparse
+import asyncio
+import random
+import uuid
+from datetime import datetime, timezone, timedelta
+
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+BATCH_SIZE = 5_000
+
+NAMA_DEPAN = [
+    "Abdul", "Ahmad", "Ani", "Budi", "Citra", "Dewi", "Fadli", "Fitri", "Hadi", "Hasan",
+    "Indah", "Irwan", "Lina", "Moh.", "Nur", "Rahmat", "Rizki", "Sari", "Siti", "Wahyu",
+    "Yusuf", "Zainab", "Rahman", "Sri", "Putri", "Iskandar", "Hendra", "Maryam", "Ridwan", "Yanti",
+]
+NAMA_BELAKANG = [
+    "Hulubangga", "Katili", "Lamato", "Mohamad", "Nusi", "Pakaya", "Panigoro", "Tangahu",
+    "Usman", "Yusuf", "Daud", "Ibrahim", "Gobel", "Hasiru", "Kadir", "Lihawa", "Mooduto",
+    "Podungge", "Rauf", "Thalib",
+]
+KECAMATAN = [
+    "Anggrek", "Atinggola", "Biau", "Gentuma Raya", "Kwandang", "Monano",
+    "Ponelo Kepulauan", "Sumalata", "Sumalata Timur", "Tolinggula", "Tomilito",
+]
+OPD_NAMA = [
+    "Dinas Pendidikan dan Kebudayaan", "Dinas Kesehatan", "Dinas Pekerjaan Umum dan Penataan Ruang",
+    "Dinas Pertanian", "Dinas Lingkungan Hidup", "Dinas Kelautan dan Perikanan", "Dinas Sosial",
+    "Dinas Perhubungan", "Dinas Komunikasi dan Informatika", "Dinas Pariwisata",
+    "Dinas Koperasi UKM Perindustrian dan Perdagangan", "Dinas Kependudukan dan Pencatatan Sipil",
+    "Dinas Pemberdayaan Masyarakat dan Desa", "Dinas Pangan", "Badan Perencanaan Pembangunan Daerah",
+    "Badan Keuangan dan Aset Daerah", "Badan Kepegawaian dan Pengembangan SDM",
+    "Badan Penanggulangan Bencana Daerah", "Inspektorat Daerah", "Sekretariat Daerah",
+    "Sekretariat DPRD", "Satuan Polisi Pamong Praja", "RSUD Zainal Umar Sidiki",
+]
+JENIS_POHON = [
+    ("Mangga", 14), ("Durian", 10), ("Kelapa", 16), ("Jati", 8), ("Mahoni", 7), ("Cengkeh", 9),
+    ("Pala", 6), ("Alpukat", 8), ("Rambutan", 7), ("Trembesi", 5), ("Nangka", 6), ("Matoa", 4),
+]
+SUMBER_BIBIT = ["Swadaya", "Dinas Pertanian", "BPDAS", "Dinas Lingkungan Hidup", "Bantuan Desa"]
+
+
+def _weighted(rng: random.Random, pairs):
+    names, weights = zip(*pairs)
+    return rng.choices(names, weights=weights, k=1)[0]
+
+
+def generate_opd(rng: random.Random, scale: int) -> list:
+    """OPD units plus Desa (grows with scale), one unit per Kecamatan and a Publik bucket."""
+    now = datetime.now(timezone.utc)
+    units = []
+
+    def unit(nama, kategori, personil):
+        return {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "nama": nama,
+            "kode": f"{kategori[:3]}-{len(units) + 1:04d}",
+            "alamat": f"Kec. {rng.choice(KECAMATAN)}",
+            "jumlah_personil": personil,
+            "kategori": kategori,
+            "created_at": now - timedelta(days=200),
+        }
+
+    for nama in OPD_NAMA:
+        units.append(unit(nama, "OPD", rng.randint(15, 250)))
+    jumlah_desa = min(123, max(10, scale // 100))
+    for i in range(jumlah_desa):
+        units.append(unit(f"Desa {rng.choice(NAMA_BELAKANG)} {i + 1}", "DESA", rng.randint(20, 600)))
+    for kec in KECAMATAN:
+        units.append(unit(f"Kecamatan {kec}", "Kecamatan", rng.randint(10, 60)))
+    units.append(unit("Masyarakat Umum", "PUBLIK", 0))
+    return units
+
+
+def _titik(rng: random.Random) -> str:
+    return f"{rng.uniform(0.78, 1.02):.6f}, {rng.uniform(122.20, 123.30):.6f}"
+
+
+def generate_partisipasi(rng: random.Random, opd_list: list, count: int, start_index: int = 0):
+    """Yield participant documents; ~30% have 2-3 locations in lokasi_list."""
+    now = datetime.now(timezone.utc)
+    opd_weights = [max(o["jumlah_personil"], 5) for o in opd_list]
+    for i in range(start_index, start_index + count):
+        opd = rng.choices(opd_list, weights=opd_weights, k=1)[0]
+        nama = f"{rng.choice(NAMA_DEPAN)} {rng.choice(NAMA_BELAKANG)}"
+        num_lokasi = rng.choices([1, 2, 3], weights=[70, 20, 10], k=1)[0]
+        lokasi_list = [
+            {
+                "lokasi_tanam": f"Desa {rng.choice(NAMA_BELAKANG)}, {rng.choice(KECAMATAN)}",
+                "titik_lokasi": _titik(rng) if rng.random() < 0.8 else None,
+                "bukti_url": None,
+            }
+            for _ in range(num_lokasi)
+        ]
+        jumlah_pohon = rng.choices([10, rng.randint(1, 9), rng.randint(11, 60)], weights=[60, 25, 15], k=1)[0]
+        yield {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "email": f"peserta{i}@contoh.id" if rng.random() < 0.4 else None,
+            "nama_lengkap": nama,
+            "nip": f"19{rng.randint(60, 99)}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}{rng.randint(10**9, 10**10 - 1)}"
+            if opd["kategori"] == "OPD" else None,
+            "opd_id": opd["id"],
+            "opd_nama": opd["nama"],
+            "kategori": opd["kategori"],
+            "alamat": f"Kec. {rng.choice(KECAMATAN)}",
+            "nomor_whatsapp": f"08{rng.randint(10**9, 10**10 - 1)}",
+            "jumlah_pohon": jumlah_pohon,
+            "jenis_pohon": _weighted(rng, JENIS_POHON),
+            "sumber_bibit": rng.choice(SUMBER_BIBIT),
+            "lokasi_tanam": lokasi_list[0]["lokasi_tanam"],
+            "titik_lokasi": lokasi_list[0]["titik_lokasi"],
+            "bukti_url": None,
+            "lokasi_list": lokasi_list,
+            "status": rng.choice(["pending", "pending", "verified"]),
+            "created_at": now - timedelta(seconds=rng.randint(0, 120 * 86400)),
+        }
+
+
+def generate_berita(rng: random.Random, count: int) -> list:
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "judul": f"Penanaman {_weighted(rng, JENIS_POHON)} di {rng.choice(KECAMATAN)} #{i + 1}",
+            "deskripsi_singkat": "Kegiatan penanaman bersama ASN dan masyarakat dalam Program Agro Mopomulo.",
+            "link_berita": f"https://gorutkab.go.id/berita/{i + 1}",
+            "isi_berita": "Program Agro Mopomulo terus berjalan. " * rng.randint(10, 80),
+            "gambar_url": None,
+            "gambar_type": "link",
+            "is_active": rng.random() < 0.3,
+            "created_at": now - timedelta(hours=rng.randint(0, 24 * 365)),
+        }
+        for i in range(count)
+    ]
+
+
+def generate_agenda(rng: random.Random, count: int) -> list:
+    today = datetime.now(timezone.utc).date()
+    items = []
+    for i in range(count):
+        tanggal = today + timedelta(days=rng.randint(-180, 120))
+        items.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "nama_kegiatan": f"Penanaman Serentak {rng.choice(KECAMATAN)} {i + 1}",
+            "hari": ["Senin", "Selasa", "Rabu", "Kamis", "Jumat", "Sabtu", "Minggu"][tanggal.weekday()],
+            "tanggal": tanggal.isoformat(),
+            "lokasi_kecamatan": rng.choice(KECAMATAN),
+            "lokasi_desa": f"Desa {rng.choice(NAMA_BELAKANG)}",
+            "deskripsi": "Penanaman bibit bersama perangkat desa.",
+            "status": "upcoming",
+            "created_at": datetime.now(timezone.utc),
+        })
+    return items
+
+
+async def seed(database, scale: int, seed_value: int = 42, drop: bool = True) -> dict:
+    """Populate `database` (a Motor or mongomock-motor database) and return document counts."""
+    rng = random.Random(seed_value)
+    if drop:
+        for name in ("opd", "partisipasi", "berita", "agenda"):
+            await database[name].delete_many({})
+
+    opd_list = generate_opd(rng, scale)
+    await database.opd.insert_many([dict(o) for o in opd_list])
+
+    inserted = 0
+    batch = []
+    for doc in generate_partisipasi(rng, opd_list, scale):
+        batch.append(doc)
+        if len(batch) >= BATCH_SIZE:
+            await database.partisipasi.insert_many(batch)
+            inserted += len(batch)
+            batch = []
+    if batch:
+        await database.partisipasi.insert_many(batch)
+        inserted += len(batch)
+
+    berita = generate_berita(rng, min(2_000, max(20, scale // 100)))
+    agenda = generate_agenda(rng, min(1_000, max(20, scale // 200)))
+    await database.berita.insert_many(berita)
+    await database.agenda.insert_many(agenda)
+    return {"opd": len(opd_list), "partisipasi": inserted, "berita": len(berita), "agenda": len(agenda)}
+
+
+def parse_scale(value: str) -> int:
+    key = value.lower()
+    if key in SCALES:
+        return SCALES[key]
+    return int(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed synthetic Agro Mopomulo data")
+    parser.add_argument("--scale", default="10k", help="1k, 10k, 100k, 1m or a participant count")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db", default="agro_bench")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mongomock", action="store_true", help="seed an in-memory mongomock database")
+    args = parser.parse_args()
+
+    if args.mongomock:
+        from mongomock_motor import AsyncMongoMockClient
+        database = AsyncMongoMockClient()[args.db]
+    else:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        database = AsyncIOMotorClient(args.mongo_url)[args.db]
+
+    counts = asyncio.run(seed(database, parse_scale(args.scale), args.seed))
+    print(counts)
+
+
+if __name__ == "__main__":
+    main()
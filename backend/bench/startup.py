@@ -0,0 +1,98 @@
+"""
+Cold-start benchmark: how long `import server` takes and which modules dominate.
+
+Runs `python -X importtime -c "import server"` in fresh subprocesses (so the
+numbers include every transitive import, like a new container would), then
+reports the median wall time, the slowest top-level imports and whether the
+heavy reporting libraries were loaded at boot.
+
+    python -m bench.startup --runs 5
+    python -m bench.startup --runs 5 --output bench_results/startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+HEAVY = ("pandas", "openpyxl", "reportlab", "numpy")
+
+PROBE = (
+    "import sys, server; "
+    "print(','.join(m for m in %r if m in sys.modules))" % (HEAVY,)
+)
+
+
+def parse_importtime(stderr: str) -> dict:
+    """Map module -> (self, cumulative) microseconds from -X importtime output."""
+    modules = {}
+    for line in stderr.splitlines():
+        # "import time:       123 |       4567 |   package.module"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        head, cumulative, name = line.split("|")
+        self_us = head.split(":", 1)[1]
+        modules[name.rstrip()[1:]] = (int(self_us), int(cumulative))
+    return modules
+
+
+def run_once() -> dict:
+    env = dict(os.environ)
+    env.setdefault("MONGO_URL", "mongodb://localhost:27017")
+    env.setdefault("DB_NAME", "agro_startup_bench")
+    env.setdefault("JWT_SECRET", "bench-secret")
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    wall = time.perf_counter() - started
+    modules = parse_importtime(proc.stderr)
+    loaded_heavy = [m for m in proc.stdout.strip().split(",") if m]
+    return {"wall_s": wall, "modules": modules, "heavy_loaded": loaded_heavy}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure server.py cold-start import time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="number of slowest direct imports of server.py to show")
+    parser.add_argument("--output", help="write a JSON report to this path")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    last = runs[-1]
+    server_us = last["modules"].get("server", (0, 0))[1]
+    # Imports made directly by server.py are indented one level in -X importtime output
+    direct = sorted(
+        ((name.strip(), cum) for name, (_, cum) in last["modules"].items()
+         if name.startswith("  ") and not name.startswith("    ")),
+        key=lambda item: item[1], reverse=True
+    )[:args.top]
+
+    report = {
+        "runs": args.runs,
+        "wall_median_s": round(statistics.median(r["wall_s"] for r in runs), 3),
+        "wall_min_s": round(min(r["wall_s"] for r in runs), 3),
+        "import_server_ms": round(server_us / 1000, 1),
+        "heavy_loaded_at_boot": last["heavy_loaded"],
+        "slowest_imports_ms": {name: round(cum / 1000, 1) for name, cum in direct},
+    }
+
+    print(f"wall median {report['wall_median_s']}s (min {report['wall_min_s']}s), "
+          f"import server {report['import_server_ms']} ms")
+    print(f"heavy libraries loaded at boot: {report['heavy_loaded_at_boot'] or 'none'}")
+    for name, ms in report["slowest_imports_ms"].items():
+        print(f"  {ms:>8.1f} ms  {name}")
+
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
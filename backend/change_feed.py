@@ -0,0 +1,321 @@
+"""
+Background consumer that keeps in-process caches and rollups in step with
+MongoDB, including writes made outside the API (mongosh fixes, migrations).
+
+On a replica set it follows one change stream over the watched collections
+and hands every event to the callbacks subscribed for that collection. The
+resume token is saved to `change_stream_state` so a restart or a dropped
+connection continues where it left off; if the token has fallen off the
+oplog every subscriber gets an `invalidate` event and starts from scratch.
+
+A standalone mongod has no change streams. There one worker, the holder of
+a lease in `change_stream_state`, takes a cheap fingerprint of each
+collection every CHANGE_FEED_POLL_INTERVAL seconds (estimated count plus the
+newest _id, both answered from metadata and the _id index) and stores it in
+one shared document; every worker reads that document and sends a `poll`
+event (with the `before`/`after` fingerprints, no document details) when a
+collection's fingerprint changes. Inserts and deletes are seen this way,
+in-place edits made outside the API are not: the caches have TTLs for that.
+
+The same lease elects a leader in change stream mode. Callbacks subscribed
+with leader_only=True (database writes that must happen once, not once per
+worker) only run in the leader, and on_leader callbacks run whenever a
+worker takes the lease over, to catch up on events missed in between.
+
+Callbacks receive the raw change event (or a synthetic `poll`/`invalidate`
+event with only operationType and ns) and may be plain functions or coroutines.
+"""
+import asyncio
+import inspect
+import logging
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pymongo.errors import DuplicateKeyError, OperationFailure, PyMongoError
+
+import metrics
+from config import CHANGE_FEED_POLL_INTERVAL, CHANGE_FEED_TOKEN_SAVE_INTERVAL, CHANGE_FEED_NAME
+
+logger = logging.getLogger(__name__)
+
+# Hanya koleksi yang punya subscriber; tambahkan koleksi di sini bersama subscriber-nya
+WATCHED_COLLECTIONS = ["partisipasi", "opd", "settings"]
+STATE_COLLECTION = "change_stream_state"
+LEADER_LEASE = 30.0  # detik; diperpanjang setiap LEADER_LEASE / 3
+UNSEEN = object()  # polling: koleksi belum pernah diambil sidik jarinya
+
+# Kode error MongoDB
+NOT_A_REPLICA_SET = 40573
+CHANGE_STREAM_HISTORY_LOST = 286
+INVALID_RESUME_TOKEN = 260
+
+CHANGE_EVENTS = metrics.Counter(
+    "change_feed_events_total", "Change events dispatched by collection and operation",
+    ("collection", "operation")
+)
+CHANGE_FEED_RESTARTS = metrics.Counter(
+    "change_feed_restarts_total", "Change stream restarts by reason", ("reason",)
+)
+
+class ChangeFeed:
+
+    def __init__(self, database, collections: Optional[List[str]] = None, name: str = CHANGE_FEED_NAME,
+                 poll_interval: float = CHANGE_FEED_POLL_INTERVAL,
+                 token_save_interval: float = CHANGE_FEED_TOKEN_SAVE_INTERVAL):
+        self.db = database
+        self.collections = collections or list(WATCHED_COLLECTIONS)
+        self.name = name
+        self.poll_interval = poll_interval
+        self.token_save_interval = token_save_interval
+        self.mode: Optional[str] = None  # "change_stream" | "polling"
+        self.pre_images = False
+        self.resume_token = None
+        self.owner = uuid.uuid4().hex
+        self.leader = False
+        self._listeners: Dict[str, List[Tuple[Callable, bool]]] = {}
+        self._mode_listeners: List[Callable] = []
+        self._leader_listeners: List[Callable] = []
+        self._fingerprints: Dict[str, object] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._lead_task: Optional[asyncio.Task] = None
+        self._token_saved_at = 0.0
+
+    # ---- subscriptions ----
+
+    def subscribe(self, collection: str, callback: Callable, leader_only: bool = False):
+        self._listeners.setdefault(collection, []).append((callback, leader_only))
+
+    def on_leader(self, callback: Callable):
+        """callback() whenever this worker becomes the leader (plain function or coroutine)."""
+        self._leader_listeners.append(callback)
+
+    def on_mode(self, callback: Callable):
+        """callback(mode) whenever the feed switches between change streams and polling."""
+        self._mode_listeners.append(callback)
+
+    def _set_mode(self, mode: str):
+        if mode != self.mode:
+            self.mode = mode
+            logger.info(f"Change feed berjalan dalam mode {mode}")
+            for callback in self._mode_listeners:
+                callback(mode)
+
+    async def dispatch(self, change: dict):
+        collection = change.get("ns", {}).get("coll")
+        CHANGE_EVENTS.inc(collection=collection or "", operation=change.get("operationType", ""))
+        for callback, leader_only in self._listeners.get(collection, []):
+            if leader_only and not self.leader:
+                continue
+            try:
+                result = callback(change)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"Listener change feed {collection} gagal: {e}")
+
+    async def invalidate_all(self):
+        for collection in self.collections:
+            await self.dispatch({"operationType": "invalidate", "ns": {"db": self.db.name, "coll": collection}})
+
+    # ---- lifecycle ----
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        for task in (self._task, self._lead_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._task = self._lead_task = None
+        if self.leader:
+            try:
+                await self._release_leadership()
+            except PyMongoError as e:
+                logger.warning(f"Gagal melepas lease change feed: {e}")
+        if self.mode == "change_stream":
+            try:
+                await self._save_token(force=True)
+            except PyMongoError as e:
+                logger.warning(f"Gagal menyimpan resume token: {e}")
+
+    async def _run(self):
+        if not await self._supports_change_streams():
+            await self._poll_forever()
+            return
+        self.resume_token = await self._load_token()
+        self.pre_images = await self._enable_pre_images()
+        self._lead_task = asyncio.create_task(self._lead_forever())
+        backoff = 1.0
+        while True:
+            try:
+                await self._watch()
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                if e.code == NOT_A_REPLICA_SET:
+                    await self._poll_forever()
+                    return
+                if e.code in (CHANGE_STREAM_HISTORY_LOST, INVALID_RESUME_TOKEN):
+                    logger.warning("Resume token change feed kadaluarsa, cache dimuat ulang")
+                    CHANGE_FEED_RESTARTS.inc(reason="history_lost")
+                    self.resume_token = None
+                    await self._clear_token()
+                    await self.invalidate_all()
+                    continue
+                CHANGE_FEED_RESTARTS.inc(reason="error")
+                logger.warning(f"Change stream gagal: {e}")
+            except PyMongoError as e:
+                CHANGE_FEED_RESTARTS.inc(reason="error")
+                logger.warning(f"Change stream terputus: {e}")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    async def _supports_change_streams(self) -> bool:
+        try:
+            hello = await self.db.client.admin.command("hello")
+        except Exception as e:
+            logger.info(f"Topologi MongoDB tidak diketahui ({e}), change feed memakai polling")
+            return False
+        return "setName" in hello or hello.get("msg") == "isdbgrid"
+
+    async def _enable_pre_images(self) -> bool:
+        """MongoDB 6.0+: keep pre-images of partisipasi so updates/deletes yield exact rollup deltas."""
+        try:
+            await self.db.command("collMod", "partisipasi", changeStreamPreAndPostImages={"enabled": True})
+            return True
+        except PyMongoError as e:
+            logger.info(f"Pre-image change stream tidak tersedia ({e}), update/delete memicu hitung ulang")
+            return False
+
+    # ---- leader lease ----
+
+    async def renew_leadership(self) -> bool:
+        """Take or extend the lease; runs the on_leader callbacks when leadership is gained."""
+        now = datetime.now(timezone.utc)
+        try:
+            await self.db[STATE_COLLECTION].find_one_and_update(
+                {"_id": f"{self.name}:leader", "$or": [
+                    {"lease_until": {"$lt": now}}, {"lease_until": None}, {"owner": self.owner}
+                ]},
+                {"$set": {"owner": self.owner, "lease_until": now + timedelta(seconds=LEADER_LEASE)}},
+                upsert=True
+            )
+            leader = True
+        except DuplicateKeyError:
+            leader = False  # worker lain memegang lease
+        gained = leader and not self.leader
+        self.leader = leader
+        if gained:
+            logger.info("Worker ini menjadi leader change feed")
+            for callback in self._leader_listeners:
+                try:
+                    result = callback()
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception as e:
+                    logger.warning(f"Listener leader change feed gagal: {e}")
+        return leader
+
+    async def _release_leadership(self):
+        self.leader = False
+        await self.db[STATE_COLLECTION].update_one(
+            {"_id": f"{self.name}:leader", "owner": self.owner}, {"$set": {"lease_until": None}}
+        )
+
+    async def _lead_forever(self):
+        while True:
+            try:
+                await self.renew_leadership()
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as e:
+                self.leader = False
+                logger.warning(f"Gagal memperpanjang lease change feed: {e}")
+            await asyncio.sleep(LEADER_LEASE / 3)
+
+    # ---- change stream mode ----
+
+    async def _watch(self):
+        pipeline = [{"$match": {"ns.coll": {"$in": self.collections}}}]
+        options = {"resume_after": self.resume_token} if self.resume_token else {}
+        if self.pre_images:
+            options["full_document"] = "whenAvailable"
+            options["full_document_before_change"] = "whenAvailable"
+        else:
+            # Tanpa pre-image (MongoDB < 6) setidaknya dokumen sesudah update diketahui
+            options["full_document"] = "updateLookup"
+        async with self.db.watch(pipeline, **options) as stream:
+            self._set_mode("change_stream")
+            async for change in stream:
+                await self.dispatch(change)
+                self.resume_token = stream.resume_token
+                await self._save_token()
+
+    async def _load_token(self):
+        state = await self.db[STATE_COLLECTION].find_one({"_id": self.name})
+        return state.get("resume_token") if state else None
+
+    async def _save_token(self, force: bool = False):
+        loop = asyncio.get_running_loop()
+        if self.resume_token is None:
+            return
+        if not force and loop.time() - self._token_saved_at < self.token_save_interval:
+            return
+        self._token_saved_at = loop.time()
+        await self.db[STATE_COLLECTION].update_one(
+            {"_id": self.name},
+            {"$set": {"resume_token": self.resume_token, "updated_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+
+    async def _clear_token(self):
+        await self.db[STATE_COLLECTION].delete_one({"_id": self.name})
+
+    # ---- polling mode (standalone mongod) ----
+
+    async def _fingerprint(self, collection: str) -> list:
+        """[estimated count, newest _id]: metadata and one _id index lookup, no collection scan."""
+        count = await self.db[collection].estimated_document_count()
+        newest = await self.db[collection].find({}, {"_id": 1}).sort("_id", -1).limit(1).to_list(1)
+        return [count, newest[0]["_id"] if newest else None]
+
+    async def poll_once(self):
+        state_id = f"{self.name}:poll"
+        if await self.renew_leadership():
+            fingerprints = {collection: await self._fingerprint(collection) for collection in self.collections}
+            await self.db[STATE_COLLECTION].update_one(
+                {"_id": state_id},
+                {"$set": {"fingerprints": fingerprints, "updated_at": datetime.now(timezone.utc)}},
+                upsert=True
+            )
+        else:
+            state = await self.db[STATE_COLLECTION].find_one({"_id": state_id})
+            fingerprints = (state or {}).get("fingerprints", {})
+        for collection in self.collections:
+            if collection not in fingerprints:
+                continue
+            fingerprint = fingerprints[collection]
+            previous = self._fingerprints.get(collection, UNSEEN)
+            self._fingerprints[collection] = fingerprint
+            if previous is not UNSEEN and previous != fingerprint:
+                await self.dispatch({
+                    "operationType": "poll", "ns": {"db": self.db.name, "coll": collection},
+                    "before": previous, "after": fingerprint,
+                })
+
+    async def _poll_forever(self):
+        self._set_mode("polling")
+        while True:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Polling change feed gagal: {e}")
+            await asyncio.sleep(self.poll_interval)
@@ -0,0 +1,125 @@
+"""
+Runtime configuration, read once from the environment (and backend/.env).
+"""
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+# MongoDB connection
+MONGO_URL = os.environ.get('MONGO_URL')
+DB_NAME = os.environ.get('DB_NAME')
+
+# JWT Config
+JWT_SECRET = os.environ.get('JWT_SECRET')
+if not JWT_SECRET:
+    raise ValueError("JWT_SECRET environment variable is required")
+JWT_ALGORITHM = "HS256"
+JWT_EXPIRATION_HOURS = 24
+
+# CORS Configuration - Support for deployment
+CORS_ORIGINS_ENV = os.environ.get('CORS_ORIGINS', '*')
+if CORS_ORIGINS_ENV == '*':
+    CORS_ORIGINS = ["*"]
+else:
+    CORS_ORIGINS = [origin.strip() for origin in CORS_ORIGINS_ENV.split(',')]
+
+
+def env_flag(name: str, default: bool = False) -> bool:
+    value = os.environ.get(name, '').strip().lower()
+    return value in ('1', 'true', 'yes') if value else default
+
+
+def env_int(name: str, default: Optional[int]) -> Optional[int]:
+    value = os.environ.get(name, '').strip()
+    return int(value) if value else default
+
+
+def env_float(name: str, default: float) -> float:
+    value = os.environ.get(name, '').strip()
+    return float(value) if value else default
+
+
+# Pool, timeout dan kompresi koneksi MongoDB (default pymongo bila tidak diisi)
+MONGO_MAX_POOL_SIZE = env_int('MONGO_MAX_POOL_SIZE', 100)
+MONGO_MIN_POOL_SIZE = env_int('MONGO_MIN_POOL_SIZE', 0)
+MONGO_MAX_IDLE_TIME_MS = env_int('MONGO_MAX_IDLE_TIME_MS', None)
+MONGO_WAIT_QUEUE_TIMEOUT_MS = env_int('MONGO_WAIT_QUEUE_TIMEOUT_MS', None)
+MONGO_SERVER_SELECTION_TIMEOUT_MS = env_int('MONGO_SERVER_SELECTION_TIMEOUT_MS', 10000)
+MONGO_CONNECT_TIMEOUT_MS = env_int('MONGO_CONNECT_TIMEOUT_MS', 10000)
+MONGO_SOCKET_TIMEOUT_MS = env_int('MONGO_SOCKET_TIMEOUT_MS', None)
+MONGO_COMPRESSORS = [c.strip() for c in os.environ.get('MONGO_COMPRESSORS', 'zstd,snappy,zlib').split(',') if c.strip()]
+# Endpoint baca publik (stats, progress, opd, berita, ...) boleh dilayani secondary;
+# tulis dan endpoint admin selalu ke primary
+MONGO_PUBLIC_READ_PREFERENCE = os.environ.get('MONGO_PUBLIC_READ_PREFERENCE', 'primary')
+
+
+# Agenda: tanggal agenda adalah tanggal lokal Gorontalo (WITA, UTC+8)
+AGENDA_TZ_OFFSET_HOURS = env_int('AGENDA_TZ_OFFSET_HOURS', 8)
+AGENDA_SCHEDULER_INTERVAL = env_int('AGENDA_SCHEDULER_INTERVAL', 300)  # detik
+
+# Settings singleton cache, untuk sinkron antar worker
+SETTINGS_CACHE_TTL = env_int('SETTINGS_CACHE_TTL', 60)  # detik
+
+# Live stats (SSE /api/stats/stream)
+SSE_HEARTBEAT_SECONDS = env_float('SSE_HEARTBEAT_SECONDS', 15)
+SSE_QUEUE_SIZE = env_int('SSE_QUEUE_SIZE', 64)  # event tertunda per klien sebelum resync
+LIVE_STATS_SNAPSHOT_TTL = env_float('LIVE_STATS_SNAPSHOT_TTL', 30)  # detik
+
+# Change feed: sinkronkan cache & rollup dengan perubahan langsung di MongoDB
+CHANGE_FEED = env_flag('CHANGE_FEED', True)
+CHANGE_FEED_NAME = os.environ.get('CHANGE_FEED_NAME', 'api')  # kunci resume token di change_stream_state
+CHANGE_FEED_POLL_INTERVAL = env_float('CHANGE_FEED_POLL_INTERVAL', 10)  # detik, mongod standalone
+CHANGE_FEED_TOKEN_SAVE_INTERVAL = env_float('CHANGE_FEED_TOKEN_SAVE_INTERVAL', 5)  # detik
+CHANGE_FEED_RESYNC_DELAY = env_float('CHANGE_FEED_RESYNC_DELAY', 2)  # detik; event tanpa pre-image digabung
+
+# Ringkasan progress per kategori (agregat opd), di-cache per proses
+PROGRESS_SUMMARY_TTL = env_float('PROGRESS_SUMMARY_TTL', 30)  # detik
+
+# Direktori OPD in-process (id -> OPD, nama -> id); batas basi bila change feed mati
+OPD_DIRECTORY_TTL = env_float('OPD_DIRECTORY_TTL', 60)  # detik
+
+# Riwayat harian pohon/partisipan (stats_daily), diperbarui inkremental di background
+TIMESERIES_INTERVAL = env_int('TIMESERIES_INTERVAL', 300)  # detik
+TIMESERIES_MAX_DAYS = env_int('TIMESERIES_MAX_DAYS', 1100)  # rentang maksimum per permintaan
+
+# POST /api/partisipasi/batch: jumlah data maksimum per permintaan
+PARTISIPASI_BATCH_MAX = env_int('PARTISIPASI_BATCH_MAX', 100)
+
+# Admission control endpoint tulis publik (POST /api/partisipasi[/batch], /api/upload/image).
+# Batas berlaku untuk seluruh deployment dan dibagi rata ke WEB_CONCURRENCY worker.
+RATE_LIMIT = env_flag('RATE_LIMIT', True)
+RATE_LIMIT_IP_PER_MINUTE = env_float('RATE_LIMIT_IP_PER_MINUTE', 30)
+RATE_LIMIT_IP_BURST = env_int('RATE_LIMIT_IP_BURST', 10)
+RATE_LIMIT_GLOBAL_PER_SECOND = env_float('RATE_LIMIT_GLOBAL_PER_SECOND', 50)
+RATE_LIMIT_GLOBAL_BURST = env_int('RATE_LIMIT_GLOBAL_BURST', 200)
+RATE_LIMIT_FORWARDED_HOPS = env_int('RATE_LIMIT_FORWARDED_HOPS', 0)  # jumlah reverse proxy tepercaya
+WEB_CONCURRENCY = max(env_int('WEB_CONCURRENCY', 1), 1)
+UPLOAD_MAX_BYTES = env_int('UPLOAD_MAX_BYTES', 2 * 1024 * 1024)  # per file
+UPLOAD_INFLIGHT_BYTES = env_int('UPLOAD_INFLIGHT_BYTES', 32 * 1024 * 1024)  # semua upload berjalan
+UPLOAD_SPOOL_BYTES = env_int('UPLOAD_SPOOL_BYTES', 1024 * 1024)  # lebih dari ini ditulis ke file sementara
+IMPORT_MAX_BYTES = env_int('IMPORT_MAX_BYTES', 20 * 1024 * 1024)  # file Excel import (admin)
+# Upload bertahap (resumable) untuk foto bukti: potongan dirakit di disk lokal
+RESUMABLE_UPLOAD_DIR = os.environ.get('RESUMABLE_UPLOAD_DIR', os.path.join(tempfile.gettempdir(), 'agro-resumable-uploads'))
+RESUMABLE_UPLOAD_TTL_HOURS = env_float('RESUMABLE_UPLOAD_TTL_HOURS', 24)  # upload tak selesai dihapus
+
+# Idempotency-Key untuk POST /api/partisipasi[/batch] dan /api/upload/image
+IDEMPOTENCY_TTL_HOURS = env_float('IDEMPOTENCY_TTL_HOURS', 24)  # lama respons disimpan untuk replay
+IDEMPOTENCY_LEASE_SECONDS = env_float('IDEMPOTENCY_LEASE_SECONDS', 60)  # klaim worker mati diambil alih
+IDEMPOTENCY_WAIT_SECONDS = env_float('IDEMPOTENCY_WAIT_SECONDS', 5)  # duplikat menunggu hasil asli
+
+# Library laporan dimuat lazy; opsional dipanaskan di background setelah startup
+HEAVY_MODULES_WARMUP = env_flag('HEAVY_MODULES_WARMUP')
+HEAVY_MODULES_WARMUP_DELAY = env_float('HEAVY_MODULES_WARMUP_DELAY', 5)
+
+# /api/metrics: token untuk scraper Prometheus (Authorization: Bearer <token>); admin login selalu boleh
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# Debug: deteksi pekerjaan sinkron yang memblokir event loop
+LOOP_BLOCK_DETECTOR = env_flag('LOOP_BLOCK_DETECTOR')
+LOOP_BLOCK_THRESHOLD_MS = env_int('LOOP_BLOCK_THRESHOLD_MS', 100)
@@ -0,0 +1,45 @@
+"""
+Shared helpers for the admin update handlers: one find_one_and_update round
+trip that returns the stored document, with the usual 400/404 responses.
+"""
+from typing import List, Optional
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+from pymongo import ReturnDocument
+
+def update_fields(data: BaseModel) -> dict:
+    """Fields sent in a partial update (None = not sent); 400 when nothing is left."""
+    update_data = {k: v for k, v in data.model_dump().items() if v is not None}
+    if not update_data:
+        raise HTTPException(status_code=400, detail="Tidak ada data untuk diupdate")
+    return update_data
+
+def set_update(fields: dict, pipeline: Optional[List[dict]] = None):
+    """
+    A plain $set, or a pipeline update when later stages derive fields from
+    the new values ($literal keeps text such as "$x" from being read as a
+    field path).
+    """
+    if not pipeline:
+        return {"$set": fields}
+    return [{"$set": {k: {"$literal": v} for k, v in fields.items()}}, *pipeline]
+
+async def update_by_id(
+    collection,
+    doc_id: str,
+    update,
+    not_found: str,
+    projection: Optional[dict] = None,
+    return_document: ReturnDocument = ReturnDocument.AFTER,
+) -> dict:
+    """
+    Apply `update` (an update document or pipeline) to the document with
+    this `id` and return it (after the update by default) in one round trip.
+    """
+    doc = await collection.find_one_and_update(
+        {"id": doc_id}, update, projection=projection or {"_id": 0}, return_document=return_document
+    )
+    if doc is None:
+        raise HTTPException(status_code=404, detail=not_found)
+    return doc
@@ -0,0 +1,107 @@
+"""
+MongoDB client construction, index bootstrap and the request-scoped database dependencies.
+"""
+import importlib.util
+from datetime import timezone
+from typing import List
+
+from fastapi import Request
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo.read_preferences import read_pref_mode_from_name, make_read_preference
+
+import metrics
+from config import (
+    MONGO_MAX_POOL_SIZE, MONGO_MIN_POOL_SIZE, MONGO_MAX_IDLE_TIME_MS, MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    MONGO_SERVER_SELECTION_TIMEOUT_MS, MONGO_CONNECT_TIMEOUT_MS, MONGO_SOCKET_TIMEOUT_MS,
+    MONGO_COMPRESSORS, MONGO_PUBLIC_READ_PREFERENCE,
+)
+
+# Kompresor wire protocol dan modul Python yang dibutuhkan (zlib selalu tersedia)
+COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+def available_compressors(names: List[str]) -> List[str]:
+    """Drop compressors whose module is not installed (pymongo would warn on every client)."""
+    return [
+        name for name in names
+        if name in COMPRESSOR_MODULES and importlib.util.find_spec(COMPRESSOR_MODULES[name]) is not None
+    ]
+
+def client_options() -> dict:
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": MONGO_MAX_IDLE_TIME_MS,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS,
+        # Tanggal BSON dibaca sebagai datetime UTC ber-timezone (output ISO tetap "+00:00")
+        "tz_aware": True,
+        "tzinfo": timezone.utc,
+    }
+    options = {key: value for key, value in options.items() if value is not None}
+    compressors = available_compressors(MONGO_COMPRESSORS)
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+    return options
+
+def create_client(mongo_url: str) -> AsyncIOMotorClient:
+    return AsyncIOMotorClient(
+        mongo_url,
+        event_listeners=[metrics.DBCommandListener(), metrics.DBPoolListener()],
+        **client_options()
+    )
+
+def public_read_database(db: AsyncIOMotorDatabase, mode: str = MONGO_PUBLIC_READ_PREFERENCE) -> AsyncIOMotorDatabase:
+    """The same database with the read preference used for public, read-only endpoints."""
+    if mode == "primary":
+        return db
+    read_preference = make_read_preference(read_pref_mode_from_name(mode), None)
+    return db.with_options(read_preference=read_preference)
+
+def get_db(request: Request) -> AsyncIOMotorDatabase:
+    return request.app.state.db
+
+def get_read_db(request: Request) -> AsyncIOMotorDatabase:
+    """Database for public reads; may be served by a secondary (MONGO_PUBLIC_READ_PREFERENCE)."""
+    return request.app.state.read_db
+
+async def ensure_indexes(db):
+    """Create the indexes backing sorted/paginated listings (idempotent)."""
+    await db.berita.create_index([("created_at", -1), ("id", -1)])
+    await db.berita.create_index([("is_active", 1), ("created_at", -1)])
+    await db.edukasi.create_index([("created_at", 1), ("id", 1)])
+    await db.gallery.create_index([("created_at", 1), ("id", 1)])
+    await db.agenda.create_index([("tanggal", 1), ("id", 1)])
+    await db.agenda.create_index([("tanggal_date", 1), ("id", 1)])
+    await db.agenda.create_index([("status", 1), ("tanggal_date", 1)])
+    # /api/progress: OPD terurut progress, opsional per kategori
+    await db.opd.create_index([("progress_rasio", -1), ("id", 1)])
+    await db.opd.create_index([("kategori", 1), ("progress_rasio", -1), ("id", 1)])
+    # Filter from/to partisipasi dan job riwayat harian membaca per created_at; endpoint tren membaca stats_daily
+    await db.partisipasi.create_index([("created_at", 1)])
+    # Filter/agregasi per kategori OPD langsung di partisipasi (field hasil denormalisasi);
+    # opd_id untuk fan-out nama/kategori saat OPD diubah
+    await db.partisipasi.create_index([("kategori", 1), ("created_at", 1)])
+    await db.partisipasi.create_index([("opd_id", 1)])
+    await db.stats_daily.create_index([("day", 1), ("opd_id", 1), ("jenis_pohon", 1)], unique=True)
+    # Respons Idempotency-Key kedaluwarsa otomatis
+    await db.idempotency_keys.create_index([("expires_at", 1)], expireAfterSeconds=0)
+    # Text indexes untuk /api/search (satu text index per koleksi).
+    # default_language "none": tanpa stemming/stopword bahasa Inggris untuk teks berbahasa Indonesia
+    await db.berita.create_index(
+        [("judul", "text"), ("deskripsi_singkat", "text")],
+        name="berita_text", default_language="none", weights={"judul": 5, "deskripsi_singkat": 1}
+    )
+    await db.edukasi.create_index(
+        [("judul", "text"), ("konten", "text")],
+        name="edukasi_text", default_language="none", weights={"judul": 5, "konten": 1}
+    )
+    await db.agenda.create_index(
+        [("nama_kegiatan", "text"), ("lokasi_desa", "text")],
+        name="agenda_text", default_language="none", weights={"nama_kegiatan": 5, "lokasi_desa": 2}
+    )
+    await db.partisipasi.create_index(
+        [("nama_lengkap", "text"), ("nip", "text")],
+        name="partisipasi_text", default_language="none", weights={"nama_lengkap": 3, "nip": 5}
+    )
@@ -0,0 +1,124 @@
+"""
+created_at/updated_at as native BSON dates.
+
+New documents store `datetime.now(timezone.utc)`; API responses keep the old
+ISO 8601 strings (`2025-01-01T08:00:00.123000+00:00`). Documents written
+before the switch still hold ISO strings and are converted in place by
+`backfill_dates` (at startup, or `python dates.py`), so range filters and
+sorts never see a mix of strings and dates.
+"""
+import asyncio
+import logging
+from datetime import date, datetime, timezone, timedelta
+from typing import Optional
+
+from fastapi import HTTPException
+from pymongo import UpdateOne
+
+from agenda_schedule import AGENDA_TZ
+
+logger = logging.getLogger(__name__)
+
+# Koleksi dan field tanggal yang dulu disimpan sebagai string ISO
+DATE_FIELDS = {
+    "partisipasi": ["created_at"],
+    "opd": ["created_at"],
+    "berita": ["created_at"],
+    "edukasi": ["created_at"],
+    "gallery": ["created_at"],
+    "agenda": ["created_at"],
+    "users": ["created_at"],
+    "kontak_whatsapp": ["updated_at"],
+}
+BACKFILL_BATCH = 1000
+
+def as_utc(value: datetime) -> datetime:
+    """Motor returns naive UTC datetimes unless the client is tz_aware."""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+def parse_datetime(value) -> Optional[datetime]:
+    """A stored date (BSON date or legacy ISO string) as an aware UTC datetime."""
+    if isinstance(value, datetime):
+        return as_utc(value)
+    try:
+        return as_utc(datetime.fromisoformat(str(value)))
+    except (TypeError, ValueError):
+        return None
+
+def iso_datetime(value):
+    """Response format: dates become ISO strings with an explicit UTC offset."""
+    if isinstance(value, datetime):
+        return as_utc(value).isoformat()
+    return value
+
+def range_bound(value: Optional[str], end: bool = False) -> Optional[datetime]:
+    """
+    Parse a `from`/`to` query value. A plain date (YYYY-MM-DD) is a local
+    (WITA) day and `to` includes the whole day; a full timestamp without an
+    offset is taken as UTC.
+    """
+    if not value:
+        return None
+    try:
+        if len(value) == 10:
+            day = date.fromisoformat(value)
+            start = datetime(day.year, day.month, day.day, tzinfo=AGENDA_TZ).astimezone(timezone.utc)
+            return start + timedelta(days=1) if end else start
+        return as_utc(datetime.fromisoformat(value))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Format tanggal harus YYYY-MM-DD atau ISO 8601")
+
+def date_range_query(field: str, date_from: Optional[str], date_to: Optional[str]) -> dict:
+    """Mongo filter for `from <= field < to` (empty when neither bound is given)."""
+    start, end = range_bound(date_from), range_bound(date_to, end=True)
+    if start and end and start >= end:
+        raise HTTPException(status_code=400, detail="Tanggal 'from' harus sebelum 'to'")
+    condition = {}
+    if start:
+        condition["$gte"] = start
+    if end:
+        condition["$lt"] = end
+    return {field: condition} if condition else {}
+
+async def backfill_dates(db) -> int:
+    """Convert legacy ISO string dates to BSON dates; returns the number of documents changed."""
+    converted = 0
+    for collection, fields in DATE_FIELDS.items():
+        for field in fields:
+            last_id = None
+            while True:
+                query = {field: {"$type": "string"}}
+                if last_id is not None:
+                    query["_id"] = {"$gt": last_id}
+                docs = await db[collection].find(query, {field: 1}).sort("_id", 1) \
+                    .limit(BACKFILL_BATCH).to_list(BACKFILL_BATCH)
+                if not docs:
+                    break
+                last_id = docs[-1]["_id"]
+                ops = []
+                for doc in docs:
+                    parsed = parse_datetime(doc[field])
+                    if parsed is None:
+                        # Dibiarkan sebagai string; dilewati agar batch berikutnya tetap maju
+                        logger.warning(f"{collection}.{field} tidak bisa dibaca sebagai tanggal: {doc[field]!r}")
+                        continue
+                    ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {field: parsed}}))
+                if ops:
+                    await db[collection].bulk_write(ops, ordered=False)
+                    converted += len(ops)
+    return converted
+
+if __name__ == "__main__":
+    # python dates.py  -> ubah created_at/updated_at lama (string ISO) menjadi tanggal BSON
+    from config import MONGO_URL, DB_NAME
+    from database import create_client
+
+    async def main():
+        client = create_client(MONGO_URL)
+        try:
+            converted = await backfill_dates(client[DB_NAME])
+            print(f"{converted} dokumen dikonversi ke tanggal BSON")
+        finally:
+            client.close()
+
+    asyncio.run(main())
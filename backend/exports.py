@@ -0,0 +1,249 @@
+"""
+Participant exports behind /api/export/*.
+
+Every format uses the column layout of the Excel import: Nama, NIP, Alamat,
+No. WhatsApp, OPD, Jumlah Pohon, Jenis Pohon, Sumber Bibit, then Lokasi
+Tanam / Latitude / Longitude for each entry of lokasi_list. The number of
+lokasi columns is found with one aggregation before the first row.
+
+CSV and NDJSON are streamed straight from the Mongo cursor, EXPORT_BATCH_ROWS
+rows per chunk, so memory stays flat for full dumps. When the client goes
+away Starlette cancels the response and the cursor is closed with it.
+Exports never read bukti_url (photos stored as data URLs).
+
+Parquet is for analysts: typed snake_case columns instead of the Excel
+layout, either one row per participant (table=partisipasi) or one row per
+lokasi_list entry (table=lokasi, joined on partisipasi_id). Arrow record
+batches are written with zstd to a spooled temporary file, since the
+Parquet footer is only known at the end, and the file is then streamed.
+"""
+import csv
+import io
+import json
+from tempfile import SpooledTemporaryFile
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from dates import date_range_query, parse_datetime
+from opd_directory import UNKNOWN_OPD
+
+EXPORT_BATCH_ROWS = 1000
+EXPORT_FIELDS = [
+    "nama_lengkap", "nip", "alamat", "nomor_whatsapp", "opd_id", "opd_nama", "jumlah_pohon", "jenis_pohon",
+    "sumber_bibit", "lokasi_tanam", "titik_lokasi", "lokasi_list.lokasi_tanam", "lokasi_list.titik_lokasi",
+]
+EXPORT_PROJECTION = {"_id": 0, **{field: 1 for field in EXPORT_FIELDS}}
+PARQUET_PROJECTION = {**EXPORT_PROJECTION, "id": 1, "kategori": 1, "status": 1, "created_at": 1}
+PARQUET_TABLES = ("partisipasi", "lokasi")
+PARQUET_SPOOL_BYTES = 8 * 1024 * 1024  # di atas ini file parquet ditulis ke disk
+FILE_CHUNK_BYTES = 64 * 1024
+BASE_HEADERS = ["Nama", "NIP", "Alamat", "No. WhatsApp", "OPD", "Jumlah Pohon", "Jenis Pohon", "Sumber Bibit"]
+
+def export_query(
+    opd_id: Optional[str] = None,
+    kategori: Optional[str] = None,
+    status: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+) -> dict:
+    query = date_range_query("created_at", date_from, date_to)
+    if opd_id:
+        query["opd_id"] = opd_id
+    if kategori:
+        query["kategori"] = kategori
+    if status:
+        query["status"] = status
+    return query
+
+async def max_lokasi(db, query: dict) -> int:
+    """Lokasi column groups needed for these participants (at least one)."""
+    rows = await db.partisipasi.aggregate([
+        {"$match": query},
+        {"$group": {"_id": None, "n": {"$max": {"$size": {"$ifNull": ["$lokasi_list", []]}}}}},
+    ]).to_list(1)
+    return max((rows[0]["n"] if rows else None) or 0, 1)
+
+def export_headers(lokasi_count: int) -> List[str]:
+    headers = list(BASE_HEADERS)
+    for i in range(1, lokasi_count + 1):
+        if lokasi_count == 1:
+            headers.extend(["Lokasi Tanam", "Latitude", "Longitude"])
+        else:
+            headers.extend([f"Lokasi Tanam {i}", f"Latitude {i}", f"Longitude {i}"])
+    return headers
+
+def participant_lokasi(p: dict) -> List[dict]:
+    lokasi_list = p.get("lokasi_list", [])
+    if not lokasi_list and p.get("lokasi_tanam"):
+        # Fallback untuk data lama dengan single lokasi
+        lokasi_list = [{"lokasi_tanam": p.get("lokasi_tanam", ""), "titik_lokasi": p.get("titik_lokasi", "")}]
+    return lokasi_list
+
+def split_titik(titik: Optional[str]) -> Tuple[str, str]:
+    """Split a "lat, lng" titik_lokasi into text parts; empty strings when missing."""
+    if titik and titik != "None" and "," in titik:
+        coords = titik.split(",")
+        return coords[0].strip(), coords[1].strip() if len(coords) > 1 else ""
+    return "", ""
+
+def parse_coordinate(value: str) -> Optional[float]:
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+def row_opd_nama(p: dict, names: Optional[Dict[str, str]]) -> str:
+    opd_nama = p.get("opd_nama")
+    if opd_nama is None:
+        opd_nama = (names or {}).get(p.get("opd_id"), UNKNOWN_OPD)
+    return opd_nama
+
+def export_row(p: dict, lokasi_count: int, names: Optional[Dict[str, str]] = None) -> list:
+    opd_nama = row_opd_nama(p, names)
+    row = [
+        p.get("nama_lengkap", ""),
+        p.get("nip", ""),
+        p.get("alamat", ""),
+        p.get("nomor_whatsapp", ""),
+        opd_nama,
+        p.get("jumlah_pohon", 0),
+        p.get("jenis_pohon", ""),
+        p.get("sumber_bibit", ""),
+    ]
+    lokasi_list = participant_lokasi(p)
+    for i in range(lokasi_count):
+        if i < len(lokasi_list):
+            loc = lokasi_list[i]
+            row.append(loc.get("lokasi_tanam", ""))
+            row.extend(split_titik(loc.get("titik_lokasi", "")))
+        else:
+            row.extend(["", "", ""])
+    return row
+
+async def export_batches(
+    db, query: dict, batch_rows: int = EXPORT_BATCH_ROWS, projection: dict = EXPORT_PROJECTION
+) -> AsyncIterator[List[dict]]:
+    """Participants matching `query`, batch by batch; the cursor is closed however iteration ends."""
+    cursor = db.partisipasi.find(query, projection).batch_size(batch_rows)
+    batch = []
+    try:
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_rows:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        await cursor.close()
+
+async def csv_chunks(db, query: dict, lokasi_count: int, names: Dict[str, str]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(export_headers(lokasi_count))
+    async for batch in export_batches(db, query):
+        writer.writerows(export_row(p, lokasi_count, names) for p in batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")  # file kosong: hanya header
+
+async def ndjson_chunks(db, query: dict, lokasi_count: int, names: Dict[str, str]) -> AsyncIterator[bytes]:
+    headers = export_headers(lokasi_count)
+    async for batch in export_batches(db, query):
+        lines = (json.dumps(dict(zip(headers, export_row(p, lokasi_count, names))), ensure_ascii=False) for p in batch)
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+def parquet_schema(table: str):
+    import pyarrow as pa
+    coordinates = [("latitude", pa.float64()), ("longitude", pa.float64())]
+    if table == "lokasi":
+        return pa.schema([
+            ("partisipasi_id", pa.string()), ("opd_id", pa.string()), ("urutan", pa.int32()),
+            ("lokasi_tanam", pa.string()), *coordinates,
+        ])
+    return pa.schema([
+        ("id", pa.string()), ("nama_lengkap", pa.string()), ("nip", pa.string()), ("alamat", pa.string()),
+        ("nomor_whatsapp", pa.string()), ("opd_id", pa.string()), ("opd_nama", pa.string()),
+        ("kategori", pa.string()), ("status", pa.string()), ("jumlah_pohon", pa.int64()),
+        ("jenis_pohon", pa.string()), ("sumber_bibit", pa.string()), ("jumlah_lokasi", pa.int32()),
+        ("lokasi_tanam", pa.string()), *coordinates, ("created_at", pa.timestamp("ms", tz="UTC")),
+    ])
+
+def partisipasi_record(p: dict, names: Dict[str, str]) -> dict:
+    lokasi_list = participant_lokasi(p)
+    primary = lokasi_list[0] if lokasi_list else {}
+    latitude, longitude = split_titik(primary.get("titik_lokasi", ""))
+    return {
+        "id": p.get("id"),
+        "nama_lengkap": p.get("nama_lengkap"),
+        "nip": p.get("nip"),
+        "alamat": p.get("alamat"),
+        "nomor_whatsapp": p.get("nomor_whatsapp"),
+        "opd_id": p.get("opd_id"),
+        "opd_nama": row_opd_nama(p, names),
+        "kategori": p.get("kategori"),
+        "status": p.get("status"),
+        "jumlah_pohon": int(p.get("jumlah_pohon") or 0),
+        "jenis_pohon": p.get("jenis_pohon"),
+        "sumber_bibit": p.get("sumber_bibit"),
+        "jumlah_lokasi": len(lokasi_list),
+        "lokasi_tanam": primary.get("lokasi_tanam"),
+        "latitude": parse_coordinate(latitude),
+        "longitude": parse_coordinate(longitude),
+        "created_at": parse_datetime(p.get("created_at")),
+    }
+
+def lokasi_records(p: dict) -> List[dict]:
+    records = []
+    for i, loc in enumerate(participant_lokasi(p), start=1):
+        latitude, longitude = split_titik(loc.get("titik_lokasi", ""))
+        records.append({
+            "partisipasi_id": p.get("id"),
+            "opd_id": p.get("opd_id"),
+            "urutan": i,
+            "lokasi_tanam": loc.get("lokasi_tanam"),
+            "latitude": parse_coordinate(latitude),
+            "longitude": parse_coordinate(longitude),
+        })
+    return records
+
+async def parquet_file(db, query: dict, table: str, names: Dict[str, str]) -> SpooledTemporaryFile:
+    """A rewound zstd Parquet file of one export table; the caller closes it."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schema = parquet_schema(table)
+    output = SpooledTemporaryFile(max_size=PARQUET_SPOOL_BYTES)
+    try:
+        writer = pq.ParquetWriter(output, schema, compression="zstd")
+        try:
+            def write_batch(batch: List[dict]):
+                if table == "lokasi":
+                    records = [record for p in batch for record in lokasi_records(p)]
+                else:
+                    records = [partisipasi_record(p, names) for p in batch]
+                if records:
+                    writer.write_batch(pa.RecordBatch.from_pylist(records, schema=schema))
+
+            async for batch in export_batches(db, query, projection=PARQUET_PROJECTION):
+                # Penyusunan record, konversi Arrow & kompresi di threadpool agar event loop tetap melayani
+                await run_in_threadpool(write_batch, batch)
+        finally:
+            await run_in_threadpool(writer.close)
+    except BaseException:
+        output.close()
+        raise
+    output.seek(0)
+    return output
+
+async def file_chunks(file) -> AsyncIterator[bytes]:
+    try:
+        while True:
+            chunk = await run_in_threadpool(file.read, FILE_CHUNK_BYTES)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        file.close()
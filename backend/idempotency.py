@@ -0,0 +1,218 @@
+"""
+Idempotency-Key support for the public write endpoints.
+
+Mobile clients retry POST /api/partisipasi[/batch] and POST
+/api/upload/image on flaky connections; with an `Idempotency-Key` header a
+retry gets the original response back instead of writing a second
+participant.
+
+- the first request with a key claims it (insert into idempotency_keys,
+  unique _id per method + path + key) and runs normally; a 2xx response is
+  stored with a fingerprint of the request body and kept for
+  IDEMPOTENCY_TTL_HOURS (TTL index on expires_at)
+- a replay with the same body returns the stored response with
+  `Idempotent-Replayed: true`; a different body under the same key is 422
+- a duplicate arriving while the original is still running waits up to
+  IDEMPOTENCY_WAIT_SECONDS for its result, then gets 409 + Retry-After
+- errors and 5xx release the claim so the client can retry with the same
+  key; a claim left by a crashed worker is taken over after
+  IDEMPOTENCY_LEASE_SECONDS
+"""
+import asyncio
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from bson import Binary
+from pymongo.errors import DuplicateKeyError
+
+import metrics
+from admission import reject
+from config import IDEMPOTENCY_TTL_HOURS, IDEMPOTENCY_LEASE_SECONDS, IDEMPOTENCY_WAIT_SECONDS
+
+IDEMPOTENT_ROUTES = {
+    ("POST", "/api/partisipasi"),
+    ("POST", "/api/partisipasi/batch"),
+    ("POST", "/api/upload/image"),
+}
+MAX_KEY_LENGTH = 255
+MAX_STORED_BODY = 8 * 1024 * 1024  # respons lebih besar tidak disimpan
+POLL_INTERVAL = 0.1  # detik, saat menunggu permintaan duplikat yang sedang berjalan
+
+IDEMPOTENCY_REQUESTS = metrics.Counter(
+    "idempotency_requests_total", "Requests carrying an Idempotency-Key, by outcome", ("outcome",)
+)
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+def _multipart_boundary(content_type: Optional[str]) -> Optional[bytes]:
+    if not content_type or not content_type.lower().startswith("multipart/"):
+        return None
+    for param in content_type.split(";")[1:]:
+        name, _, value = param.strip().partition("=")
+        if name.lower() == "boundary" and value:
+            return value.strip('"').encode("latin-1")
+    return None
+
+class BodyFingerprint:
+    """
+    SHA-256 of the request body. Multipart boundaries are random per send,
+    so they are left out; the parts themselves (file name, type, bytes) count.
+    """
+
+    def __init__(self, content_type: Optional[str]):
+        self._sha = hashlib.sha256()
+        self._boundary = _multipart_boundary(content_type)
+        self._tail = b""
+
+    def update(self, chunk: bytes):
+        if not self._boundary:
+            self._sha.update(chunk)
+            return
+        data = (self._tail + chunk).replace(self._boundary, b"")
+        keep = len(self._boundary) - 1  # boundary bisa terpotong di antara dua chunk
+        self._sha.update(data[:-keep] if keep else data)
+        self._tail = data[-keep:] if keep else b""
+
+    def hexdigest(self) -> str:
+        self._sha.update(self._tail)
+        self._tail = b""
+        return self._sha.hexdigest()
+
+async def _claim(db, record_id: str) -> bool:
+    now = datetime.now(timezone.utc)
+    try:
+        await db.idempotency_keys.insert_one({
+            "_id": record_id,
+            "state": "processing",
+            "lease_until": now + timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS),
+            "expires_at": now + timedelta(hours=IDEMPOTENCY_TTL_HOURS),
+        })
+        return True
+    except DuplicateKeyError:
+        pass
+    # Klaim milik worker yang mati: ambil alih setelah lease habis
+    taken = await db.idempotency_keys.find_one_and_update(
+        {"_id": record_id, "state": "processing", "lease_until": {"$lt": now}},
+        {"$set": {"lease_until": now + timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS)}},
+    )
+    return taken is not None
+
+async def acquire(db, record_id: str, wait: float = IDEMPOTENCY_WAIT_SECONDS) -> Optional[dict]:
+    """
+    None when this request owns the key and must run; otherwise the stored
+    record (state "done", or still "processing" after `wait` seconds).
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + wait
+    while True:
+        if await _claim(db, record_id):
+            return None
+        record = await db.idempotency_keys.find_one({"_id": record_id})
+        if record is None:
+            continue  # klaim baru saja dilepas karena gagal; coba klaim lagi
+        if record["state"] == "done" or loop.time() >= deadline:
+            return record
+        await asyncio.sleep(POLL_INTERVAL)
+
+async def _read_body(receive, fingerprint: BodyFingerprint):
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            return
+        fingerprint.update(message.get("body", b""))
+        if not message.get("more_body", False):
+            return
+
+async def _replay(record: dict, send):
+    headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in record["headers"]]
+    headers.append((b"idempotent-replayed", b"true"))
+    await send({"type": "http.response.start", "status": record["status"], "headers": headers})
+    await send({"type": "http.response.body", "body": bytes(record["body"])})
+
+class IdempotencyMiddleware:
+    """Pure ASGI middleware; requests without an Idempotency-Key pass straight through."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or (scope["method"], scope["path"]) not in IDEMPOTENT_ROUTES:
+            await self.app(scope, receive, send)
+            return
+        key = _header(scope, b"idempotency-key")
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        key = key.strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await reject(send, 400, f"Idempotency-Key harus 1-{MAX_KEY_LENGTH} karakter")
+            return
+
+        db = scope["app"].state.db
+        record_id = f"{scope['method']} {scope['path']} {key}"
+        fingerprint = BodyFingerprint(_header(scope, b"content-type"))
+        record = await acquire(db, record_id, wait=IDEMPOTENCY_WAIT_SECONDS)
+        if record is not None:
+            if record["state"] != "done":
+                IDEMPOTENCY_REQUESTS.inc(outcome="in_flight")
+                await reject(send, 409, "Permintaan dengan Idempotency-Key ini masih diproses", retry_after=1)
+                return
+            await _read_body(receive, fingerprint)
+            if fingerprint.hexdigest() != record["fingerprint"]:
+                IDEMPOTENCY_REQUESTS.inc(outcome="mismatch")
+                await reject(send, 422, "Idempotency-Key sudah dipakai untuk data yang berbeda")
+                return
+            IDEMPOTENCY_REQUESTS.inc(outcome="replayed")
+            await _replay(record, send)
+            return
+
+        status = 500
+        headers = []
+        chunks = []
+        size = 0
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request":
+                fingerprint.update(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message):
+            nonlocal status, headers, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = [(name.decode("latin-1"), value.decode("latin-1")) for name, value in message["headers"]]
+            elif message["type"] == "http.response.body":
+                body = message.get("body", b"")
+                size += len(body)
+                if size <= MAX_STORED_BODY:
+                    chunks.append(body)
+            await send(message)
+
+        stored = False
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+            if 200 <= status < 300 and size <= MAX_STORED_BODY:
+                now = datetime.now(timezone.utc)
+                await db.idempotency_keys.update_one({"_id": record_id}, {
+                    "$set": {
+                        "state": "done",
+                        "status": status,
+                        "headers": headers,
+                        "body": Binary(b"".join(chunks)),
+                        "fingerprint": fingerprint.hexdigest(),
+                        "expires_at": now + timedelta(hours=IDEMPOTENCY_TTL_HOURS),
+                    },
+                    "$unset": {"lease_until": ""},
+                })
+                stored = True
+                IDEMPOTENCY_REQUESTS.inc(outcome="stored")
+        finally:
+            if not stored:
+                # Gagal atau tidak disimpan: klien boleh mengulang dengan key yang sama
+                await db.idempotency_keys.delete_one({"_id": record_id, "state": "processing"})
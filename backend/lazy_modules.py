@@ -0,0 +1,38 @@
+"""
+Lazy loading of the heavy reporting libraries.
+"""
+import asyncio
+import importlib
+import logging
+import sys
+import time
+
+from config import HEAVY_MODULES_WARMUP_DELAY
+
+logger = logging.getLogger(__name__)
+
+# Library laporan (openpyxl, reportlab, pandas, pyarrow) tidak di-import saat boot:
+# worker yang tidak pernah export/import tidak membayar biaya import & memorinya.
+HEAVY_MODULES = {
+    "excel": ["openpyxl"],
+    "pdf": ["reportlab.lib.colors", "reportlab.lib.pagesizes", "reportlab.lib.styles", "reportlab.platypus"],
+    "pandas": ["pandas"],
+    "parquet": ["pyarrow", "pyarrow.parquet"],
+}
+
+async def load_heavy(group: str):
+    """Import a heavy library group in a worker thread so the event loop keeps serving."""
+    for name in HEAVY_MODULES[group]:
+        if name not in sys.modules:
+            await asyncio.to_thread(importlib.import_module, name)
+
+async def warm_heavy_modules():
+    """Opsional (HEAVY_MODULES_WARMUP=1): muat library laporan di background setelah startup."""
+    await asyncio.sleep(HEAVY_MODULES_WARMUP_DELAY)
+    for group in HEAVY_MODULES:
+        try:
+            started = time.perf_counter()
+            await load_heavy(group)
+            logger.info(f"Library {group} dimuat dalam {time.perf_counter() - started:.2f}s")
+        except Exception as e:
+            logger.warning(f"Gagal memuat library {group}: {e}")
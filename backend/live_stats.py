@@ -0,0 +1,228 @@
+"""
+Live dashboard counters over Server-Sent Events (/api/stats/stream).
+
+One StatsBroadcaster per process fans participation changes out to every
+connected screen. A client first receives a `snapshot` event with the
+current totals, then compact `delta` events:
+
+    event: delta
+    id: 42
+    data: {"seq":42,"reason":"created","pohon":10,"partisipan":1,"opd":{"<opd_id>":[10,1]}}
+
+Deltas come from the write handlers of this process. When the change feed
+runs on a change stream it becomes the only source instead, so writes from
+other workers and from outside the API are counted too, exactly once.
+Events that carry no usable delta (no pre-image on MongoDB < 6, polls,
+invalidate) end in a resync; those are coalesced, so an edit storm sends one
+snapshot per CHANGE_FEED_RESYNC_DELAY instead of one per write.
+
+Each subscriber has a bounded queue. A client that cannot keep up does not
+slow the others down: its backlog is dropped and it gets a fresh snapshot
+instead. Idle streams receive a comment heartbeat so proxies keep them open.
+"""
+import asyncio
+import json
+import time
+from typing import Dict, List, Optional
+
+from fastapi import Request
+
+import metrics
+from config import SSE_HEARTBEAT_SECONDS, SSE_QUEUE_SIZE, LIVE_STATS_SNAPSHOT_TTL, CHANGE_FEED_RESYNC_DELAY
+
+SSE_CLIENTS = metrics.Gauge("sse_clients", "Connected /api/stats/stream clients")
+SSE_EVENTS = metrics.Counter("sse_events_total", "Events published to live stats subscribers", ("event",))
+SSE_RESYNCS = metrics.Counter("sse_resyncs_total", "Slow subscribers whose backlog was replaced by a snapshot")
+
+RESYNC = object()  # antrian subscriber penuh: kirim snapshot, bukan delta yang tertinggal
+CLOSED = object()  # broadcaster ditutup saat shutdown
+
+class StatsDelta:
+    """Accumulates tree/participant changes per OPD for one publish."""
+
+    def __init__(self):
+        self.opd: Dict[str, List[int]] = {}
+
+    def add(self, opd_id: Optional[str], pohon: int = 0, partisipan: int = 0):
+        entry = self.opd.setdefault(opd_id or "", [0, 0])
+        entry[0] += pohon or 0
+        entry[1] += partisipan
+
+    def __bool__(self) -> bool:
+        return any(p or n for p, n in self.opd.values())
+
+    def payload(self) -> dict:
+        opd = {k: v for k, v in self.opd.items() if v[0] or v[1]}
+        return {
+            "pohon": sum(v[0] for v in opd.values()),
+            "partisipan": sum(v[1] for v in opd.values()),
+            "opd": opd,
+        }
+
+class Subscription:
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def offer(self, item) -> bool:
+        """Queue an event without waiting; on overflow replace the backlog with RESYNC."""
+        try:
+            self.queue.put_nowait(item)
+            return True
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+            return False
+
+class StatsBroadcaster:
+
+    def __init__(self, queue_size: int = SSE_QUEUE_SIZE, heartbeat: float = SSE_HEARTBEAT_SECONDS,
+                 snapshot_ttl: float = LIVE_STATS_SNAPSHOT_TTL, resync_delay: float = CHANGE_FEED_RESYNC_DELAY):
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self.snapshot_ttl = snapshot_ttl
+        self.resync_delay = resync_delay
+        self._resync_handle: Optional[asyncio.TimerHandle] = None
+        self.seq = 0
+        self.follow_change_stream = False
+        self._listeners: list = []
+        self._subscribers: set = set()
+        self._totals: Optional[dict] = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self) -> Subscription:
+        subscription = Subscription(self.queue_size)
+        self._subscribers.add(subscription)
+        SSE_CLIENTS.set(len(self._subscribers))
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self._subscribers.discard(subscription)
+        SSE_CLIENTS.set(len(self._subscribers))
+
+    async def snapshot(self, db) -> dict:
+        """Current totals; recounted from the database when older than snapshot_ttl."""
+        async with self._lock:
+            if self._totals is None or time.monotonic() - self._loaded_at > self.snapshot_ttl:
+                rows = await db.partisipasi.aggregate([
+                    {"$group": {"_id": None, "pohon": {"$sum": "$jumlah_pohon"}, "partisipan": {"$sum": 1}}}
+                ]).to_list(1)
+                row = rows[0] if rows else {}
+                self._totals = {"total_pohon": row.get("pohon", 0), "total_partisipan": row.get("partisipan", 0)}
+                self._loaded_at = time.monotonic()
+            return {"seq": self.seq, **self._totals}
+
+    def publish(self, delta: StatsDelta, reason: str = "update"):
+        """Publish a change made by a request handler (call from the event loop)."""
+        if not self.follow_change_stream:
+            self._broadcast(delta, reason)
+
+    def add_listener(self, callback):
+        """callback(delta_or_None) after every broadcast delta (None for a resync)."""
+        self._listeners.append(callback)
+
+    def use_change_stream(self, enabled: bool):
+        self.follow_change_stream = enabled
+
+    def apply_change(self, change: dict):
+        """Change feed callback for the partisipasi collection."""
+        op = change.get("operationType")
+        if op == "update":
+            description = change.get("updateDescription", {})
+            touched = set(description.get("updatedFields", {})) | set(description.get("removedFields", []))
+            if not touched & {"jumlah_pohon", "opd_id"}:
+                return
+        delta = StatsDelta()
+        if op in ("update", "replace", "delete"):
+            before = change.get("fullDocumentBeforeChange")
+            if before is None:
+                self.request_resync()
+                return
+            delta.add(before.get("opd_id"), -(before.get("jumlah_pohon") or 0), -1)
+        if op in ("insert", "update", "replace"):
+            after = change.get("fullDocument")
+            if after is None:
+                self.request_resync()
+                return
+            delta.add(after.get("opd_id"), after.get("jumlah_pohon") or 0, 1)
+        if op not in ("insert", "update", "replace", "delete"):
+            self.request_resync()  # poll, invalidate, drop, rename, ...
+            return
+        self._broadcast(delta, "change")
+
+    def request_resync(self):
+        """Resync once resync_delay has passed; requests in the meantime share it."""
+        if self._resync_handle is None:
+            self._resync_handle = asyncio.get_running_loop().call_later(self.resync_delay, self.resync)
+
+    def resync(self):
+        """Forget the cached totals and send every subscriber a fresh snapshot."""
+        if self._resync_handle is not None:
+            self._resync_handle.cancel()
+            self._resync_handle = None
+        self._totals = None
+        for callback in self._listeners:
+            callback(None)
+        SSE_EVENTS.inc(event="resync")
+        for subscription in list(self._subscribers):
+            subscription.offer(RESYNC)
+
+    def _broadcast(self, delta: StatsDelta, reason: str):
+        if not delta:
+            return
+        payload = delta.payload()
+        self.seq += 1
+        if self._totals is not None:
+            self._totals["total_pohon"] += payload["pohon"]
+            self._totals["total_partisipan"] += payload["partisipan"]
+        event = {"seq": self.seq, "reason": reason, **payload}
+        for callback in self._listeners:
+            callback(delta)
+        SSE_EVENTS.inc(event="delta")
+        for subscription in list(self._subscribers):
+            if not subscription.offer(event):
+                SSE_RESYNCS.inc()
+
+    def close(self):
+        """Ends every open stream (app shutdown)."""
+        if self._resync_handle is not None:
+            self._resync_handle.cancel()
+            self._resync_handle = None
+        for subscription in list(self._subscribers):
+            while not subscription.queue.empty():
+                subscription.queue.get_nowait()
+            subscription.queue.put_nowait(CLOSED)
+
+    async def stream(self, request: Request, db):
+        """Async generator of SSE frames for one client."""
+        subscription = self.subscribe()
+        try:
+            yield f"retry: 5000\n{format_event('snapshot', await self.snapshot(db))}"
+            while True:
+                try:
+                    item = await asyncio.wait_for(subscription.queue.get(), timeout=self.heartbeat)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": ping\n\n"
+                    continue
+                if item is CLOSED:
+                    break
+                if item is RESYNC:
+                    yield format_event("snapshot", await self.snapshot(db))
+                else:
+                    yield format_event("delta", item)
+        finally:
+            self.unsubscribe(subscription)
+
+def format_event(event: str, data: dict) -> str:
+    return f"event: {event}\nid: {data['seq']}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+def get_stats_broadcaster(request: Request) -> StatsBroadcaster:
+    return request.app.state.stats_broadcaster
@@ -0,0 +1,157 @@
+"""
+Opt-in detector for synchronous work that blocks the asyncio event loop.
+
+A heartbeat task on the loop touches a timestamp every `interval`; a watchdog
+thread notices when the heartbeat goes stale for longer than `threshold`,
+grabs the loop thread's stack while it is still blocked and attributes the
+stall to the request whose task was running. When the loop recovers the
+stall is logged with its duration, route and stack, and counted in
+event_loop_stalls_total on /api/metrics.
+
+Enable with LOOP_BLOCK_DETECTOR=1 (threshold: LOOP_BLOCK_THRESHOLD_MS, default 100).
+Tests can start a detector directly and assert on `detector.stalls`.
+"""
+import asyncio
+import collections
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Dict, Optional
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+LOOP_STALLS = metrics.Counter(
+    "event_loop_stalls_total", "Event loop stalls longer than the detector threshold, by endpoint",
+    ("endpoint",)
+)
+LOOP_STALL_SECONDS = metrics.Histogram(
+    "event_loop_stall_seconds", "Duration of detected event loop stalls",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+
+class BlockingDetector:
+
+    def __init__(self, threshold: float = 0.1, interval: Optional[float] = None, max_reports: int = 100):
+        self.threshold = threshold
+        self.interval = interval or max(threshold / 4, 0.005)
+        self.stalls = collections.deque(maxlen=max_reports)
+        self._heartbeat = time.monotonic()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._beat_task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._requests: Dict[asyncio.Task, dict] = {}
+
+    # ---- request tracking (called from BlockingDetectorMiddleware) ----
+
+    def track(self, scope: dict):
+        task = asyncio.current_task()
+        if task is not None:
+            self._requests[task] = scope
+
+    def untrack(self):
+        task = asyncio.current_task()
+        if task is not None:
+            self._requests.pop(task, None)
+
+    # ---- lifecycle ----
+
+    async def _beat(self):
+        while True:
+            self._heartbeat = time.monotonic()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start on the running loop (call from the app lifespan)."""
+        if self._thread is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._beat_task = asyncio.create_task(self._beat())
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="loop-block-detector", daemon=True)
+        self._thread.start()
+        logger.info(f"Event loop blocking detector aktif (threshold {self.threshold * 1000:.0f} ms)")
+
+    async def stop(self):
+        self._stop.set()
+        if self._beat_task is not None:
+            self._beat_task.cancel()
+            try:
+                await self._beat_task
+            except asyncio.CancelledError:
+                pass
+            self._beat_task = None
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    # ---- watchdog thread ----
+
+    def _watch(self):
+        stall = None
+        while not self._stop.wait(self.interval):
+            last_beat = self._heartbeat
+            overdue = time.monotonic() - last_beat - self.interval
+            if stall is None and overdue > self.threshold:
+                stall = self._capture(last_beat)
+            elif stall is not None and last_beat > stall["last_beat"]:
+                self._finish(stall, last_beat)
+                stall = None
+
+    def _capture(self, last_beat: float) -> dict:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+        scope = None
+        try:
+            task = asyncio.current_task(self._loop)
+            scope = self._requests.get(task) if task is not None else None
+        except RuntimeError:
+            pass
+        endpoint = scope.get("endpoint") if scope else None
+        return {
+            "last_beat": last_beat,
+            "endpoint": getattr(endpoint, "__name__", None) or ("unmatched" if scope else "background"),
+            "route": f"{scope.get('method', '')} {scope.get('path', '')}" if scope else None,
+            "stack": stack,
+        }
+
+    def _finish(self, stall: dict, resumed_beat: float):
+        duration = max(resumed_beat - stall["last_beat"] - self.interval, 0.0)
+        report = {
+            "endpoint": stall["endpoint"],
+            "route": stall["route"],
+            "duration": duration,
+            "stack": stall["stack"],
+        }
+        self.stalls.append(report)
+        LOOP_STALLS.inc(endpoint=report["endpoint"])
+        LOOP_STALL_SECONDS.observe(duration)
+        logger.warning(
+            f"Event loop terblokir {duration * 1000:.0f} ms di {report['route'] or report['endpoint']}\n{report['stack']}"
+        )
+
+
+class BlockingDetectorMiddleware:
+    """Records which request task is running so stalls can be attributed to a route."""
+
+    def __init__(self, app, detector: BlockingDetector):
+        self.app = app
+        self.detector = detector
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        self.detector.track(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.detector.untrack()
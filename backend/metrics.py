@@ -0,0 +1,432 @@
+"""
+Request and database instrumentation for the Agro Mopomulo API.
+
+- MetricsMiddleware: per-route latency, status counts, payload sizes and
+  per-request database round trips / time (ASGI middleware, streaming safe)
+- DBCommandListener: pymongo command monitoring, attributed to the current
+  request through a context variable (Motor copies the context into its
+  executor threads)
+- DBPoolListener: connection pool checkout wait, failures and pool size
+- LoopLagMonitor: measures how late the event loop wakes up a sleeping task
+- render(): everything in Prometheus text exposition format for /api/metrics
+
+Metrics are kept per process; with several uvicorn workers each worker
+exposes its own series and Prometheus aggregates them.
+"""
+import asyncio
+import contextvars
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100, 500, 1000)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+# ============== METRIC TYPES ==============
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{k}="{_escape(v)}"' for k, v in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()  # pymongo listeners run on Motor's executor threads
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def collect(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.collect())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        # key -> [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels) -> int:
+        series = self._values.get(self._key(labels))
+        return series[-1] if series else 0
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = []
+        for key, series in items:
+            for i, bound in enumerate(self.buckets):
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {series[i]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(series[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+REGISTRY: List[_Metric] = []
+
+
+def render() -> str:
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+# ============== METRICS ==============
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route, method and status code",
+    ("method", "route", "status")
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route",
+    ("method", "route")
+)
+HTTP_REQUEST_SIZE = Histogram(
+    "http_request_size_bytes", "Declared request body size by route",
+    ("method", "route"), buckets=SIZE_BUCKETS
+)
+HTTP_RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "Response body bytes sent by route",
+    ("method", "route"), buckets=SIZE_BUCKETS
+)
+HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served")
+REQUEST_DB_ROUND_TRIPS = Histogram(
+    "http_request_db_round_trips", "MongoDB commands issued per HTTP request",
+    ("method", "route"), buckets=COUNT_BUCKETS
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time spent in MongoDB per HTTP request",
+    ("method", "route")
+)
+DB_COMMANDS = Counter(
+    "mongodb_commands_total", "MongoDB commands by command name and outcome",
+    ("command", "outcome")
+)
+DB_COMMAND_SECONDS = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency by command name",
+    ("command",)
+)
+DB_POOL_WAIT = Histogram(
+    "mongodb_pool_wait_seconds", "Time spent waiting to check a connection out of the pool",
+    buckets=POOL_WAIT_BUCKETS
+)
+DB_POOL_CHECKOUT_FAILURES = Counter(
+    "mongodb_pool_checkout_failures_total", "Failed pool checkouts by reason (timeout, connectionError, poolClosed)",
+    ("reason",)
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "mongodb_pool_connections", "Open pooled connections by server", ("address",)
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "mongodb_pool_checked_out_connections", "Pooled connections currently in use by server", ("address",)
+)
+LOOP_LAG = Gauge("event_loop_lag_seconds", "Most recent event loop scheduling lag")
+LOOP_LAG_HISTOGRAM = Histogram(
+    "event_loop_lag_distribution_seconds", "Event loop scheduling lag samples", buckets=LAG_BUCKETS
+)
+
+
+# ============== PER-REQUEST DB ACCOUNTING ==============
+
+class RequestDBStats:
+    __slots__ = ("round_trips", "db_seconds", "pool_wait_seconds")
+
+    def __init__(self):
+        self.round_trips = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+
+
+request_db_stats: contextvars.ContextVar[Optional[RequestDBStats]] = contextvars.ContextVar(
+    "request_db_stats", default=None
+)
+
+
+class DBCommandListener(monitoring.CommandListener):
+    """pymongo command listener feeding the global and per-request DB metrics."""
+
+    def started(self, event):
+        pass
+
+    def _record(self, event, outcome: str):
+        seconds = event.duration_micros / 1_000_000
+        DB_COMMANDS.inc(command=event.command_name, outcome=outcome)
+        DB_COMMAND_SECONDS.observe(seconds, command=event.command_name)
+        stats = request_db_stats.get()
+        if stats is not None:
+            stats.round_trips += 1
+            stats.db_seconds += seconds
+
+    def succeeded(self, event):
+        self._record(event, "success")
+
+    def failed(self, event):
+        self._record(event, "failure")
+
+
+def _address(event) -> str:
+    host, port = event.address
+    return f"{host}:{port}"
+
+
+class DBPoolListener(monitoring.ConnectionPoolListener):
+    """
+    pymongo pool listener. A checkout publishes "started" and then "checked out"
+    (or "failed") on the same thread, so the wait is timed with a thread-local.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def _waited(self) -> float:
+        started = getattr(self._local, "started", None)
+        self._local.started = None
+        return time.perf_counter() - started if started is not None else 0.0
+
+    def connection_checked_out(self, event):
+        waited = self._waited()
+        DB_POOL_WAIT.observe(waited)
+        DB_POOL_CHECKED_OUT.inc(address=_address(event))
+        stats = request_db_stats.get()
+        if stats is not None:
+            stats.pool_wait_seconds += waited
+
+    def connection_check_out_failed(self, event):
+        DB_POOL_WAIT.observe(self._waited())
+        DB_POOL_CHECKOUT_FAILURES.inc(reason=event.reason)
+
+    def connection_checked_in(self, event):
+        DB_POOL_CHECKED_OUT.dec(address=_address(event))
+
+    def connection_created(self, event):
+        DB_POOL_CONNECTIONS.inc(address=_address(event))
+
+    def connection_closed(self, event):
+        DB_POOL_CONNECTIONS.dec(address=_address(event))
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+
+# ============== MIDDLEWARE ==============
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (a BaseHTTPMiddleware would buffer streaming exports).
+    Routes are labelled with their path template, e.g. /api/opd/{opd_id}.
+    Adds X-DB-Round-Trips and Server-Timing (db, pool wait, app) headers to every response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._route_templates: Dict[object, str] = {}
+
+    def _route_label(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        label = self._route_templates.get(endpoint)
+        if label is None:
+            app = scope.get("app")
+            for route in getattr(app, "routes", []):
+                if getattr(route, "endpoint", None) is endpoint:
+                    label = route.path
+                    break
+            else:
+                label = getattr(endpoint, "__name__", "unknown")
+            self._route_templates[endpoint] = label
+        return label
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestDBStats()
+        token = request_db_stats.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+        response_bytes = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, response_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-round-trips", str(stats.round_trips).encode()))
+                headers.append((
+                    b"server-timing",
+                    f"db;dur={stats.db_seconds * 1000:.1f}, pool;dur={stats.pool_wait_seconds * 1000:.1f}, "
+                    f"app;dur={elapsed_ms:.1f}".encode()
+                ))
+                message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            request_db_stats.reset(token)
+            elapsed = time.perf_counter() - start
+            method = scope.get("method", "")
+            route = self._route_label(scope)
+            HTTP_REQUESTS.inc(method=method, route=route, status=str(status_code))
+            HTTP_LATENCY.observe(elapsed, method=method, route=route)
+            HTTP_RESPONSE_SIZE.observe(response_bytes, method=method, route=route)
+            REQUEST_DB_ROUND_TRIPS.observe(stats.round_trips, method=method, route=route)
+            REQUEST_DB_SECONDS.observe(stats.db_seconds, method=method, route=route)
+            for name, value in scope.get("headers", []):
+                if name == b"content-length":
+                    try:
+                        HTTP_REQUEST_SIZE.observe(int(value), method=method, route=route)
+                    except ValueError:
+                        pass
+                    break
+
+
+# ============== EVENT LOOP LAG ==============
+
+class LoopLagMonitor:
+    """Sleeps for `interval` and records how much later than requested it woke up."""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            LOOP_LAG.set(lag)
+            LOOP_LAG_HISTOGRAM.observe(lag)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
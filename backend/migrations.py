@@ -0,0 +1,76 @@
+"""
+One-off startup migrations (indexes and data backfills).
+
+They used to run in every worker's lifespan, so each deploy or restart did
+N full collection scans before serving. Now the applied migration names are
+recorded in `migrations` ({_id: "migrations", applied: [...]}): a worker
+whose migrations are all applied only reads that document. Pending ones run
+in a single worker holding a lease; the others start serving without
+waiting. A failed migration is logged and retried at the next start.
+
+Adding or changing an index means adding a new name (e.g. "indexes-2") so
+ensure_indexes runs again. The backfills stay available by hand
+(`python dates.py`, `python progress.py`, ...).
+"""
+import logging
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Awaitable, Callable, List, Tuple
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from agenda_schedule import backfill_agenda_dates
+from database import ensure_indexes
+from dates import backfill_dates
+from opd_directory import backfill_participant_opd
+from progress import backfill_opd_counters
+
+logger = logging.getLogger(__name__)
+
+STATE_ID = "migrations"
+LEASE = timedelta(minutes=30)
+
+# (nama, fungsi, pesan bila gagal), dijalankan berurutan
+MIGRATIONS: List[Tuple[str, Callable[..., Awaitable], str]] = [
+    ("indexes-1", ensure_indexes, "Gagal membuat index"),
+    ("dates-bson", backfill_dates, "Gagal mengonversi created_at ke tanggal BSON"),
+    ("agenda-tanggal-date", backfill_agenda_dates, "Gagal mengisi tanggal_date agenda"),
+    ("opd-counters", backfill_opd_counters, "Gagal mengisi counter pohon OPD"),
+    ("partisipasi-opd-fields", backfill_participant_opd, "Gagal menyalin nama/kategori OPD ke partisipasi"),
+]
+
+async def run_migrations(db, migrations=MIGRATIONS, clock=lambda: datetime.now(timezone.utc)) -> List[str]:
+    """Apply pending migrations if this worker wins the lease; returns the names applied now."""
+    names = [name for name, _, _ in migrations]
+    state = await db.migrations.find_one({"_id": STATE_ID}, {"applied": 1})
+    if state and set(names) <= set(state.get("applied", [])):
+        return []
+
+    owner = uuid.uuid4().hex
+    now = clock()
+    try:
+        state = await db.migrations.find_one_and_update(
+            {"_id": STATE_ID, "$or": [{"lease_until": {"$lt": now}}, {"lease_until": None}]},
+            {"$set": {"lease_until": now + LEASE, "owner": owner}},
+            upsert=True, return_document=ReturnDocument.AFTER
+        )
+    except DuplicateKeyError:
+        return []  # worker lain sedang menjalankan migrasi
+
+    applied_now = []
+    try:
+        done = set(state.get("applied", []))
+        for name, migrate, error in migrations:
+            if name in done:
+                continue
+            try:
+                await migrate(db)
+            except Exception as e:
+                logger.warning(f"{error}: {e}")
+                continue
+            await db.migrations.update_one({"_id": STATE_ID}, {"$addToSet": {"applied": name}})
+            applied_now.append(name)
+    finally:
+        await db.migrations.update_one({"_id": STATE_ID, "owner": owner}, {"$set": {"lease_until": None}})
+    return applied_now
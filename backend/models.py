@@ -0,0 +1,300 @@
+"""
+Pydantic request/response models.
+"""
+from typing import Annotated, List, Optional
+
+from pydantic import BaseModel, BeforeValidator, EmailStr, Field, validator
+
+from config import PARTISIPASI_BATCH_MAX
+from dates import iso_datetime
+
+# Tanggal disimpan sebagai BSON date, dikirim ke klien tetap sebagai string ISO
+IsoDateTime = Annotated[str, BeforeValidator(iso_datetime)]
+
+class UserCreate(BaseModel):
+    email: EmailStr
+    password: str
+    nama: str
+
+class UserLogin(BaseModel):
+    email: EmailStr
+    password: str
+
+class UserResponse(BaseModel):
+    id: str
+    email: str
+    nama: str
+    role: str
+
+class OPDCreate(BaseModel):
+    nama: str
+    kode: Optional[str] = None
+    alamat: Optional[str] = None
+    jumlah_personil: Optional[int] = 0
+    kategori: Optional[str] = "OPD"  # OPD, DESA, PUBLIK
+
+class OPDUpdate(BaseModel):
+    nama: Optional[str] = None
+    kode: Optional[str] = None
+    alamat: Optional[str] = None
+    jumlah_personil: Optional[int] = None
+    kategori: Optional[str] = None
+
+class OPDResponse(BaseModel):
+    id: str
+    nama: str
+    kode: Optional[str] = None
+    alamat: Optional[str] = None
+    jumlah_personil: Optional[int] = 0
+    kategori: Optional[str] = "OPD"
+    pohon_tertanam: Optional[int] = 0
+    created_at: IsoDateTime
+
+# Model untuk lokasi tanam (per titik)
+class LokasiTanam(BaseModel):
+    lokasi_tanam: str
+    titik_lokasi: Optional[str] = None
+    bukti_url: Optional[str] = None
+
+class PartisipasiCreate(BaseModel):
+    email: Optional[str] = None
+    nama_lengkap: str
+    nip: Optional[str] = None
+    opd_id: str
+    alamat: Optional[str] = None
+    nomor_whatsapp: Optional[str] = None
+    jumlah_pohon: int
+    jenis_pohon: str
+    sumber_bibit: str
+    # Support both single lokasi (backward compatible) and array of lokasi
+    lokasi_tanam: Optional[str] = None
+    titik_lokasi: Optional[str] = None
+    bukti_url: Optional[str] = None
+    # Array of multiple locations
+    lokasi_list: Optional[List[LokasiTanam]] = None
+    
+    @validator('email', pre=True)
+    def validate_email(cls, v):
+        if v is None or v == '':
+            return None
+        # Basic email validation
+        import re
+        if v and not re.match(r'^[\w\.-]+@[\w\.-]+\.\w+$', v):
+            raise ValueError('Format email tidak valid')
+        return v
+
+class PartisipasiUpdate(BaseModel):
+    email: Optional[str] = None
+    nama_lengkap: Optional[str] = None
+    nip: Optional[str] = None
+    opd_id: Optional[str] = None
+    alamat: Optional[str] = None
+    nomor_whatsapp: Optional[str] = None
+    jumlah_pohon: Optional[int] = None
+    jenis_pohon: Optional[str] = None
+    sumber_bibit: Optional[str] = None
+    lokasi_tanam: Optional[str] = None
+    titik_lokasi: Optional[str] = None
+    bukti_url: Optional[str] = None
+    status: Optional[str] = None
+    # Array of multiple locations
+    lokasi_list: Optional[List[LokasiTanam]] = None
+
+class PartisipasiResponse(BaseModel):
+    id: str
+    email: Optional[str] = None
+    nama_lengkap: str
+    nip: Optional[str] = None
+    opd_id: str
+    opd_nama: Optional[str] = None
+    kategori: Optional[str] = None  # kategori OPD, disalin saat partisipasi disimpan
+    alamat: Optional[str] = None
+    nomor_whatsapp: Optional[str] = None
+    jumlah_pohon: int
+    jenis_pohon: str
+    sumber_bibit: Optional[str] = None
+    # Single lokasi (for backward compatibility)
+    lokasi_tanam: Optional[str] = None
+    titik_lokasi: Optional[str] = None
+    bukti_url: Optional[str] = None
+    # Array of multiple locations
+    lokasi_list: Optional[List[dict]] = None
+    status: Optional[str] = None
+    created_at: IsoDateTime
+
+class PartisipasiBatchCreate(BaseModel):
+    # Item divalidasi satu per satu di handler agar satu data salah tidak menggagalkan seluruh batch
+    items: List[dict] = Field(..., max_length=PARTISIPASI_BATCH_MAX)
+
+class PartisipasiBatchResult(BaseModel):
+    index: int
+    id: Optional[str] = None  # terisi jika data tersimpan
+    error: Optional[str] = None
+
+class PartisipasiBatchResponse(BaseModel):
+    created: int
+    results: List[PartisipasiBatchResult]
+
+class SettingsUpdate(BaseModel):
+    logo_url: Optional[str] = None
+    hero_title: Optional[str] = None
+    hero_subtitle: Optional[str] = None
+    hero_image_url: Optional[str] = None
+    tentang_title: Optional[str] = None
+    tentang_content: Optional[str] = None
+    tentang_visi: Optional[str] = None
+    tentang_misi: Optional[str] = None
+    berita_popup_interval: Optional[int] = None  # dalam detik
+    pohon_per_orang: Optional[int] = Field(None, ge=1)  # target pohon per personil
+
+class SettingsResponse(BaseModel):
+    id: str
+    logo_url: Optional[str] = None
+    hero_title: str
+    hero_subtitle: str
+    hero_image_url: Optional[str] = None
+    tentang_title: Optional[str] = None
+    tentang_content: Optional[str] = None
+    tentang_visi: Optional[str] = None
+    tentang_misi: Optional[str] = None
+    berita_popup_interval: Optional[int] = 5  # default 5 detik
+    pohon_per_orang: Optional[int] = 10
+
+class GalleryCreate(BaseModel):
+    title: str
+    image_url: str
+    description: Optional[str] = None
+
+class GalleryResponse(BaseModel):
+    id: str
+    title: str
+    image_url: str
+    description: Optional[str] = None
+    created_at: IsoDateTime
+
+class EdukasiCreate(BaseModel):
+    judul: str
+    konten: str
+    gambar_url: Optional[str] = None
+
+class EdukasiUpdate(BaseModel):
+    judul: Optional[str] = None
+    konten: Optional[str] = None
+    gambar_url: Optional[str] = None
+
+class EdukasiResponse(BaseModel):
+    id: str
+    judul: str
+    konten: str
+    gambar_url: Optional[str] = None
+    created_at: IsoDateTime
+
+# ============== AGENDA MODELS ==============
+
+class AgendaCreate(BaseModel):
+    nama_kegiatan: str
+    hari: str
+    tanggal: str
+    lokasi_kecamatan: str
+    lokasi_desa: str
+    deskripsi: Optional[str] = None
+
+class AgendaUpdate(BaseModel):
+    nama_kegiatan: Optional[str] = None
+    hari: Optional[str] = None
+    tanggal: Optional[str] = None
+    lokasi_kecamatan: Optional[str] = None
+    lokasi_desa: Optional[str] = None
+    deskripsi: Optional[str] = None
+    status: Optional[str] = None
+
+class AgendaResponse(BaseModel):
+    id: str
+    nama_kegiatan: str
+    hari: str
+    tanggal: str
+    lokasi_kecamatan: str
+    lokasi_desa: str
+    deskripsi: Optional[str] = None
+    status: str
+    created_at: IsoDateTime
+
+# ============== BERITA MODELS ==============
+
+class BeritaCreate(BaseModel):
+    judul: str
+    deskripsi_singkat: str
+    link_berita: str  # URL ke halaman berita eksternal
+    isi_berita: Optional[str] = None  # Deprecated, untuk backward compatibility
+    gambar_url: Optional[str] = None
+    gambar_type: Optional[str] = "link"  # "link" atau "file"
+
+class BeritaUpdate(BaseModel):
+    judul: Optional[str] = None
+    deskripsi_singkat: Optional[str] = None
+    link_berita: Optional[str] = None
+    isi_berita: Optional[str] = None
+    gambar_url: Optional[str] = None
+    gambar_type: Optional[str] = None
+    is_active: Optional[bool] = None
+
+class BeritaResponse(BaseModel):
+    id: str
+    judul: str
+    deskripsi_singkat: str
+    link_berita: Optional[str] = None
+    isi_berita: Optional[str] = None  # Untuk backward compatibility
+    gambar_url: Optional[str] = None
+    gambar_type: str
+    is_active: bool
+    created_at: IsoDateTime
+
+# ============== KONTAK WHATSAPP MODELS ==============
+
+class KontakWhatsAppCreate(BaseModel):
+    nomor_whatsapp: str
+    pesan_default: Optional[str] = None
+    
+    @validator('nomor_whatsapp')
+    def normalize_phone(cls, v):
+        if not v:
+            raise ValueError('Nomor WhatsApp wajib diisi')
+        # Hapus karakter non-digit kecuali +
+        cleaned = ''.join(c for c in v if c.isdigit() or c == '+')
+        # Hapus + di awal
+        cleaned = cleaned.lstrip('+')
+        # Konversi format 08 ke 628
+        if cleaned.startswith('08'):
+            cleaned = '62' + cleaned[1:]
+        # Pastikan dimulai dengan 62
+        elif not cleaned.startswith('62'):
+            cleaned = '62' + cleaned
+        # Validasi panjang (minimal 10 digit setelah 62)
+        if len(cleaned) < 10:
+            raise ValueError('Nomor WhatsApp tidak valid')
+        return cleaned
+
+class KontakWhatsAppResponse(BaseModel):
+    nomor_whatsapp: str
+    pesan_default: Optional[str] = None
+    updated_at: Optional[IsoDateTime] = None
+
+class DuplicateGroupResponse(BaseModel):
+    key_field: str  # "nama", "nip", or "nomor_whatsapp"
+    key_value: str
+    count: int
+    participant_ids: List[str]
+
+class DuplicateDetailItem(BaseModel):
+    id: str
+    nama_lengkap: str
+    nip: Optional[str] = None
+    nomor_whatsapp: Optional[str] = None
+    opd_nama: Optional[str] = None
+    jumlah_pohon: int
+    jenis_pohon: str
+    created_at: IsoDateTime
+
+class MergeDuplicatesRequest(BaseModel):
+    primary_id: str
+    secondary_ids: List[str]
@@ -0,0 +1,151 @@
+"""
+In-process OPD directory: id -> OPD record and normalized name -> id.
+
+Handlers join participants to their OPD (opd_nama, kategori, Excel import by
+name) through this directory instead of reading the opd collection. It is
+loaded once and reloaded lazily whenever its version moves: OPD create,
+update, delete and import bump it locally, the change feed bumps it for
+writes from other workers, and OPD_DIRECTORY_TTL bounds staleness when the
+feed is off. The per-OPD planting counters are not part of the directory.
+
+Participant documents also carry a copy of their OPD's nama and kategori
+(`opd_nama`, `kategori`), written with the participant and fanned out with
+one update_many when an OPD is renamed, recategorized or deleted, so
+participant listings and exports read a single collection.
+"""
+import asyncio
+import re
+import time
+from typing import Dict, List, Optional
+
+from fastapi import Request
+from pymongo import UpdateMany
+
+from config import OPD_DIRECTORY_TTL
+from progress import DEFAULT_KATEGORI
+
+UNKNOWN_OPD = "Unknown"
+COUNTER_FIELDS = {"pohon_tertanam", "progress_rasio"}
+MISS_RELOAD_INTERVAL = 1.0  # detik; id tak dikenal memicu paling banyak satu reload per interval
+DENORMALIZED_FIELDS = {"nama", "kategori"}  # field OPD yang disalin ke dokumen partisipasi
+
+def normalize_name(nama: Optional[str]) -> str:
+    return re.sub(r"\s+", " ", str(nama or "")).strip().lower()
+
+def opd_fields(record: Optional[dict]) -> dict:
+    """The OPD fields copied onto a participant document."""
+    if record is None:
+        return {"opd_nama": UNKNOWN_OPD, "kategori": None}
+    return {"opd_nama": record.get("nama") or UNKNOWN_OPD, "kategori": record.get("kategori") or DEFAULT_KATEGORI}
+
+async def fan_out_opd_fields(db, opd_id: str, record: Optional[dict]) -> int:
+    """Rewrite the copied OPD fields on every participant of one OPD (record None: OPD deleted)."""
+    result = await db.partisipasi.update_many({"opd_id": opd_id}, {"$set": opd_fields(record)})
+    return result.modified_count
+
+async def backfill_participant_opd(db) -> int:
+    """Startup: copy OPD fields onto participants written before they were denormalized."""
+    missing = {"opd_nama": {"$exists": False}}
+    if not await db.partisipasi.count_documents(missing, limit=1):
+        return 0
+    opd_ids = await db.partisipasi.distinct("opd_id", missing)
+    records = {o["id"]: o for o in await db.opd.find({"id": {"$in": opd_ids}}, {"_id": 0}).to_list(None)}
+    ops = [
+        UpdateMany({**missing, "opd_id": opd_id}, {"$set": opd_fields(records.get(opd_id))})
+        for opd_id in opd_ids
+    ]
+    result = await db.partisipasi.bulk_write(ops, ordered=False)
+    return result.modified_count
+
+class OPDDirectory:
+
+    def __init__(self, database, ttl: float = OPD_DIRECTORY_TTL):
+        self.db = database
+        self.ttl = ttl
+        self.version = 0
+        self._loaded_version = -1
+        self._loaded_at = 0.0
+        self._miss_reload_at = 0.0
+        self._by_id: Dict[str, dict] = {}
+        self._by_name: Dict[str, str] = {}
+        self._by_name_kategori: Dict[tuple, str] = {}
+        self._lock = asyncio.Lock()
+
+    def bump(self, *_):
+        """Mark the directory stale; the next lookup reloads it."""
+        self.version += 1
+
+    def apply_change(self, change: dict):
+        """Change feed callback for opd; counter-only updates leave names untouched."""
+        if change.get("operationType") == "update":
+            description = change.get("updateDescription", {})
+            touched = set(description.get("updatedFields", {})) | set(description.get("removedFields", []))
+            if touched and touched <= COUNTER_FIELDS:
+                return
+        self.bump()
+
+    def _fresh(self) -> bool:
+        return self._loaded_version == self.version and time.monotonic() - self._loaded_at < self.ttl
+
+    async def _ensure(self, force: bool = False):
+        if not force and self._fresh():
+            return
+        async with self._lock:
+            if not force and self._fresh():
+                return
+            version = self.version
+            docs = await self.db.opd.find({}, {"_id": 0, "pohon_tertanam": 0, "progress_rasio": 0}).to_list(None)
+            self._by_id = {doc["id"]: doc for doc in docs}
+            # Nama ganda: yang terakhir menang, sama seperti map {nama.lower(): id} sebelumnya
+            self._by_name = {normalize_name(doc.get("nama")): doc["id"] for doc in docs}
+            self._by_name_kategori = {
+                (normalize_name(doc.get("nama")), doc.get("kategori")): doc["id"] for doc in docs
+            }
+            self._loaded_version = version
+            self._loaded_at = time.monotonic()
+
+    async def get(self, opd_id: Optional[str], reload_on_miss: bool = False) -> Optional[dict]:
+        """
+        The OPD record for an id. With reload_on_miss an unknown id reloads
+        the directory once (rate limited), for OPDs just created by another
+        worker.
+        """
+        await self._ensure()
+        record = self._by_id.get(opd_id)
+        if record is None and reload_on_miss and opd_id:
+            if time.monotonic() - self._miss_reload_at >= MISS_RELOAD_INTERVAL:
+                self._miss_reload_at = time.monotonic()
+                await self._ensure(force=True)
+                record = self._by_id.get(opd_id)
+        return record
+
+    async def name(self, opd_id: Optional[str]) -> str:
+        record = await self.get(opd_id)
+        return record["nama"] if record else UNKNOWN_OPD
+
+    async def names(self) -> Dict[str, str]:
+        """id -> nama for every OPD."""
+        await self._ensure()
+        return {opd_id: doc["nama"] for opd_id, doc in self._by_id.items()}
+
+    async def id_for_name(self, nama: str, kategori: Optional[str] = None) -> Optional[str]:
+        await self._ensure()
+        if kategori is None:
+            return self._by_name.get(normalize_name(nama))
+        return self._by_name_kategori.get((normalize_name(nama), kategori))
+
+    async def fill_opd_nama(self, docs: List[dict]) -> List[dict]:
+        """Participants written before denormalization: take opd_nama from the directory."""
+        if any(doc.get("opd_nama") is None for doc in docs):
+            names = await self.names()
+            for doc in docs:
+                if doc.get("opd_nama") is None:
+                    doc["opd_nama"] = names.get(doc.get("opd_id"), UNKNOWN_OPD)
+        return docs
+
+    async def all(self) -> List[dict]:
+        await self._ensure()
+        return list(self._by_id.values())
+
+def get_opd_directory(request: Request) -> OPDDirectory:
+    return request.app.state.opd_directory
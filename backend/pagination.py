@@ -0,0 +1,103 @@
+"""
+Keyset (cursor) pagination, field projection and server-side excerpts for listings.
+"""
+import base64
+from datetime import datetime
+from typing import List, Optional
+
+from bson import json_util
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from dates import iso_datetime
+
+MAX_PAGE_LIMIT = 1000  # default untuk halaman admin yang memuat seluruh daftar; halaman publik meminta per halaman
+EXCERPT_LENGTH = 200
+
+def encode_cursor(doc: dict, sort_field: str) -> str:
+    # json_util: nilai sort bertipe tanggal BSON tetap tanggal saat cursor dibaca kembali
+    raw = json_util.dumps([doc.get(sort_field), doc.get("id")])
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor: str):
+    try:
+        sort_value, last_id = json_util.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor tidak valid")
+    return sort_value, last_id
+
+def parse_fields(fields: Optional[str], allowed: List[str], always: List[str]) -> Optional[dict]:
+    """Build a Mongo projection from a comma separated `fields=` parameter."""
+    if not fields:
+        return None
+    requested = [f.strip() for f in fields.split(',') if f.strip()]
+    invalid = [f for f in requested if f not in allowed]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Field tidak dikenal: {', '.join(invalid)}")
+    projection = {"_id": 0}
+    for f in always + requested:
+        projection[f] = 1
+    return projection
+
+def excerpt_expr(field: str, length: int) -> dict:
+    """Truncate a text field inside Mongo so the full text never leaves the database."""
+    value = {"$ifNull": [f"${field}", ""]}
+    return {
+        "$cond": [
+            {"$gt": [{"$strLenCP": value}, length]},
+            {"$concat": [{"$substrCP": [value, 0, length]}, "..."]},
+            value
+        ]
+    }
+
+async def paginate(
+    collection,
+    query: dict,
+    sort_field: str,
+    direction: int,
+    limit: int,
+    cursor: Optional[str] = None,
+    projection: Optional[dict] = None,
+    excerpt_fields: Optional[List[str]] = None,
+):
+    """
+    Keyset pagination on (sort_field, id), backed by the matching compound index.
+    Returns (items, next_cursor); next_cursor is None on the last page.
+    """
+    match = dict(query)
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor)
+        op = "$lt" if direction < 0 else "$gt"
+        keyset = {"$or": [
+            {sort_field: {op: sort_value}},
+            {sort_field: sort_value, "id": {op: last_id}}
+        ]}
+        match = {"$and": [query, keyset]} if query else keyset
+
+    pipeline = [
+        {"$match": match},
+        {"$sort": {sort_field: direction, "id": direction}},
+        {"$limit": limit + 1},
+        {"$project": projection or {"_id": 0}},
+    ]
+    if excerpt_fields:
+        included = [f for f in excerpt_fields if projection is None or f in projection]
+        if included:
+            pipeline.append({"$set": {f: excerpt_expr(f, EXCERPT_LENGTH) for f in included}})
+
+    items = await collection.aggregate(pipeline).to_list(limit + 1)
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        next_cursor = encode_cursor(items[-1], sort_field)
+    return items, next_cursor
+
+def page_response(response: Response, items: list, next_cursor: Optional[str], projected: bool):
+    """Return a page; the next cursor travels in X-Next-Cursor so the body stays a plain list."""
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    if projected:
+        # Partial documents do not satisfy the full response model
+        return JSONResponse(content=jsonable_encoder(items, custom_encoder={datetime: iso_datetime}), headers=headers)
+    response.headers.update(headers)
+    return items
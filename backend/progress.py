@@ -0,0 +1,252 @@
+"""
+Per-OPD planting counters and the cached progress summary.
+
+Every OPD document carries `pohon_tertanam` (sum of jumlah_pohon of its
+participants) and `progress_rasio` (pohon_tertanam per personil), so
+/api/progress is one indexed, sorted query on opd. Participation writes
+apply their StatsDelta with a pipeline update, which changes both fields of
+a document atomically. The target multiplier (trees per person) is a site
+setting and only scales the ratio, so changing it needs no rewrite.
+
+Writes that bypass the handlers (mongosh, import scripts, a request that
+died half way) are corrected by OPDCounterSync, a leader-only change feed
+subscriber that recomputes the OPDs a partisipasi event touches.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, Optional, Set
+
+from fastapi import Request
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+from config import CHANGE_FEED_RESYNC_DELAY, PROGRESS_SUMMARY_TTL
+from live_stats import StatsDelta
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KATEGORI = "OPD"  # OPD lama tanpa field kategori dihitung sebagai OPD
+
+PROGRESS_RATIO = {
+    "$cond": [
+        {"$gt": [{"$ifNull": ["$jumlah_personil", 0]}, 0]},
+        {"$divide": [{"$ifNull": ["$pohon_tertanam", 0]}, "$jumlah_personil"]},
+        0
+    ]
+}
+REFRESH_RATIO = [{"$set": {"progress_rasio": PROGRESS_RATIO}}]
+
+def counter_update(pohon: int) -> list:
+    return [
+        {"$set": {"pohon_tertanam": {"$add": [{"$ifNull": ["$pohon_tertanam", 0]}, pohon]}}},
+        {"$set": {"progress_rasio": PROGRESS_RATIO}},
+    ]
+
+def kategori_query(kategori: Optional[str]) -> dict:
+    if not kategori:
+        return {}
+    if kategori == DEFAULT_KATEGORI:
+        return {"kategori": {"$in": [DEFAULT_KATEGORI, None]}}
+    return {"kategori": kategori}
+
+async def apply_opd_counters(db, delta: StatsDelta):
+    """Add a participation delta to the OPD counters in one bulk write."""
+    ops = [
+        UpdateOne({"id": opd_id}, counter_update(pohon))
+        for opd_id, (pohon, _) in delta.opd.items()
+        if opd_id and pohon
+    ]
+    if ops:
+        await db.opd.bulk_write(ops, ordered=False)
+
+async def recompute_opd_counters(db, opd_ids: Optional[Iterable[str]] = None) -> int:
+    """Rebuild OPD counters from partisipasi: the given OPDs, or every OPD (backfill, repair)."""
+    match, opd_query = [], {}
+    if opd_ids is not None:
+        opd_ids = [opd_id for opd_id in opd_ids if opd_id]
+        if not opd_ids:
+            return 0
+        match = [{"$match": {"opd_id": {"$in": opd_ids}}}]
+        opd_query = {"id": {"$in": opd_ids}}
+    rows = await db.partisipasi.aggregate([
+        *match,
+        {"$group": {"_id": "$opd_id", "pohon": {"$sum": "$jumlah_pohon"}}}
+    ]).to_list(None)
+    planted = {row["_id"]: row["pohon"] for row in rows}
+    opd_ids = [o["id"] for o in await db.opd.find(opd_query, {"_id": 0, "id": 1}).to_list(None)]
+    ops = [
+        UpdateOne({"id": opd_id}, [{"$set": {"pohon_tertanam": planted.get(opd_id, 0)}}, *REFRESH_RATIO])
+        for opd_id in opd_ids
+    ]
+    if ops:
+        await db.opd.bulk_write(ops, ordered=False)
+    return len(ops)
+
+async def backfill_opd_counters(db):
+    """Startup: fill the counters once for OPDs created before they existed."""
+    if await db.opd.count_documents({"pohon_tertanam": {"$exists": False}}, limit=1):
+        await recompute_opd_counters(db)
+
+class OPDCounterSync:
+    """
+    Applies participation deltas to the OPD counters and repairs them from
+    change events.
+
+    apply_change runs in the change feed leader only and recomputes the OPDs
+    an event touches from partisipasi, so the result is exact whatever wrote
+    the document. An update that leaves opd_id alone only needs the post-image
+    (updateLookup works without pre-images). Events without enough detail
+    (deletes or OPD moves without a pre-image, invalidate) are coalesced into
+    one recompute of every OPD after `resync_delay`, so a bulk edit costs one
+    $group rather than one per document; a worker taking over the leadership
+    recomputes everything as well.
+    While this worker follows a change stream the handlers leave the
+    counters to the leader; in polling mode in-place edits are not seen, so
+    handlers keep applying their delta and the poll only corrects.
+    """
+
+    def __init__(self, database, resync_delay: float = CHANGE_FEED_RESYNC_DELAY):
+        self.db = database
+        self.resync_delay = resync_delay
+        self.follow_change_stream = False
+        self._resync_task: Optional[asyncio.Task] = None
+
+    def use_change_stream(self, enabled: bool):
+        self.follow_change_stream = enabled
+
+    async def apply(self, delta: StatsDelta):
+        """Counter update for a change made by a request handler."""
+        if not self.follow_change_stream:
+            await apply_opd_counters(self.db, delta)
+
+    async def recompute_all(self):
+        await recompute_opd_counters(self.db)
+
+    async def apply_change(self, change: dict):
+        """Leader-only change feed callback for the partisipasi collection."""
+        opd_ids = await self._affected(change)
+        if opd_ids is None:
+            self.schedule_recompute()
+        else:
+            await recompute_opd_counters(self.db, opd_ids)
+
+    def schedule_recompute(self):
+        """One full recompute for all unknown events arriving within resync_delay."""
+        if self._resync_task is None or self._resync_task.done():
+            self._resync_task = asyncio.create_task(self._delayed_recompute())
+
+    async def _delayed_recompute(self):
+        await asyncio.sleep(self.resync_delay)
+        self._resync_task = None  # event selama $group berjalan menjadwalkan putaran baru
+        try:
+            await self.recompute_all()
+        except PyMongoError as e:
+            logger.warning(f"Gagal menghitung ulang counter OPD: {e}")
+
+    async def stop(self):
+        if self._resync_task:
+            self._resync_task.cancel()
+            try:
+                await self._resync_task
+            except asyncio.CancelledError:
+                pass
+            self._resync_task = None
+
+    async def _affected(self, change: dict) -> Optional[Set[str]]:
+        """OPD ids whose counters an event may change; None when it cannot tell."""
+        op = change.get("operationType")
+        touched = set()
+        if op == "update":
+            description = change.get("updateDescription", {})
+            touched = set(description.get("updatedFields", {})) | set(description.get("removedFields", []))
+            if not touched & {"jumlah_pohon", "opd_id"}:
+                return set()
+        if op == "poll":
+            return await self._inserted_since(change.get("before"), change.get("after"))
+        if op not in ("insert", "update", "replace", "delete"):
+            return None
+        opd_ids = set()
+        if op != "delete":
+            after = change.get("fullDocument")
+            if after is None:
+                return None
+            opd_ids.add(after.get("opd_id"))
+        if op != "insert":
+            before = change.get("fullDocumentBeforeChange")
+            if before is not None:
+                opd_ids.add(before.get("opd_id"))
+            elif not (op == "update" and "opd_id" not in touched):
+                return None  # OPD lama tidak diketahui
+        return opd_ids
+
+    async def _inserted_since(self, before, after) -> Optional[Set[str]]:
+        """Polling: when the only change is new documents after the old newest _id, just their OPDs."""
+        if not before or not after:
+            return None
+        query = {"_id": {"$gt": before[1]}} if before[1] is not None else {}  # sebelumnya koleksi kosong
+        docs = await self.db.partisipasi.find(query, {"_id": 0, "opd_id": 1}).to_list(None)
+        if after[0] - before[0] != len(docs):
+            return None  # ada penghapusan atau sisipan di luar urutan _id
+        return {doc.get("opd_id") for doc in docs}
+
+class ProgressSummaryCache:
+    """
+    Personil and planted totals per kategori, from one $group over opd.
+    Dropped on local participation/OPD writes and on opd change events;
+    the TTL bounds staleness from other workers.
+    """
+
+    def __init__(self, database, ttl: float = PROGRESS_SUMMARY_TTL):
+        self.db = database
+        self.ttl = ttl
+        self._totals: Optional[Dict[str, dict]] = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self, *_):
+        self._totals = None
+
+    async def _load(self) -> Dict[str, dict]:
+        rows = await self.db.opd.aggregate([
+            {"$group": {
+                "_id": {"$ifNull": ["$kategori", DEFAULT_KATEGORI]},
+                "total_personil": {"$sum": "$jumlah_personil"},
+                "total_tertanam": {"$sum": "$pohon_tertanam"},
+            }}
+        ]).to_list(None)
+        return {row["_id"]: {"total_personil": row["total_personil"], "total_tertanam": row["total_tertanam"]}
+                for row in rows}
+
+    async def get(self, kategori: Optional[str] = None) -> dict:
+        async with self._lock:
+            if self._totals is None or time.monotonic() - self._loaded_at > self.ttl:
+                self._totals = await self._load()
+                self._loaded_at = time.monotonic()
+            totals = self._totals
+        groups = [totals.get(kategori, {})] if kategori else list(totals.values())
+        return {
+            "total_personil": sum(g.get("total_personil", 0) for g in groups),
+            "total_tertanam": sum(g.get("total_tertanam", 0) for g in groups),
+        }
+
+def get_progress_summary(request: Request) -> ProgressSummaryCache:
+    return request.app.state.progress_summary
+
+def get_opd_counters(request: Request) -> OPDCounterSync:
+    return request.app.state.opd_counters
+
+if __name__ == "__main__":
+    # python progress.py  -> hitung ulang semua counter OPD dari data partisipasi
+    from config import MONGO_URL, DB_NAME
+    from database import create_client
+
+    async def main():
+        client = create_client(MONGO_URL)
+        try:
+            updated = await recompute_opd_counters(client[DB_NAME])
+            print(f"Counter {updated} OPD dihitung ulang")
+        finally:
+            client.close()
+
+    asyncio.run(main())
@@ -0,0 +1,217 @@
+"""
+Resumable (tus-style) uploads for proof-of-planting photos.
+
+On 2G/3G links a dropped connection near the end of /api/upload/image means
+sending the whole photo again. Here the client creates an upload, sends the
+bytes in PATCH chunks at explicit offsets, asks for the current offset after
+a failure and continues from there, then finalizes:
+
+    POST   /api/upload/resumable              Upload-Length, Upload-Metadata -> 201 + Location
+    HEAD   /api/upload/resumable/{id}         -> Upload-Offset / Upload-Length
+    PATCH  /api/upload/resumable/{id}         Upload-Offset + bytes (application/offset+octet-stream)
+    POST   /api/upload/resumable/{id}/finalize -> {"id": ..., "ref": "upload:<id>"}
+    DELETE /api/upload/resumable/{id}
+
+The reference goes into bukti_url of POST /api/partisipasi instead of the
+photo itself; the server turns it into the stored data URL and removes the
+upload once the submission is saved.
+
+Chunks are appended to a file in RESUMABLE_UPLOAD_DIR (local disk, shared by
+the workers on one host); the file size is the offset, so bytes received
+before a disconnect are kept. An exclusive flock on the file serializes
+concurrent PATCHes across workers. Finalize runs the same magic-byte check
+as the streaming upload and keeps the file until it is used or expires, so a
+repeated finalize returns the same result. Uploads untouched for
+RESUMABLE_UPLOAD_TTL_HOURS are removed.
+"""
+import base64
+import fcntl
+import json
+import os
+import re
+import time
+import uuid
+from typing import AsyncIterator, Dict, Optional
+
+from fastapi import HTTPException, Request
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+
+from config import RESUMABLE_UPLOAD_DIR, RESUMABLE_UPLOAD_TTL_HOURS, UPLOAD_MAX_BYTES
+from uploads import HEAD_BYTES, IMAGE, image_data_url, too_large
+
+TUS_VERSION = "1.0.0"
+SWEEP_INTERVAL = 600  # detik antara dua pembersihan upload kedaluwarsa
+_UPLOAD_ID = re.compile(r"^[0-9a-f]{32}$")
+UPLOAD_REF = "upload:"
+
+def parse_metadata(header: Optional[str]) -> Dict[str, str]:
+    """Upload-Metadata: comma separated `key base64(value)` pairs."""
+    metadata = {}
+    for pair in (header or "").split(","):
+        key, _, value = pair.strip().partition(" ")
+        if not key:
+            continue
+        try:
+            metadata[key] = base64.b64decode(value, validate=True).decode("utf-8") if value else ""
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Upload-Metadata tidak valid")
+    return metadata
+
+def offset_conflict(offset: int) -> HTTPException:
+    return HTTPException(
+        status_code=409, detail="Upload-Offset tidak sesuai", headers={"Upload-Offset": str(offset)}
+    )
+
+def beyond_length(length: int, offset: int) -> HTTPException:
+    return HTTPException(
+        status_code=413, detail=f"Data melebihi Upload-Length yang dideklarasikan ({length} byte)",
+        headers={"Upload-Offset": str(offset)}
+    )
+
+class ResumableUploadStore:
+
+    def __init__(self, directory: str = RESUMABLE_UPLOAD_DIR, ttl_hours: float = RESUMABLE_UPLOAD_TTL_HOURS,
+                 max_bytes: int = UPLOAD_MAX_BYTES):
+        self.directory = directory
+        self.ttl = ttl_hours * 3600
+        self.max_bytes = max_bytes
+        self._swept_at = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    def _paths(self, upload_id: str):
+        if not _UPLOAD_ID.match(upload_id):
+            raise HTTPException(status_code=404, detail="Upload tidak ditemukan")
+        base = os.path.join(self.directory, upload_id)
+        return base + ".part", base + ".json"
+
+    def _meta(self, upload_id: str) -> dict:
+        data_path, meta_path = self._paths(upload_id)
+        try:
+            with open(meta_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Upload tidak ditemukan")
+
+    def create(self, length: int, metadata: Dict[str, str]) -> str:
+        if length > self.max_bytes:
+            raise too_large(self.max_bytes)
+        filename = metadata.get("filename", "")
+        filetype = metadata.get("filetype", "")
+        if filetype and not IMAGE.declared(filename, filetype.lower()):
+            raise HTTPException(status_code=400, detail=IMAGE.error)
+        self.sweep()
+        upload_id = uuid.uuid4().hex
+        data_path, meta_path = self._paths(upload_id)
+        open(data_path, "wb").close()
+        with open(meta_path, "w") as f:
+            json.dump({"length": length, "filename": filename, "filetype": filetype, "created": time.time()}, f)
+        return upload_id
+
+    def info(self, upload_id: str) -> dict:
+        """Length, current offset and metadata of an upload."""
+        meta = self._meta(upload_id)
+        data_path, _ = self._paths(upload_id)
+        return {**meta, "offset": os.path.getsize(data_path)}
+
+    async def append(self, upload_id: str, offset: int, chunks: AsyncIterator[bytes]) -> int:
+        """Write a PATCH body at `offset`; returns the new offset (bytes already written are kept on error)."""
+        length = self._meta(upload_id)["length"]
+        data_path, _ = self._paths(upload_id)
+        fd = os.open(data_path, os.O_WRONLY)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                raise HTTPException(status_code=423, detail="Upload sedang dikirim oleh permintaan lain")
+            current = os.fstat(fd).st_size
+            if offset != current:
+                raise offset_conflict(current)
+            os.lseek(fd, current, os.SEEK_SET)
+            try:
+                async for chunk in chunks:
+                    if current + len(chunk) > length:
+                        raise beyond_length(length, current)
+                    await run_in_threadpool(_write_all, fd, chunk)
+                    current += len(chunk)
+            except ClientDisconnect:
+                pass  # koneksi putus: byte yang sudah tertulis dipakai saat dilanjutkan
+            return current
+        finally:
+            os.close(fd)  # sekaligus melepas flock
+
+    async def _image(self, upload_id: str) -> bytes:
+        info = self.info(upload_id)
+        if info["offset"] != info["length"]:
+            raise HTTPException(
+                status_code=409, detail="Upload belum lengkap", headers={"Upload-Offset": str(info["offset"])}
+            )
+        data_path, _ = self._paths(upload_id)
+        content = await run_in_threadpool(_read_all, data_path)
+        if IMAGE.sniff(content[:HEAD_BYTES]) is None:
+            self.delete(upload_id)
+            raise HTTPException(status_code=400, detail=IMAGE.error)
+        return content
+
+    async def finalize(self, upload_id: str) -> str:
+        """Check that the upload is a complete image; returns its reference for bukti_url."""
+        await self._image(upload_id)
+        return UPLOAD_REF + upload_id
+
+    async def resolve(self, value: Optional[str]) -> Optional[str]:
+        """The data URL behind an upload reference; other values are returned unchanged."""
+        upload_id = upload_ref_id(value)
+        if upload_id is None:
+            return value
+        try:
+            content = await self._image(upload_id)
+        except HTTPException as e:
+            if e.status_code == 404:
+                raise HTTPException(status_code=400, detail="Upload bukti tidak ditemukan atau sudah kedaluwarsa")
+            raise HTTPException(status_code=400, detail=e.detail)
+        return image_data_url(content, IMAGE.sniff(content[:HEAD_BYTES]))
+
+    def delete(self, upload_id: str):
+        for path in self._paths(upload_id):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def sweep(self, now: Optional[float] = None, force: bool = False) -> int:
+        """Remove uploads untouched for longer than the TTL (at most every SWEEP_INTERVAL)."""
+        now = time.time() if now is None else now
+        if not force and now - self._swept_at < SWEEP_INTERVAL:
+            return 0
+        self._swept_at = now
+        removed = 0
+        for name in os.listdir(self.directory):
+            upload_id, ext = os.path.splitext(name)
+            if ext != ".json" or not _UPLOAD_ID.match(upload_id):
+                continue
+            paths = self._paths(upload_id)
+            try:
+                touched = max(os.path.getmtime(p) for p in paths if os.path.exists(p))
+            except ValueError:
+                continue
+            if now - touched > self.ttl:
+                self.delete(upload_id)
+                removed += 1
+        return removed
+
+def upload_ref_id(value: Optional[str]) -> Optional[str]:
+    if value and value.startswith(UPLOAD_REF):
+        return value[len(UPLOAD_REF):]
+    return None
+
+def _write_all(fd: int, data: bytes):
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+def _read_all(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+def get_resumable_uploads(request: Request) -> ResumableUploadStore:
+    return request.app.state.resumable_uploads
@@ -0,0 +1,11 @@
+"""
+API routers, all mounted under /api by create_app().
+"""
+from fastapi import APIRouter
+
+from routers import auth, opd, partisipasi, content, search, reports, duplicates, system
+
+api_router = APIRouter(prefix="/api")
+
+for module in (auth, opd, partisipasi, content, search, reports, duplicates, system):
+    api_router.include_router(module.router)
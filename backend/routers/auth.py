@@ -0,0 +1,51 @@
+"""
+Registration, login and the current-user endpoint.
+"""
+import uuid
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, Depends, HTTPException
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from auth import hash_password, verify_password, create_token, get_current_user
+from database import get_db
+from models import UserCreate, UserLogin, UserResponse
+
+router = APIRouter()
+
+# ============== AUTH ENDPOINTS ==============
+
+@router.post("/auth/register", response_model=dict)
+async def register(user: UserCreate, db: AsyncIOMotorDatabase = Depends(get_db)):
+    existing = await db.users.find_one({"email": user.email})
+    if existing:
+        raise HTTPException(status_code=400, detail="Email sudah terdaftar")
+    
+    user_id = str(uuid.uuid4())
+    user_doc = {
+        "id": user_id,
+        "email": user.email,
+        "password": hash_password(user.password),
+        "nama": user.nama,
+        "role": "admin",
+        "created_at": datetime.now(timezone.utc)
+    }
+    await db.users.insert_one(user_doc)
+    token = create_token(user_id, user.email, "admin")
+    return {"token": token, "user": {"id": user_id, "email": user.email, "nama": user.nama, "role": "admin"}}
+
+@router.post("/auth/login", response_model=dict)
+async def login(user: UserLogin, db: AsyncIOMotorDatabase = Depends(get_db)):
+    existing = await db.users.find_one({"email": user.email}, {"_id": 0})
+    if not existing or not verify_password(user.password, existing["password"]):
+        raise HTTPException(status_code=401, detail="Email atau password salah")
+    
+    token = create_token(existing["id"], existing["email"], existing["role"])
+    return {"token": token, "user": {"id": existing["id"], "email": existing["email"], "nama": existing["nama"], "role": existing["role"]}}
+
+@router.get("/auth/me", response_model=UserResponse)
+async def get_me(current_user: dict = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_db)):
+    user = await db.users.find_one({"id": current_user["user_id"]}, {"_id": 0, "password": 0})
+    if not user:
+        raise HTTPException(status_code=404, detail="User tidak ditemukan")
+    return user
@@ -0,0 +1,369 @@
+"""
+Site content: settings, uploads, gallery, edukasi, agenda, berita and the WhatsApp contact.
+"""
+import uuid
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from agenda_schedule import AGENDA_UPCOMING_LIMIT, agenda_status_for, local_day_start, parse_tanggal
+from auth import get_current_user
+from config import UPLOAD_MAX_BYTES
+from crud import update_by_id, update_fields
+from database import get_db, get_read_db
+from dates import date_range_query
+from models import (
+    SettingsUpdate, SettingsResponse,
+    GalleryCreate, GalleryResponse,
+    EdukasiCreate, EdukasiUpdate, EdukasiResponse,
+    AgendaCreate, AgendaUpdate, AgendaResponse,
+    BeritaCreate, BeritaUpdate, BeritaResponse,
+    KontakWhatsAppCreate, KontakWhatsAppResponse,
+)
+from pagination import MAX_PAGE_LIMIT, paginate, page_response, parse_fields
+from resumable_uploads import TUS_VERSION, ResumableUploadStore, get_resumable_uploads, parse_metadata
+from settings_store import SettingsCache, get_settings_cache, settings_etag
+from uploads import IMAGE, multipart_openapi, read_upload
+
+router = APIRouter()
+
+@router.get("/settings", response_model=SettingsResponse)
+async def get_settings(request: Request, response: Response, settings_cache: SettingsCache = Depends(get_settings_cache)):
+    settings = await settings_cache.get()
+    etag = settings_etag(settings_cache.version)
+    # NewsPopup dan halaman publik cukup revalidasi; 304 jika versi tidak berubah
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+    return settings
+
+@router.put("/settings", response_model=SettingsResponse)
+async def update_settings(data: SettingsUpdate, current_user: dict = Depends(get_current_user), settings_cache: SettingsCache = Depends(get_settings_cache)):
+    update_data = {k: v for k, v in data.model_dump().items() if v is not None}
+    if not update_data:
+        return await settings_cache.get()
+    return await settings_cache.update(update_data)
+
+@router.post("/upload/image", openapi_extra=multipart_openapi())
+async def upload_image(request: Request):
+    upload = await read_upload(request, IMAGE, UPLOAD_MAX_BYTES)
+    try:
+        return {"url": upload.data_url()}
+    finally:
+        upload.close()
+
+def tus_headers(**values) -> dict:
+    headers = {"Tus-Resumable": TUS_VERSION, "Cache-Control": "no-store"}
+    headers.update({name.replace("_", "-").title(): str(value) for name, value in values.items()})
+    return headers
+
+def int_header(request: Request, name: str) -> int:
+    try:
+        value = int(request.headers.get(name, ""))
+    except ValueError:
+        value = -1
+    if value < 0:
+        raise HTTPException(status_code=400, detail=f"Header {name} wajib berupa angka")
+    return value
+
+@router.post("/upload/resumable", status_code=201)
+async def create_resumable_upload(request: Request, response: Response, store: ResumableUploadStore = Depends(get_resumable_uploads)):
+    length = int_header(request, "Upload-Length")
+    upload_id = store.create(length, parse_metadata(request.headers.get("upload-metadata")))
+    response.headers.update(tus_headers(location=f"{request.url.path}/{upload_id}", upload_offset=0))
+    return {"id": upload_id, "offset": 0, "length": length}
+
+@router.head("/upload/resumable/{upload_id}")
+async def get_resumable_upload_offset(upload_id: str, store: ResumableUploadStore = Depends(get_resumable_uploads)):
+    info = store.info(upload_id)
+    return Response(headers=tus_headers(upload_offset=info["offset"], upload_length=info["length"]))
+
+@router.patch("/upload/resumable/{upload_id}", status_code=204)
+async def append_resumable_upload(upload_id: str, request: Request, store: ResumableUploadStore = Depends(get_resumable_uploads)):
+    if request.headers.get("content-type") != "application/offset+octet-stream":
+        raise HTTPException(status_code=415, detail="Content-Type harus application/offset+octet-stream")
+    offset = await store.append(upload_id, int_header(request, "Upload-Offset"), request.stream())
+    return Response(status_code=204, headers=tus_headers(upload_offset=offset))
+
+@router.post("/upload/resumable/{upload_id}/finalize")
+async def finalize_resumable_upload(upload_id: str, store: ResumableUploadStore = Depends(get_resumable_uploads)):
+    return {"id": upload_id, "ref": await store.finalize(upload_id)}
+
+@router.delete("/upload/resumable/{upload_id}", status_code=204)
+async def delete_resumable_upload(upload_id: str, store: ResumableUploadStore = Depends(get_resumable_uploads)):
+    store.delete(upload_id)
+    return Response(status_code=204, headers=tus_headers())
+
+@router.post("/settings/upload-logo", openapi_extra=multipart_openapi())
+async def upload_logo(request: Request, current_user: dict = Depends(get_current_user), settings_cache: SettingsCache = Depends(get_settings_cache)):
+    upload = await read_upload(request, IMAGE, UPLOAD_MAX_BYTES)
+    try:
+        data_url = upload.data_url()
+    finally:
+        upload.close()
+    
+    await settings_cache.update({"logo_url": data_url})
+    return {"logo_url": data_url}
+
+# ============== GALLERY ENDPOINTS ==============
+
+GALLERY_FIELDS = ["id", "title", "image_url", "description", "created_at"]
+
+@router.get("/gallery", response_model=List[GalleryResponse])
+async def get_all_gallery(
+    response: Response,
+    limit: int = Query(MAX_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncIOMotorDatabase = Depends(get_read_db)
+):
+    projection = parse_fields(fields, GALLERY_FIELDS, ["id", "created_at"])
+    items, next_cursor = await paginate(
+        db.gallery, {}, "created_at", 1, limit, cursor, projection
+    )
+    return page_response(response, items, next_cursor, projection is not None)
+
+@router.post("/gallery", response_model=GalleryResponse)
+async def create_gallery(data: GalleryCreate, current_user: dict = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_db)):
+    gallery_id = str(uuid.uuid4())
+    doc = {
+        "id": gallery_id,
+        **data.model_dump(),
+        "created_at": datetime.now(timezone.utc)
+    }
+    await db.gallery.insert_one(doc)
+    return doc
+
+@router.delete("/gallery/{gallery_id}")
+async def delete_gallery(gallery_id: str, current_user: dict = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_db)):
+    result = await db.gallery.delete_one({"id": gallery_id})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Item galeri tidak ditemukan")
+    return {"message": "Item galeri berhasil dihapus"}
+
+# ============== EDUKASI ENDPOINTS ==============
+
+EDUKASI_FIELDS = ["id", "judul", "konten", "gambar_url", "created_at"]
+
+@router.get("/edukasi", response_model=List[EdukasiResponse])
+async def get_all_edukasi(
+    response: Response,
+    limit: int = Query(MAX_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    excerpt: bool = False,
+    db: AsyncIOMotorDatabase = Depends(get_read_db)
+):
+    """List edukasi; `excerpt=true` truncates konten server-side for card views"""
+    projection = parse_fields(fields, EDUKASI_FIELDS, ["id", "created_at"])
+    items, next_cursor = await paginate(
+        db.edukasi, {}, "created_at", 1, limit, cursor, projection,
+        excerpt_fields=["konten"] if excerpt else None
+    )
+    return page_response(response, items, next_cursor, projection is not None)
+
+@router.get("/edukasi/{edukasi_id}", response_model=EdukasiResponse)
+async def get_edukasi_by_id(edukasi_id: str, db: AsyncIOMotorDatabase = Depends(get_read_db)):
+    """Full article, for pages that list with `excerpt=true`"""
+    item = await db.edukasi.find_one({"id": edukasi_id}, {"_id": 0})
+    if not item:
+        raise HTTPException(status_code=404, detail="Edukasi tidak ditemukan")
+    return item
+
+@router.post("/edukasi", response_model=EdukasiResponse)
+async def create_edukasi(data: EdukasiCreate, current_user: dict = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_db)):
+    edukasi_id = str(uuid.uuid4())
+    doc = {
+        "id": edukasi_id,
+        **data.model_dump(),
+        "created_at": datetime.now(timezone.utc)
+    }
+    await db.edukasi.insert_one(doc)
+    return doc
+
+@router.put("/edukasi/{edukasi_id}", response_model=EdukasiResponse)
+async def update_edukasi(edukasi_id: str, data: EdukasiUpdate, current_user: dict = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_db)):
+    return await update_by_id(db.edukasi, edukasi_id, {"$set": update_fields(data)}, "Edukasi tidak ditemukan")
+
+@router.delete("/edukasi/{edukasi_id}")
+async def delete_edukasi(edukasi_id: str, current_user: dict = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_db)):
+    result = await db.edukasi.delete_one({"id": edukasi_id})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Edukasi tidak ditemukan")
+    return {"message": "Edukasi berhasil dihapus"}
+
+# ============== AGENDA ENDPOINTS ==============
+
+AGENDA_FIELDS = [
+    "id", "nama_kegiatan", "hari", "tanggal", "lokasi_kecamatan",
+    "lokasi_desa", "deskripsi", "status", "created_at"
+]
+
+@router.get("/agenda", response_model=List[AgendaResponse])
+async def get_all_agenda(
+    response: Response,
+    limit: int = Query(MAX_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: AsyncIOMotorDatabase = Depends(get_read_db)
+):
+    projection = parse_fields(fields, AGENDA_FIELDS, ["id", "tanggal"])
+    items, next_cursor = await paginate(
+        db.agenda, {}, "tanggal", 1, limit, cursor, projection
+    )
+    return page_response(response, items, next_cursor, projection is not None)
+
+@router.get("/agenda/upcoming", response_model=List[AgendaResponse])
+async def get_upcoming_agenda(db: AsyncIOMotorDatabase = Depends(get_read_db)):
+    """
+    Get upcoming agenda (today onwards), range query on the parsed tanggal_date.
+    Agenda whose free-text tanggal could not be parsed have no tanggal_date;
+    they follow the dated ones as long as they are not completed.
+    """
+    today = local_day_start(datetime.now(timezone.utc))
+    items = await db.agenda.find(
+        {"tanggal_date": {"$gte": today}, "status": {"$ne": "completed"}},
+        {"_id": 0, "tanggal_date": 0}
+    ).sort([("tanggal_date", 1), ("id", 1)]).to_list(AGENDA_UPCOMING_LIMIT)
+    if len(items) < AGENDA_UPCOMING_LIMIT:
+        items += await db.agenda.find(
+            {"tanggal_date": None, "status": {"$ne": "completed"}},
+            {"_id": 0, "tanggal_date": 0}
+        ).sort("id", 1).to_list(AGENDA_UPCOMING_LIMIT - len(items))
+    return items
+
+@router.post("/agenda", response_model=AgendaResponse)
+async def create_agenda(data: AgendaCreate, current_user: dict = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_db)):
+    agenda_id = str(uuid.uuid4())
+    tanggal_date = parse_tanggal(data.tanggal)
+    doc = {
+        "id": agenda_id,
+        **data.model_dump(),
+        "tanggal_date": tanggal_date,
+        "status": agenda_status_for(tanggal_date, datetime.now(timezone.utc)),  # upcoming, ongoing, completed
+        "created_at": datetime.now(timezone.utc)
+    }
+    await db.agenda.insert_one(doc)
+    return doc
+
+@router.put("/agenda/{agenda_id}", response_model=AgendaResponse)
+async def update_agenda(agenda_id: str, data: AgendaUpdate, current_user: dict = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_db)):
+    update_data = update_fields(data)
+    if "tanggal" in update_data:
+        update_data["tanggal_date"] = parse_tanggal(update_data["tanggal"])
+        if "status" not in update_data:
+            update_data["status"] = agenda_status_for(update_data["tanggal_date"], datetime.now(timezone.utc))
+    return await update_by_id(
+        db.agenda, agenda_id, {"$set": update_data}, "Agenda tidak ditemukan",
+        projection={"_id": 0, "tanggal_date": 0}
+    )
+
+@router.delete("/agenda/{agenda_id}")
+async def delete_agenda(agenda_id: str, current_user: dict = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_db)):
+    result = await db.agenda.delete_one({"id": agenda_id})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Agenda tidak ditemukan")
+    return {"message": "Agenda berhasil dihapus"}
+
+# ============== BERITA ENDPOINTS ==============
+
+BERITA_FIELDS = [
+    "id", "judul", "deskripsi_singkat", "link_berita", "isi_berita",
+    "gambar_url", "gambar_type", "is_active", "created_at"
+]
+
+@router.get("/berita", response_model=List[BeritaResponse])
+async def get_all_berita(
+    response: Response,
+    limit: int = Query(MAX_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    excerpt: bool = False,
+    date_from: Optional[str] = Query(None, alias="from"),
+    date_to: Optional[str] = Query(None, alias="to"),
+    db: AsyncIOMotorDatabase = Depends(get_read_db)
+):
+    """List berita newest first; `excerpt=true` truncates isi_berita server-side, `from`/`to` filter created_at"""
+    projection = parse_fields(fields, BERITA_FIELDS, ["id", "created_at"])
+    items, next_cursor = await paginate(
+        db.berita, date_range_query("created_at", date_from, date_to), "created_at", -1, limit, cursor, projection,
+        excerpt_fields=["isi_berita"] if excerpt else None
+    )
+    return page_response(response, items, next_cursor, projection is not None)
+
+@router.get("/berita/active", response_model=List[BeritaResponse])
+async def get_active_berita(db: AsyncIOMotorDatabase = Depends(get_read_db)):
+    """Get active news for popup"""
+    items = await db.berita.find(
+        {"is_active": True}, 
+        {"_id": 0}
+    ).sort("created_at", -1).to_list(10)
+    return items
+
+@router.get("/berita/{berita_id}", response_model=BeritaResponse)
+async def get_berita_by_id(berita_id: str, db: AsyncIOMotorDatabase = Depends(get_read_db)):
+    berita = await db.berita.find_one({"id": berita_id}, {"_id": 0})
+    if not berita:
+        raise HTTPException(status_code=404, detail="Berita tidak ditemukan")
+    return berita
+
+@router.post("/berita", response_model=BeritaResponse)
+async def create_berita(data: BeritaCreate, current_user: dict = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_db)):
+    berita_id = str(uuid.uuid4())
+    doc = {
+        "id": berita_id,
+        **data.model_dump(),
+        "is_active": True,
+        "created_at": datetime.now(timezone.utc)
+    }
+    await db.berita.insert_one(doc)
+    return doc
+
+@router.put("/berita/{berita_id}", response_model=BeritaResponse)
+async def update_berita(berita_id: str, data: BeritaUpdate, current_user: dict = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_db)):
+    return await update_by_id(db.berita, berita_id, {"$set": update_fields(data)}, "Berita tidak ditemukan")
+
+@router.delete("/berita/{berita_id}")
+async def delete_berita(berita_id: str, current_user: dict = Depends(get_current_user), db: AsyncIOMotorDatabase = Depends(get_db)):
+    result = await db.berita.delete_one({"id": berita_id})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="Berita tidak ditemukan")
+    return {"message": "Berita berhasil dihapus"}
+
+# ============== KONTAK WHATSAPP ENDPOINTS ==============
+
+@router.get("/kontak-whatsapp")
+async def get_kontak_whatsapp(db: AsyncIOMotorDatabase = Depends(get_read_db)):
+    """Get WhatsApp contact settings (public endpoint)"""
+    kontak = await db.kontak_whatsapp.find_one({}, {"_id": 0})
+    if not kontak:
+        return {"nomor_whatsapp": None, "pesan_default": None}
+    return kontak
+
+@router.post("/kontak-whatsapp", response_model=KontakWhatsAppResponse)
+async def save_kontak_whatsapp(
+    data: KontakWhatsAppCreate,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_db)
+):
+    """Save WhatsApp contact settings (admin only)"""
+    # Hapus kontak lama jika ada (hanya simpan 1 nomor aktif)
+    await db.kontak_whatsapp.delete_many({})
+    
+    # Simpan kontak baru
+    kontak_doc = {
+        "nomor_whatsapp": data.nomor_whatsapp,
+        "pesan_default": data.pesan_default or "",
+        "updated_at": datetime.now(timezone.utc)
+    }
+    
+    await db.kontak_whatsapp.insert_one(kontak_doc)
+    
+    return KontakWhatsAppResponse(
+        nomor_whatsapp=data.nomor_whatsapp,
+        pesan_default=data.pesan_default,
+        updated_at=kontak_doc["updated_at"]
+    )
@@ -0,0 +1,203 @@
+"""
+Detection, deletion and merging of duplicate participant entries.
+"""
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from auth import get_current_user
+from database import get_db
+from live_stats import StatsBroadcaster, StatsDelta, get_stats_broadcaster
+from progress import OPDCounterSync, get_opd_counters
+from models import MergeDuplicatesRequest
+from opd_directory import OPDDirectory, get_opd_directory
+
+router = APIRouter()
+
+# ============== DETEKSI GANDA (DUPLICATE DETECTION) ENDPOINTS ==============
+
+
+@router.get("/deteksi-ganda")
+async def get_duplicates(
+    field: str = "nama_lengkap",  # nama_lengkap, nip, nomor_whatsapp
+    opd_id: Optional[str] = None,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    directory: OPDDirectory = Depends(get_opd_directory)
+):
+    """
+    Deteksi data duplikat berdasarkan field tertentu.
+    Returns groups of duplicates with count > 1.
+    """
+    valid_fields = ["nama_lengkap", "nip", "nomor_whatsapp"]
+    if field not in valid_fields:
+        raise HTTPException(status_code=400, detail=f"Field harus salah satu dari: {', '.join(valid_fields)}")
+    
+    # Build match stage
+    match_stage = {}
+    if opd_id and opd_id != "all":
+        match_stage["opd_id"] = opd_id
+    
+    # Exclude empty/null values for the field we're checking
+    match_stage[field] = {"$ne": None, "$ne": ""}
+    
+    # Aggregation pipeline to find duplicates
+    pipeline = [
+        {"$match": match_stage},
+        {
+            "$group": {
+                "_id": f"${field}",
+                "count": {"$sum": 1},
+                "participant_ids": {"$push": "$id"},
+                "participants": {"$push": {
+                    "id": "$id",
+                    "nama_lengkap": "$nama_lengkap",
+                    "nip": "$nip",
+                    "nomor_whatsapp": "$nomor_whatsapp",
+                    "opd_id": "$opd_id",
+                    "opd_nama": "$opd_nama",
+                    "jumlah_pohon": "$jumlah_pohon",
+                    "jenis_pohon": "$jenis_pohon",
+                    "created_at": "$created_at"
+                }}
+            }
+        },
+        {"$match": {"count": {"$gt": 1}}},  # Only groups with more than 1 entry
+        {"$sort": {"count": -1}}  # Sort by count descending
+    ]
+    
+    duplicates = await db.partisipasi.aggregate(pipeline).to_list(1000)
+    
+    # Format response
+    result = []
+    for dup in duplicates:
+        # Peserta lama tanpa opd_nama tersimpan: ambil dari direktori
+        participants = await directory.fill_opd_nama(dup.get("participants", []))
+        
+        result.append({
+            "key_field": field,
+            "key_value": dup["_id"],
+            "count": dup["count"],
+            "participant_ids": dup["participant_ids"],
+            "participants": participants
+        })
+    
+    return {
+        "field": field,
+        "total_groups": len(result),
+        "total_duplicates": sum(d["count"] for d in result),
+        "duplicates": result
+    }
+
+@router.delete("/deteksi-ganda/hapus")
+async def delete_duplicates(
+    ids: List[str],
+    current_user: dict = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    broadcaster: StatsBroadcaster = Depends(get_stats_broadcaster),
+    counters: OPDCounterSync = Depends(get_opd_counters)
+):
+    """
+    Hapus beberapa data partisipasi sekaligus (untuk menghapus duplikat).
+    """
+    if not ids:
+        raise HTTPException(status_code=400, detail="Tidak ada ID yang diberikan")
+    
+    deleted_count = 0
+    delta = StatsDelta()
+    for pid in ids:
+        deleted = await db.partisipasi.find_one_and_delete(
+            {"id": pid}, projection={"_id": 0, "opd_id": 1, "jumlah_pohon": 1}
+        )
+        if deleted is not None:
+            deleted_count += 1
+            delta.add(deleted.get("opd_id"), -(deleted.get("jumlah_pohon") or 0), -1)
+    await counters.apply(delta)
+    broadcaster.publish(delta, "deleted")
+    
+    return {
+        "success": True,
+        "deleted_count": deleted_count,
+        "message": f"Berhasil menghapus {deleted_count} data"
+    }
+
+@router.post("/deteksi-ganda/gabung")
+async def merge_duplicates(
+    request: MergeDuplicatesRequest,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    broadcaster: StatsBroadcaster = Depends(get_stats_broadcaster),
+    counters: OPDCounterSync = Depends(get_opd_counters)
+):
+    """
+    Gabungkan data duplikat menjadi satu.
+    Data dari secondary_ids akan dihapus, dan jumlah pohon akan ditambahkan ke primary.
+    lokasi_list dari semua data akan digabungkan.
+    """
+    if not request.primary_id or not request.secondary_ids:
+        raise HTTPException(status_code=400, detail="primary_id dan secondary_ids diperlukan")
+    
+    # Get primary data
+    primary = await db.partisipasi.find_one({"id": request.primary_id}, {"_id": 0})
+    if not primary:
+        raise HTTPException(status_code=404, detail="Data primer tidak ditemukan")
+    
+    # Get secondary data
+    total_added_trees = 0
+    delta = StatsDelta()
+    merged_lokasi_list = list(primary.get("lokasi_list", []))
+    
+    # If primary has single lokasi, convert to list
+    if not merged_lokasi_list and primary.get("lokasi_tanam"):
+        merged_lokasi_list.append({
+            "lokasi_tanam": primary.get("lokasi_tanam"),
+            "titik_lokasi": primary.get("titik_lokasi"),
+            "bukti_url": primary.get("bukti_url")
+        })
+    
+    for sec_id in request.secondary_ids:
+        secondary = await db.partisipasi.find_one({"id": sec_id}, {"_id": 0})
+        if secondary:
+            # Add trees
+            total_added_trees += secondary.get("jumlah_pohon", 0)
+            delta.add(secondary.get("opd_id"), -(secondary.get("jumlah_pohon") or 0), -1)
+            delta.add(primary.get("opd_id"), secondary.get("jumlah_pohon") or 0)
+            
+            # Merge lokasi_list
+            sec_lokasi_list = secondary.get("lokasi_list", [])
+            if sec_lokasi_list:
+                merged_lokasi_list.extend(sec_lokasi_list)
+            elif secondary.get("lokasi_tanam"):
+                merged_lokasi_list.append({
+                    "lokasi_tanam": secondary.get("lokasi_tanam"),
+                    "titik_lokasi": secondary.get("titik_lokasi"),
+                    "bukti_url": secondary.get("bukti_url")
+                })
+            
+            # Delete secondary
+            await db.partisipasi.delete_one({"id": sec_id})
+    
+    # Update primary with merged data
+    new_total_trees = primary.get("jumlah_pohon", 0) + total_added_trees
+    
+    await db.partisipasi.update_one(
+        {"id": request.primary_id},
+        {
+            "$set": {
+                "jumlah_pohon": new_total_trees,
+                "lokasi_list": merged_lokasi_list
+            }
+        }
+    )
+    await counters.apply(delta)
+    broadcaster.publish(delta, "merged")
+    
+    return {
+        "success": True,
+        "primary_id": request.primary_id,
+        "merged_count": len(request.secondary_ids),
+        "new_total_trees": new_total_trees,
+        "total_locations": len(merged_lokasi_list),
+        "message": f"Berhasil menggabungkan {len(request.secondary_ids)} data ke data primer"
+    }
@@ -0,0 +1,174 @@
+"""
+OPD (organisasi perangkat daerah) CRUD and Excel import.
+"""
+import uuid
+from datetime import datetime, timezone
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from starlette.concurrency import run_in_threadpool
+
+from auth import get_current_user
+from config import IMPORT_MAX_BYTES
+from crud import set_update, update_by_id, update_fields
+from database import get_db, get_read_db
+from lazy_modules import load_heavy
+from models import OPDCreate, OPDUpdate, OPDResponse
+from opd_directory import (
+    DENORMALIZED_FIELDS, OPDDirectory, fan_out_opd_fields, get_opd_directory, normalize_name,
+)
+from progress import REFRESH_RATIO, ProgressSummaryCache, get_progress_summary
+from uploads import EXCEL, multipart_openapi, read_upload
+
+router = APIRouter()
+
+# ============== OPD ENDPOINTS ==============
+
+@router.get("/opd", response_model=List[OPDResponse])
+async def get_all_opd(db: AsyncIOMotorDatabase = Depends(get_read_db)):
+    opd_list = await db.opd.find({}, {"_id": 0}).to_list(1000)
+    return opd_list
+
+@router.get("/opd/{opd_id}", response_model=OPDResponse)
+async def get_opd(opd_id: str, db: AsyncIOMotorDatabase = Depends(get_read_db)):
+    opd = await db.opd.find_one({"id": opd_id}, {"_id": 0})
+    if not opd:
+        raise HTTPException(status_code=404, detail="OPD tidak ditemukan")
+    return opd
+
+@router.post("/opd", response_model=OPDResponse)
+async def create_opd(
+    opd: OPDCreate,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    progress_summary: ProgressSummaryCache = Depends(get_progress_summary),
+    directory: OPDDirectory = Depends(get_opd_directory)
+):
+    opd_id = str(uuid.uuid4())
+    opd_doc = {
+        "id": opd_id,
+        "nama": opd.nama,
+        "kode": opd.kode,
+        "alamat": opd.alamat,
+        "jumlah_personil": opd.jumlah_personil or 0,
+        "kategori": opd.kategori or "OPD",
+        "pohon_tertanam": 0,
+        "progress_rasio": 0,
+        "created_at": datetime.now(timezone.utc)
+    }
+    await db.opd.insert_one(opd_doc)
+    progress_summary.invalidate()
+    directory.bump()
+    return {**opd_doc}
+
+@router.put("/opd/{opd_id}", response_model=OPDResponse)
+async def update_opd(
+    opd_id: str,
+    opd: OPDUpdate,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    progress_summary: ProgressSummaryCache = Depends(get_progress_summary),
+    directory: OPDDirectory = Depends(get_opd_directory)
+):
+    update_data = update_fields(opd)
+    # Personil berubah: progress_rasio dihitung ulang dalam update yang sama
+    pipeline = REFRESH_RATIO if "jumlah_personil" in update_data else None
+    updated = await update_by_id(db.opd, opd_id, set_update(update_data, pipeline), "OPD tidak ditemukan")
+    progress_summary.invalidate()
+    directory.bump()
+    if DENORMALIZED_FIELDS & update_data.keys():
+        # Salinan nama/kategori di dokumen partisipasi ikut diperbarui (satu update_many)
+        await fan_out_opd_fields(db, opd_id, updated)
+    return updated
+
+@router.delete("/opd/{opd_id}")
+async def delete_opd(
+    opd_id: str,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    progress_summary: ProgressSummaryCache = Depends(get_progress_summary),
+    directory: OPDDirectory = Depends(get_opd_directory)
+):
+    result = await db.opd.delete_one({"id": opd_id})
+    if result.deleted_count == 0:
+        raise HTTPException(status_code=404, detail="OPD tidak ditemukan")
+    progress_summary.invalidate()
+    directory.bump()
+    await fan_out_opd_fields(db, opd_id, None)
+    return {"message": "OPD berhasil dihapus"}
+
+@router.post("/opd/import", openapi_extra=multipart_openapi("kategori"))
+async def import_opd_excel(
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    progress_summary: ProgressSummaryCache = Depends(get_progress_summary),
+    directory: OPDDirectory = Depends(get_opd_directory)
+):
+    """Import OPD data from Excel file"""
+    upload = await read_upload(request, EXCEL, IMPORT_MAX_BYTES)
+    kategori = upload.fields.get("kategori")
+    if not kategori:
+        upload.close()
+        raise HTTPException(status_code=400, detail="Kategori wajib diisi")
+    await load_heavy("pandas")
+    import pandas as pd
+    
+    try:
+        # pandas membaca langsung dari file sementara hasil streaming, di thread agar event loop tetap bebas
+        df = await run_in_threadpool(pd.read_excel, upload.file)
+        
+        # Normalize column names (lowercase and strip whitespace)
+        df.columns = df.columns.str.lower().str.strip()
+        
+        # Check for required column 'nama'
+        if 'nama' not in df.columns:
+            raise HTTPException(status_code=400, detail="Kolom 'Nama' wajib ada dalam file Excel")
+        
+        imported_count = 0
+        skipped_count = 0
+        imported_names = set()  # nama yang sudah ditambahkan dari file ini
+        directory.bump()  # OPD dari worker lain harus terlihat sebelum cek duplikat
+        
+        for _, row in df.iterrows():
+            nama = str(row.get('nama', '')).strip()
+            if not nama or nama == 'nan':
+                skipped_count += 1
+                continue
+                
+            # Duplikat = nama sama dalam kategori yang sama, tanpa membedakan huruf besar/kecil dan spasi
+            # ("Dinas X" == "dinas  x"), sama seperti pencocokan nama OPD pada import partisipasi
+            if normalize_name(nama) in imported_names or await directory.id_for_name(nama, kategori):
+                skipped_count += 1
+                continue
+            
+            opd_doc = {
+                "id": str(uuid.uuid4()),
+                "nama": nama,
+                "kode": str(row.get('kode', '')).strip() if pd.notna(row.get('kode')) else '',
+                "alamat": str(row.get('alamat', '')).strip() if pd.notna(row.get('alamat')) else '',
+                "jumlah_personil": int(row.get('jumlah_personil', 0)) if pd.notna(row.get('jumlah_personil')) else 0,
+                "kategori": kategori,
+                "pohon_tertanam": 0,
+                "progress_rasio": 0,
+                "created_at": datetime.now(timezone.utc)
+            }
+            
+            await db.opd.insert_one(opd_doc)
+            imported_names.add(normalize_name(nama))
+            imported_count += 1
+        
+        if imported_count:
+            progress_summary.invalidate()
+            directory.bump()
+        return {
+            "message": f"Import berhasil! {imported_count} data ditambahkan, {skipped_count} data dilewati (duplikat/kosong)",
+            "imported": imported_count,
+            "skipped": skipped_count
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Gagal import: {str(e)}")
+    finally:
+        upload.close()
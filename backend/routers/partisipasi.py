@@ -0,0 +1,262 @@
+"""
+Public participation submissions and their admin management.
+"""
+import uuid
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pydantic import ValidationError
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+
+from auth import get_current_user
+from crud import update_by_id, update_fields
+from database import get_db
+from dates import date_range_query
+from live_stats import StatsBroadcaster, StatsDelta, get_stats_broadcaster
+from progress import OPDCounterSync, get_opd_counters
+from models import (
+    PartisipasiCreate, PartisipasiUpdate, PartisipasiResponse,
+    PartisipasiBatchCreate, PartisipasiBatchResult, PartisipasiBatchResponse,
+)
+from opd_directory import OPDDirectory, get_opd_directory, opd_fields
+from resumable_uploads import ResumableUploadStore, get_resumable_uploads, upload_ref_id
+
+router = APIRouter()
+
+# ============== PARTISIPASI ENDPOINTS ==============
+
+@router.get("/partisipasi", response_model=List[PartisipasiResponse])
+async def get_all_partisipasi(
+    date_from: Optional[str] = Query(None, alias="from"),
+    date_to: Optional[str] = Query(None, alias="to"),
+    kategori: Optional[str] = None,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    directory: OPDDirectory = Depends(get_opd_directory)
+):
+    """
+    `from`/`to`: tanggal lokal (YYYY-MM-DD, inklusif) atau timestamp ISO pada created_at.
+    `kategori`: kategori OPD (disalin ke dokumen partisipasi).
+    """
+    query = date_range_query("created_at", date_from, date_to)
+    if kategori:
+        query["kategori"] = kategori
+    partisipasi_list = await db.partisipasi.find(query, {"_id": 0}).to_list(10000)
+    # opd_nama tersimpan di dokumen; hanya data lama yang belum di-backfill memakai direktori
+    return await directory.fill_opd_nama(partisipasi_list)
+
+@router.get("/partisipasi/{partisipasi_id}", response_model=PartisipasiResponse)
+async def get_partisipasi(
+    partisipasi_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    directory: OPDDirectory = Depends(get_opd_directory)
+):
+    p = await db.partisipasi.find_one({"id": partisipasi_id}, {"_id": 0})
+    if not p:
+        raise HTTPException(status_code=404, detail="Partisipasi tidak ditemukan")
+    return (await directory.fill_opd_nama([p]))[0]
+
+def new_partisipasi_doc(data: PartisipasiCreate, opd: dict) -> dict:
+    """The stored participant document for a submission to an existing OPD."""
+    partisipasi_id = str(uuid.uuid4())
+    
+    # Handle lokasi_list (array of locations)
+    lokasi_list = []
+    if data.lokasi_list and len(data.lokasi_list) > 0:
+        # Use lokasi_list array
+        for loc in data.lokasi_list:
+            lokasi_list.append({
+                "lokasi_tanam": loc.lokasi_tanam,
+                "titik_lokasi": loc.titik_lokasi,
+                "bukti_url": loc.bukti_url
+            })
+        # Set primary lokasi from first item for backward compatibility
+        primary_lokasi = data.lokasi_list[0]
+        lokasi_tanam = primary_lokasi.lokasi_tanam
+        titik_lokasi = primary_lokasi.titik_lokasi
+        bukti_url = primary_lokasi.bukti_url
+    else:
+        # Single lokasi (backward compatible)
+        lokasi_tanam = data.lokasi_tanam or ""
+        titik_lokasi = data.titik_lokasi
+        bukti_url = data.bukti_url
+        if lokasi_tanam:
+            lokasi_list.append({
+                "lokasi_tanam": lokasi_tanam,
+                "titik_lokasi": titik_lokasi,
+                "bukti_url": bukti_url
+            })
+    
+    return {
+        "id": partisipasi_id,
+        "email": data.email,
+        "nama_lengkap": data.nama_lengkap,
+        "nip": data.nip,
+        "opd_id": data.opd_id,
+        **opd_fields(opd),
+        "alamat": data.alamat,
+        "nomor_whatsapp": data.nomor_whatsapp,
+        "jumlah_pohon": data.jumlah_pohon,
+        "jenis_pohon": data.jenis_pohon,
+        "sumber_bibit": data.sumber_bibit,
+        "lokasi_tanam": lokasi_tanam,
+        "titik_lokasi": titik_lokasi,
+        "bukti_url": bukti_url,
+        "lokasi_list": lokasi_list,
+        "status": "pending",
+        "created_at": datetime.now(timezone.utc)
+    }
+
+async def resolve_bukti(data: PartisipasiCreate, uploads: ResumableUploadStore) -> List[str]:
+    """Replace resumable upload references in bukti_url with the photo; returns the upload ids used."""
+    used = []
+    for holder in [data, *(data.lokasi_list or [])]:
+        upload_id = upload_ref_id(holder.bukti_url)
+        if upload_id:
+            holder.bukti_url = await uploads.resolve(holder.bukti_url)
+            used.append(upload_id)
+    return used
+
+@router.post("/partisipasi", response_model=PartisipasiResponse)
+async def create_partisipasi(
+    data: PartisipasiCreate,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    broadcaster: StatsBroadcaster = Depends(get_stats_broadcaster),
+    counters: OPDCounterSync = Depends(get_opd_counters),
+    directory: OPDDirectory = Depends(get_opd_directory),
+    uploads: ResumableUploadStore = Depends(get_resumable_uploads)
+):
+    # Verify OPD exists
+    opd = await directory.get(data.opd_id, reload_on_miss=True)
+    if not opd:
+        raise HTTPException(status_code=400, detail="OPD tidak ditemukan")
+    
+    used_uploads = await resolve_bukti(data, uploads)
+    doc = new_partisipasi_doc(data, opd)
+    await db.partisipasi.insert_one(doc)
+    for upload_id in used_uploads:
+        uploads.delete(upload_id)
+    delta = StatsDelta()
+    delta.add(data.opd_id, data.jumlah_pohon, 1)
+    await counters.apply(delta)
+    broadcaster.publish(delta, "created")
+    return doc
+
+@router.post("/partisipasi/batch", response_model=PartisipasiBatchResponse)
+async def create_partisipasi_batch(
+    data: PartisipasiBatchCreate,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    broadcaster: StatsBroadcaster = Depends(get_stats_broadcaster),
+    counters: OPDCounterSync = Depends(get_opd_counters),
+    directory: OPDDirectory = Depends(get_opd_directory),
+    uploads: ResumableUploadStore = Depends(get_resumable_uploads)
+):
+    """
+    Many submissions in one request (offline entry by village coordinators).
+    Each item is validated on its own; valid items are stored with one
+    unordered insert_many; invalid items and rows the insert rejected are
+    reported per index, and only stored rows are counted.
+    """
+    if not data.items:
+        raise HTTPException(status_code=400, detail="Tidak ada data partisipasi")
+
+    results = [PartisipasiBatchResult(index=i) for i in range(len(data.items))]
+    valid = []
+    for i, item in enumerate(data.items):
+        try:
+            valid.append((i, PartisipasiCreate.model_validate(item)))
+        except ValidationError as e:
+            results[i].error = "; ".join(
+                f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()
+            )
+
+    # Setiap OPD cukup dicari sekali dari direktori
+    opds = {opd_id: await directory.get(opd_id, reload_on_miss=True) for opd_id in {p.opd_id for _, p in valid}}
+    pending = []
+    for i, item in valid:
+        opd = opds[item.opd_id]
+        if not opd:
+            results[i].error = "OPD tidak ditemukan"
+            continue
+        try:
+            used_uploads = await resolve_bukti(item, uploads)
+        except HTTPException as e:
+            results[i].error = e.detail
+            continue
+        pending.append((i, item, new_partisipasi_doc(item, opd), used_uploads))
+
+    failed = set()
+    if pending:
+        try:
+            await db.partisipasi.insert_many([doc for _, _, doc, _ in pending], ordered=False)
+        except BulkWriteError as e:
+            # ordered=False: dokumen lain tetap tersimpan; index error = posisi di daftar yang dikirim
+            failed = {err["index"] for err in e.details.get("writeErrors", [])}
+
+    delta = StatsDelta()
+    created = 0
+    for position, (i, item, doc, used_uploads) in enumerate(pending):
+        if position in failed:
+            results[i].error = "Gagal menyimpan data"
+            continue
+        for upload_id in used_uploads:
+            uploads.delete(upload_id)
+        results[i].id = doc["id"]
+        delta.add(item.opd_id, item.jumlah_pohon, 1)
+        created += 1
+
+    if created:
+        await counters.apply(delta)
+        broadcaster.publish(delta, "created")
+    return {"created": created, "results": results}
+
+@router.put("/partisipasi/{partisipasi_id}", response_model=PartisipasiResponse)
+async def update_partisipasi(
+    partisipasi_id: str,
+    data: PartisipasiUpdate,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    broadcaster: StatsBroadcaster = Depends(get_stats_broadcaster),
+    counters: OPDCounterSync = Depends(get_opd_counters),
+    directory: OPDDirectory = Depends(get_opd_directory)
+):
+    update_data = update_fields(data)
+    if "opd_id" in update_data:
+        opd = await directory.get(update_data["opd_id"], reload_on_miss=True)
+        if not opd:
+            raise HTTPException(status_code=400, detail="OPD tidak ditemukan")
+        update_data.update(opd_fields(opd))
+    
+    # Dokumen sebelum update untuk delta statistik; dokumen sesudahnya = sebelum + $set (field top-level)
+    before = await update_by_id(
+        db.partisipasi, partisipasi_id, {"$set": update_data}, "Partisipasi tidak ditemukan",
+        return_document=ReturnDocument.BEFORE
+    )
+    updated = {**before, **update_data}
+    delta = StatsDelta()
+    delta.add(before.get("opd_id"), -(before.get("jumlah_pohon") or 0), -1)
+    delta.add(updated.get("opd_id"), updated.get("jumlah_pohon") or 0, 1)
+    await counters.apply(delta)
+    broadcaster.publish(delta, "updated")
+    return (await directory.fill_opd_nama([updated]))[0]
+
+@router.delete("/partisipasi/{partisipasi_id}")
+async def delete_partisipasi(
+    partisipasi_id: str,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    broadcaster: StatsBroadcaster = Depends(get_stats_broadcaster),
+    counters: OPDCounterSync = Depends(get_opd_counters)
+):
+    deleted = await db.partisipasi.find_one_and_delete(
+        {"id": partisipasi_id}, projection={"_id": 0, "opd_id": 1, "jumlah_pohon": 1}
+    )
+    if deleted is None:
+        raise HTTPException(status_code=404, detail="Partisipasi tidak ditemukan")
+    delta = StatsDelta()
+    delta.add(deleted.get("opd_id"), -(deleted.get("jumlah_pohon") or 0), -1)
+    await counters.apply(delta)
+    broadcaster.publish(delta, "deleted")
+    return {"message": "Partisipasi berhasil dihapus"}
@@ -0,0 +1,584 @@
+"""
+Statistics, progress per OPD, the participant exports (Excel, CSV, NDJSON, Parquet, PDF) and the Excel import.
+"""
+import io
+import uuid
+from datetime import date, datetime, timezone, timedelta
+from itertools import islice
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from starlette.concurrency import run_in_threadpool
+
+from agenda_schedule import AGENDA_TZ
+from auth import get_current_user
+from config import IMPORT_MAX_BYTES, TIMESERIES_MAX_DAYS
+from database import get_db, get_read_db
+from exports import (
+    EXPORT_PROJECTION, PARQUET_TABLES, csv_chunks, export_headers, export_query, export_row, file_chunks,
+    max_lokasi, ndjson_chunks, parquet_file,
+)
+from lazy_modules import load_heavy
+from live_stats import StatsBroadcaster, StatsDelta, get_stats_broadcaster
+from opd_directory import UNKNOWN_OPD, OPDDirectory, get_opd_directory, opd_fields
+from pagination import MAX_PAGE_LIMIT
+from progress import (
+    DEFAULT_KATEGORI, OPDCounterSync, ProgressSummaryCache, get_opd_counters, get_progress_summary, kategori_query,
+)
+from settings_store import DEFAULT_SETTINGS, SettingsCache, get_settings_cache
+from timeseries import GRANULARITIES, load_timeseries
+from uploads import EXCEL, multipart_openapi, read_upload
+
+router = APIRouter()
+
+# ============== STATS ENDPOINTS ==============
+
+@router.get("/stats")
+async def get_stats(
+    db: AsyncIOMotorDatabase = Depends(get_read_db),
+    directory: OPDDirectory = Depends(get_opd_directory)
+):
+    total_pohon = 0
+    total_partisipan = 0
+    
+    # Ambil SEMUA data partisipasi (tidak filter by status)
+    partisipasi_list = await db.partisipasi.find({}, {"_id": 0}).to_list(10000)
+    total_partisipan = len(partisipasi_list)
+    total_pohon = sum(p.get("jumlah_pohon", 0) for p in partisipasi_list)
+    
+    # Stats per OPD
+    opd_stats = {}
+    for p in partisipasi_list:
+        opd_id = p.get("opd_id")
+        if opd_id not in opd_stats:
+            opd_stats[opd_id] = {"jumlah_pohon": 0, "jumlah_partisipan": 0}
+        opd_stats[opd_id]["jumlah_pohon"] += p.get("jumlah_pohon", 0)
+        opd_stats[opd_id]["jumlah_partisipan"] += 1
+    
+    # Enrich with OPD names
+    opd_map = await directory.names()
+    
+    opd_stats_list = []
+    for opd_id, stats in opd_stats.items():
+        opd_stats_list.append({
+            "opd_id": opd_id,
+            "opd_nama": opd_map.get(opd_id, UNKNOWN_OPD),
+            "jumlah_pohon": stats["jumlah_pohon"],
+            "jumlah_partisipan": stats["jumlah_partisipan"]
+        })
+    
+    # Stats per jenis pohon
+    jenis_pohon_stats = {}
+    for p in partisipasi_list:
+        jenis = p.get("jenis_pohon", "Lainnya")
+        if jenis not in jenis_pohon_stats:
+            jenis_pohon_stats[jenis] = 0
+        jenis_pohon_stats[jenis] += p.get("jumlah_pohon", 0)
+    
+    jenis_pohon_list = [{"jenis": k, "jumlah": v} for k, v in jenis_pohon_stats.items()]
+    
+    # Lokasi tanam stats - hitung dari lokasi_list atau single lokasi
+    # Perhatian: Satu partisipan dengan multiple lokasi tetap dihitung sebagai 1 orang per partisipan
+    lokasi_stats = {}
+    lokasi_partisipan_ids = {}  # Track partisipan IDs per lokasi untuk mencegah double counting
+    total_lokasi = 0
+    
+    for p in partisipasi_list:
+        partisipan_id = p.get("id", str(id(p)))  # Unique identifier untuk partisipan ini
+        
+        # Prioritaskan lokasi_list jika ada
+        lokasi_list = p.get("lokasi_list", [])
+        if lokasi_list and len(lokasi_list) > 0:
+            num_lokasi = len(lokasi_list)
+            pohon_per_lokasi = p.get("jumlah_pohon", 0) // num_lokasi if num_lokasi > 0 else 0
+            
+            for loc in lokasi_list:
+                lokasi = loc.get("lokasi_tanam", "Tidak diketahui")
+                if lokasi and lokasi.strip():
+                    if lokasi not in lokasi_stats:
+                        lokasi_stats[lokasi] = {"jumlah_pohon": 0, "jumlah_partisipan": 0}
+                        lokasi_partisipan_ids[lokasi] = set()
+                    
+                    # Tambah pohon
+                    lokasi_stats[lokasi]["jumlah_pohon"] += pohon_per_lokasi
+                    total_lokasi += 1
+                    
+                    # Hanya tambah partisipan jika belum dihitung untuk lokasi ini
+                    if partisipan_id not in lokasi_partisipan_ids[lokasi]:
+                        lokasi_stats[lokasi]["jumlah_partisipan"] += 1
+                        lokasi_partisipan_ids[lokasi].add(partisipan_id)
+        else:
+            # Fallback ke single lokasi
+            lokasi = p.get("lokasi_tanam", "Tidak diketahui")
+            if lokasi and lokasi.strip():
+                if lokasi not in lokasi_stats:
+                    lokasi_stats[lokasi] = {"jumlah_pohon": 0, "jumlah_partisipan": 0}
+                    lokasi_partisipan_ids[lokasi] = set()
+                
+                lokasi_stats[lokasi]["jumlah_pohon"] += p.get("jumlah_pohon", 0)
+                total_lokasi += 1
+                
+                # Hanya tambah partisipan jika belum dihitung
+                if partisipan_id not in lokasi_partisipan_ids[lokasi]:
+                    lokasi_stats[lokasi]["jumlah_partisipan"] += 1
+                    lokasi_partisipan_ids[lokasi].add(partisipan_id)
+    
+    lokasi_list_result = [{"lokasi": k, **v} for k, v in lokasi_stats.items()]
+    
+    return {
+        "total_pohon": total_pohon,
+        "total_partisipan": total_partisipan,
+        "total_opd": len(opd_map),
+        "total_lokasi": total_lokasi,
+        "opd_stats": sorted(opd_stats_list, key=lambda x: x["jumlah_pohon"], reverse=True),
+        "jenis_pohon_stats": sorted(jenis_pohon_list, key=lambda x: x["jumlah"], reverse=True),
+        "lokasi_stats": sorted(lokasi_list_result, key=lambda x: x["jumlah_pohon"], reverse=True)
+    }
+
+@router.get("/stats/stream")
+async def stream_stats(
+    request: Request,
+    db: AsyncIOMotorDatabase = Depends(get_read_db),
+    broadcaster: StatsBroadcaster = Depends(get_stats_broadcaster)
+):
+    """Server-Sent Events: snapshot total pohon/partisipan, lalu delta setiap ada perubahan partisipasi"""
+    return StreamingResponse(
+        broadcaster.stream(request, db),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def parse_local_date(value: Optional[str], default: date) -> date:
+    if not value:
+        return default
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Format tanggal harus YYYY-MM-DD")
+
+@router.get("/stats/timeseries")
+async def get_stats_timeseries(
+    from_: Optional[str] = Query(None, alias="from"),
+    to: Optional[str] = None,
+    granularity: str = "day",
+    opd_id: Optional[str] = None,
+    jenis_pohon: Optional[str] = None,
+    db: AsyncIOMotorDatabase = Depends(get_read_db)
+):
+    """Tren pohon/partisipan per hari, minggu atau bulan (tanggal lokal WITA, default 30 hari terakhir)"""
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity harus salah satu dari: {', '.join(GRANULARITIES)}")
+    end = parse_local_date(to, datetime.now(AGENDA_TZ).date())
+    start = parse_local_date(from_, end - timedelta(days=29))
+    if start > end:
+        raise HTTPException(status_code=400, detail="Tanggal 'from' harus sebelum 'to'")
+    if (end - start).days >= TIMESERIES_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Rentang maksimum {TIMESERIES_MAX_DAYS} hari")
+    return await load_timeseries(db, start, end, granularity, opd_id=opd_id, jenis_pohon=jenis_pohon)
+
+@router.get("/progress")
+async def get_progress(
+    kategori: Optional[str] = None,
+    limit: int = Query(MAX_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
+    db: AsyncIOMotorDatabase = Depends(get_read_db),
+    settings_cache: SettingsCache = Depends(get_settings_cache),
+    progress_summary: ProgressSummaryCache = Depends(get_progress_summary)
+):
+    """Progress per OPD: target = pohon_per_orang (settings, default 10) × personil, terurut dari progress tertinggi"""
+    settings = await settings_cache.get()
+    pohon_per_orang = settings.get("pohon_per_orang") or DEFAULT_SETTINGS["pohon_per_orang"]
+    
+    opd_list = await db.opd.find(
+        kategori_query(kategori),
+        {"_id": 0, "id": 1, "nama": 1, "kategori": 1, "jumlah_personil": 1, "pohon_tertanam": 1}
+    ).sort([("progress_rasio", -1), ("id", 1)]).limit(limit).to_list(limit)
+    
+    progress_list = []
+    for opd in opd_list:
+        jumlah_personil = opd.get("jumlah_personil", 0) or 0
+        target = jumlah_personil * pohon_per_orang
+        planted = opd.get("pohon_tertanam", 0) or 0
+        progress_pct = round((planted / target * 100), 1) if target > 0 else 0
+        progress_list.append({
+            "opd_id": opd["id"],
+            "opd_nama": opd["nama"],
+            "kategori": opd.get("kategori") or DEFAULT_KATEGORI,
+            "jumlah_personil": jumlah_personil,
+            "target_pohon": target,
+            "pohon_tertanam": planted,
+            "progress_persen": min(progress_pct, 100)  # Cap at 100%
+        })
+    
+    summary = await progress_summary.get(kategori)
+    total_target = summary["total_personil"] * pohon_per_orang
+    overall_progress = round((summary["total_tertanam"] / total_target * 100), 1) if total_target > 0 else 0
+    
+    return {
+        "progress_list": progress_list,
+        "summary": {
+            "total_personil": summary["total_personil"],
+            "total_target": total_target,
+            "total_tertanam": summary["total_tertanam"],
+            "overall_progress": min(overall_progress, 100)
+        }
+    }
+
+# ============== EXPORT ENDPOINTS ==============
+
+@router.get("/export/excel")
+async def export_excel(
+    current_user: dict = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    directory: OPDDirectory = Depends(get_opd_directory)
+):
+    await load_heavy("excel")
+    from openpyxl import Workbook
+    partisipasi_list = await directory.fill_opd_nama(
+        await db.partisipasi.find({}, EXPORT_PROJECTION).to_list(10000)
+    )
+    
+    # Tentukan jumlah maksimum lokasi
+    lokasi_count = max([len(p.get("lokasi_list", [])) for p in partisipasi_list] + [1])
+    
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Data Partisipasi"
+    
+    # Header yang sesuai dengan format import
+    # Format: Nama, NIP, Alamat, No. WhatsApp, OPD, Jumlah Pohon, Jenis Pohon, Sumber Bibit, Lokasi Tanam 1, Latitude 1, Longitude 1, ...
+    ws.append(export_headers(lokasi_count))
+    for p in partisipasi_list:
+        ws.append(export_row(p, lokasi_count))
+    
+    output = io.BytesIO()
+    wb.save(output)
+    output.seek(0)
+    
+    return StreamingResponse(
+        output,
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        headers={"Content-Disposition": "attachment; filename=data_partisipasi_agro_mopomulo.xlsx"}
+    )
+
+@router.get("/export/csv")
+async def export_csv(
+    opd_id: Optional[str] = None,
+    kategori: Optional[str] = None,
+    status: Optional[str] = None,
+    date_from: Optional[str] = Query(None, alias="from"),
+    date_to: Optional[str] = Query(None, alias="to"),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    directory: OPDDirectory = Depends(get_opd_directory)
+):
+    """Participants as CSV (Excel export columns), streamed from the cursor."""
+    query = export_query(opd_id, kategori, status, date_from, date_to)
+    lokasi_count = await max_lokasi(db, query)
+    return StreamingResponse(
+        csv_chunks(db, query, lokasi_count, await directory.names()),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": "attachment; filename=data_partisipasi_agro_mopomulo.csv"}
+    )
+
+@router.get("/export/ndjson")
+async def export_ndjson(
+    opd_id: Optional[str] = None,
+    kategori: Optional[str] = None,
+    status: Optional[str] = None,
+    date_from: Optional[str] = Query(None, alias="from"),
+    date_to: Optional[str] = Query(None, alias="to"),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    directory: OPDDirectory = Depends(get_opd_directory)
+):
+    """One JSON object per participant, keyed by the CSV column names."""
+    query = export_query(opd_id, kategori, status, date_from, date_to)
+    lokasi_count = await max_lokasi(db, query)
+    return StreamingResponse(
+        ndjson_chunks(db, query, lokasi_count, await directory.names()),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=data_partisipasi_agro_mopomulo.ndjson"}
+    )
+
+@router.get("/export/parquet")
+async def export_parquet(
+    table: str = "partisipasi",
+    opd_id: Optional[str] = None,
+    kategori: Optional[str] = None,
+    status: Optional[str] = None,
+    date_from: Optional[str] = Query(None, alias="from"),
+    date_to: Optional[str] = Query(None, alias="to"),
+    current_user: dict = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    directory: OPDDirectory = Depends(get_opd_directory)
+):
+    """Typed, zstd-compressed Parquet: one row per participant, or per lokasi with table=lokasi."""
+    if table not in PARQUET_TABLES:
+        raise HTTPException(status_code=400, detail=f"table harus salah satu dari: {', '.join(PARQUET_TABLES)}")
+    query = export_query(opd_id, kategori, status, date_from, date_to)
+    await load_heavy("parquet")
+    output = await parquet_file(db, query, table, await directory.names())
+    filename = "data_partisipasi_agro_mopomulo" if table == "partisipasi" else "data_lokasi_agro_mopomulo"
+    return StreamingResponse(
+        file_chunks(output),
+        media_type="application/vnd.apache.parquet",
+        headers={"Content-Disposition": f"attachment; filename={filename}.parquet"}
+    )
+
+@router.get("/export/pdf")
+async def export_pdf(
+    current_user: dict = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    directory: OPDDirectory = Depends(get_opd_directory)
+):
+    await load_heavy("pdf")
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    partisipasi_list = await directory.fill_opd_nama(await db.partisipasi.find({}, {"_id": 0}).to_list(10000))
+    
+    # Tentukan jumlah maksimum lokasi (batasi 3 untuk PDF agar tidak terlalu lebar)
+    max_lokasi = 1
+    for p in partisipasi_list[:100]:
+        lokasi_list = p.get("lokasi_list", [])
+        if len(lokasi_list) > max_lokasi:
+            max_lokasi = min(len(lokasi_list), 3)  # Batasi max 3 kolom lokasi untuk PDF
+    
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=landscape(A4), rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=30)
+    
+    elements = []
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle('CustomTitle', parent=styles['Heading1'], fontSize=16, spaceAfter=20, alignment=1)
+    
+    elements.append(Paragraph("Laporan Data Partisipasi Program Agro Mopomulo", title_style))
+    elements.append(Paragraph(f"Kabupaten Gorontalo Utara - {datetime.now().strftime('%d %B %Y')}", styles['Normal']))
+    elements.append(Spacer(1, 20))
+    
+    # Header dinamis
+    headers = ["No", "Nama", "NIP", "OPD", "Pohon", "Jenis"]
+    for i in range(1, max_lokasi + 1):
+        if max_lokasi == 1:
+            headers.append("Lokasi")
+        else:
+            headers.append(f"Lokasi {i}")
+    
+    data = [headers]
+    
+    for idx, p in enumerate(partisipasi_list[:100], 1):
+        row = [
+            str(idx),
+            (p.get("nama_lengkap") or "")[:20],
+            (p.get("nip") or "")[:15],
+            (p.get("opd_nama") or "")[:15],
+            str(p.get("jumlah_pohon", 0)),
+            (p.get("jenis_pohon") or "")[:12],
+        ]
+        
+        # Tambahkan data lokasi
+        lokasi_list = p.get("lokasi_list", [])
+        if not lokasi_list and p.get("lokasi_tanam"):
+            lokasi_list = [{"lokasi_tanam": p.get("lokasi_tanam", "")}]
+        
+        for i in range(max_lokasi):
+            if i < len(lokasi_list):
+                loc = lokasi_list[i]
+                row.append((loc.get("lokasi_tanam") or "")[:15])
+            else:
+                row.append("")
+        
+        data.append(row)
+    
+    table = Table(data, repeatRows=1)
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.Color(0.02, 0.59, 0.41)),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 9),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('TEXTCOLOR', (0, 1), (-1, -1), colors.black),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 7),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ]))
+    
+    elements.append(table)
+    doc.build(elements)
+    
+    buffer.seek(0)
+    return StreamingResponse(
+        buffer,
+        media_type="application/pdf",
+        headers={"Content-Disposition": "attachment; filename=laporan_agro_mopomulo.pdf"}
+    )
+
+# ============== IMPORT ENDPOINTS ==============
+
+IMPORT_ROW_BATCH = 200
+
+async def workbook_rows(ws):
+    """Data rows of a read-only sheet; the XML is parsed in a thread, a batch at a time."""
+    rows = ws.iter_rows(min_row=2, values_only=True)
+    while True:
+        batch = await run_in_threadpool(lambda: list(islice(rows, IMPORT_ROW_BATCH)))
+        if not batch:
+            return
+        for row in batch:
+            yield row
+
+@router.post("/import/excel", openapi_extra=multipart_openapi())
+async def import_excel(
+    request: Request,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    broadcaster: StatsBroadcaster = Depends(get_stats_broadcaster),
+    counters: OPDCounterSync = Depends(get_opd_counters),
+    directory: OPDDirectory = Depends(get_opd_directory)
+):
+    upload = await read_upload(request, EXCEL, IMPORT_MAX_BYTES)
+    await load_heavy("excel")
+    from openpyxl import load_workbook
+    try:
+        # read_only: baris dibaca bertahap dari file sementara, tidak dimuat sekaligus
+        wb = await run_in_threadpool(load_workbook, filename=upload.file, read_only=True)
+    except Exception:
+        upload.close()
+        raise HTTPException(status_code=400, detail="File Excel tidak dapat dibaca")
+    ws = wb.active
+    
+    imported = 0
+    errors = []
+    delta = StatsDelta()
+
+    try:
+        # Baca header untuk menentukan format
+        header_cells = await run_in_threadpool(next, ws.iter_rows(min_row=1, max_row=1, values_only=True), ())
+        header_row = [str(value).lower().strip() if value else "" for value in header_cells]
+
+        row_idx = 1
+        async for row in workbook_rows(ws):
+            row_idx += 1
+            if not row or len(row) < 5:
+                errors.append(f"Baris {row_idx}: Data tidak lengkap")
+                continue
+        
+            # Skip row yang kosong
+            if not any(row):
+                continue
+        
+            try:
+                # Format baru: Nama, NIP, Alamat, No. WhatsApp, OPD, Jumlah Pohon, Jenis Pohon, Sumber Bibit, Lokasi Tanam, Latitude, Longitude
+                # Format lama: Nama, NIP, Email, OPD, Alamat, WA, Jumlah, Jenis, Lokasi
+            
+                # Cek apakah format baru (dengan header "alamat" di posisi 3)
+                is_new_format = "alamat" in header_row and header_row.index("alamat") <= 3 if "alamat" in header_row else False
+            
+                if is_new_format or "latitude" in header_row or "sumber bibit" in header_row:
+                    # Format baru
+                    nama = row[0] if len(row) > 0 else ""
+                    nip = row[1] if len(row) > 1 else ""
+                    alamat = row[2] if len(row) > 2 else ""
+                    wa = row[3] if len(row) > 3 else ""
+                    opd_nama = row[4] if len(row) > 4 else ""
+                    jumlah = row[5] if len(row) > 5 else 0
+                    jenis = row[6] if len(row) > 6 else ""
+                    sumber_bibit = row[7] if len(row) > 7 else ""
+                    lokasi = row[8] if len(row) > 8 else ""
+                    latitude = row[9] if len(row) > 9 else ""
+                    longitude = row[10] if len(row) > 10 else ""
+                    email = ""
+                else:
+                    # Format lama: Nama, NIP, Email, OPD, Alamat, WA, Jumlah, Jenis, Lokasi
+                    nama = row[0] if len(row) > 0 else ""
+                    nip = row[1] if len(row) > 1 else ""
+                    email = row[2] if len(row) > 2 else ""
+                    opd_nama = row[3] if len(row) > 3 else ""
+                    alamat = row[4] if len(row) > 4 else ""
+                    wa = row[5] if len(row) > 5 else ""
+                    jumlah = row[6] if len(row) > 6 else 0
+                    jenis = row[7] if len(row) > 7 else ""
+                    lokasi = row[8] if len(row) > 8 else ""
+                    sumber_bibit = ""
+                    latitude = ""
+                    longitude = ""
+            
+                if not nama:
+                    errors.append(f"Baris {row_idx}: Nama tidak boleh kosong")
+                    continue
+            
+                opd_id = await directory.id_for_name(opd_nama) if opd_nama else None
+                if not opd_id:
+                    errors.append(f"Baris {row_idx}: OPD '{opd_nama}' tidak ditemukan")
+                    continue
+            
+                # Parse koordinat
+                titik_lokasi = ""
+                if latitude and longitude:
+                    titik_lokasi = f"{str(latitude).strip()}, {str(longitude).strip()}"
+            
+                # Buat lokasi_list
+                lokasi_list = []
+                if lokasi:
+                    lokasi_list.append({
+                        "lokasi_tanam": str(lokasi).strip(),
+                        "titik_lokasi": titik_lokasi,
+                        "bukti_url": ""
+                    })
+            
+                # Cek apakah ada lokasi tambahan (Lokasi Tanam 2, Latitude 2, Longitude 2, dst)
+                col_idx = 11  # Mulai dari kolom setelah Longitude pertama
+                loc_num = 2
+                while col_idx + 2 < len(row):
+                    lok = row[col_idx] if col_idx < len(row) else ""
+                    lat = row[col_idx + 1] if col_idx + 1 < len(row) else ""
+                    lng = row[col_idx + 2] if col_idx + 2 < len(row) else ""
+                
+                    if lok:
+                        titik = ""
+                        if lat and lng:
+                            titik = f"{str(lat).strip()}, {str(lng).strip()}"
+                        lokasi_list.append({
+                            "lokasi_tanam": str(lok).strip(),
+                            "titik_lokasi": titik,
+                            "bukti_url": ""
+                        })
+                
+                    col_idx += 3
+                    loc_num += 1
+            
+                partisipasi_id = str(uuid.uuid4())
+                doc = {
+                    "id": partisipasi_id,
+                    "email": str(email).strip() if email else "",
+                    "nama_lengkap": str(nama).strip() if nama else "",
+                    "nip": str(nip).strip() if nip else "",
+                    "opd_id": opd_id,
+                    **opd_fields(await directory.get(opd_id)),
+                    "alamat": str(alamat).strip() if alamat else "",
+                    "nomor_whatsapp": str(wa).strip() if wa else "",
+                    "jumlah_pohon": int(jumlah) if jumlah else 0,
+                    "jenis_pohon": str(jenis).strip() if jenis else "",
+                    "sumber_bibit": str(sumber_bibit).strip() if sumber_bibit else "",
+                    "lokasi_tanam": str(lokasi).strip() if lokasi else "",
+                    "titik_lokasi": titik_lokasi,
+                    "lokasi_list": lokasi_list,
+                    "created_at": datetime.now(timezone.utc)
+                }
+                await db.partisipasi.insert_one(doc)
+                imported += 1
+                delta.add(opd_id, doc["jumlah_pohon"], 1)
+            except Exception as e:
+                errors.append(f"Baris {row_idx}: {str(e)}")
+    finally:
+        wb.close()
+        upload.close()
+    
+    await counters.apply(delta)
+    broadcaster.publish(delta, "imported")
+    return {"imported": imported, "errors": errors}
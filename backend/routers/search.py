@@ -0,0 +1,110 @@
+"""
+Full-text search across the public content collections.
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from auth import get_optional_user
+from database import get_read_db
+from pagination import EXCERPT_LENGTH, excerpt_expr
+
+router = APIRouter()
+
+# ============== SEARCH ENDPOINTS ==============
+
+# Setiap halaman mengambil offset + limit + 1 dokumen per koleksi, jadi kedalaman halaman dibatasi
+SEARCH_MAX_PAGE = 10
+
+# type -> sumber pencarian; "admin_only" menjaga data pribadi partisipan dari publik
+SEARCH_SOURCES = {
+    "berita": {
+        "collection": "berita",
+        "title": "judul",
+        "snippet": "deskripsi_singkat",
+        "public_filter": {"is_active": True},
+        "admin_only": False,
+    },
+    "edukasi": {
+        "collection": "edukasi",
+        "title": "judul",
+        "snippet": "konten",
+        "public_filter": {},
+        "admin_only": False,
+    },
+    "agenda": {
+        "collection": "agenda",
+        "title": "nama_kegiatan",
+        "snippet": "lokasi_desa",
+        "public_filter": {},
+        "admin_only": False,
+    },
+    "partisipasi": {
+        "collection": "partisipasi",
+        "title": "nama_lengkap",
+        "snippet": "nip",
+        "public_filter": {},
+        "admin_only": True,
+    },
+}
+
+@router.get("/search")
+async def search(
+    q: str = Query(..., min_length=2, max_length=100),
+    types: Optional[str] = None,
+    page: int = Query(1, ge=1, le=SEARCH_MAX_PAGE),
+    limit: int = Query(20, ge=1, le=50),
+    current_user: Optional[dict] = Depends(get_optional_user),
+    db: AsyncIOMotorDatabase = Depends(get_read_db)
+):
+    """
+    Pencarian teks penuh (MongoDB $text) di berita, edukasi, agenda dan partisipasi.
+    Hasil digabung dan diurutkan berdasarkan skor relevansi.
+    Partisipasi hanya bisa dicari oleh admin.
+    """
+    is_admin = bool(current_user and current_user.get("role") == "admin")
+    allowed = [t for t, src in SEARCH_SOURCES.items() if is_admin or not src["admin_only"]]
+
+    if types:
+        requested = [t.strip() for t in types.split(',') if t.strip()]
+        invalid = [t for t in requested if t not in SEARCH_SOURCES]
+        if invalid:
+            raise HTTPException(status_code=400, detail=f"Tipe tidak dikenal: {', '.join(invalid)}")
+        if any(t not in allowed for t in requested):
+            raise HTTPException(status_code=403, detail="Tidak memiliki akses untuk tipe pencarian ini")
+        allowed = requested
+
+    # Ambil cukup hasil dari setiap koleksi untuk halaman ini, lalu gabungkan berdasarkan skor
+    offset = (page - 1) * limit
+    fetch = offset + limit + 1
+    results = []
+    for search_type in allowed:
+        src = SEARCH_SOURCES[search_type]
+        match = {"$text": {"$search": q}}
+        if not is_admin:
+            match.update(src["public_filter"])
+        pipeline = [
+            {"$match": match},
+            {"$sort": {"score": {"$meta": "textScore"}}},
+            {"$limit": fetch},
+            {"$project": {
+                "_id": 0,
+                "id": 1,
+                "title": f"${src['title']}",
+                "snippet": excerpt_expr(src["snippet"], EXCERPT_LENGTH),
+                "created_at": 1,
+                "score": {"$meta": "textScore"},
+            }},
+        ]
+        docs = await db[src["collection"]].aggregate(pipeline).to_list(fetch)
+        results.extend({"type": search_type, **d} for d in docs)
+
+    results.sort(key=lambda r: r["score"], reverse=True)
+    return {
+        "q": q,
+        "page": page,
+        "limit": limit,
+        "has_more": len(results) > offset + limit,
+        "results": results[offset:offset + limit],
+    }
@@ -0,0 +1,34 @@
+"""
+Health check and Prometheus metrics.
+"""
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+from fastapi.security import HTTPAuthorizationCredentials
+
+import metrics
+from auth import get_optional_user, optional_security
+from config import METRICS_TOKEN
+
+router = APIRouter()
+
+@router.get("/health")
+async def health_check():
+    return {"status": "healthy", "service": "Agro Mopomulo API"}
+
+async def require_metrics_access(credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)):
+    """Metrics are internal: the METRICS_TOKEN bearer token (scraper) or an admin login."""
+    if not credentials:
+        raise HTTPException(status_code=401, detail="Tidak terautentikasi")
+    if METRICS_TOKEN and hmac.compare_digest(credentials.credentials.encode(), METRICS_TOKEN.encode()):
+        return
+    user = await get_optional_user(credentials)
+    if not user or user.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Tidak memiliki akses ke metrics")
+
+@router.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(require_metrics_access)])
+async def get_metrics():
+    """Latency, status, payload, DB round-trip and event-loop lag metrics (Prometheus text format)"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
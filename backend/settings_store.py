@@ -0,0 +1,102 @@
+"""
+Cached singleton for the site settings document.
+"""
+import asyncio
+import time
+from typing import Optional
+
+from fastapi import Request
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from config import SETTINGS_CACHE_TTL
+
+SETTINGS_ID = "site_settings"  # _id tetap: hanya ada satu dokumen settings
+
+DEFAULT_SETTINGS = {
+    "id": SETTINGS_ID,
+    "logo_url": None,
+    "hero_title": "Gerakan Agro Mopomulo",
+    "hero_subtitle": "Satu Orang Sepuluh Pohon untuk Masa Depan Daerah",
+    "hero_image_url": "https://images.unsplash.com/photo-1765333534690-ad3a985e7c42?crop=entropy&cs=srgb&fm=jpg&ixid=M3w3NDQ2NDJ8MHwxfHNlYXJjaHwxfHxsdXNoJTIwZ3JlZW4lMjBmb3Jlc3QlMjBsYW5kc2NhcGUlMjBpbmRvbmVzaWF8ZW58MHx8fHwxNzY4NDQ1ODE1fDA&ixlib=rb-4.1.0&q=85",
+    "tentang_title": "Program Agro Mopomulo",
+    "tentang_content": "Mopomulo berasal dari bahasa Gorontalo yang berarti \"menanam\". Program Agro Mopomulo adalah inisiatif Pemerintah Kabupaten Gorontalo Utara untuk meningkatkan kesadaran dan partisipasi masyarakat dalam pelestarian lingkungan.\n\nDengan konsep \"Satu Orang Sepuluh Pohon\", program ini menargetkan setiap ASN dan warga untuk berkontribusi menanam minimal 10 pohon, baik pohon produktif maupun pohon pelindung.",
+    "tentang_visi": "Mewujudkan Kabupaten Gorontalo Utara sebagai daerah yang hijau, asri, dan berkelanjutan dengan partisipasi aktif seluruh lapisan masyarakat dalam pelestarian lingkungan.",
+    "tentang_misi": "- Meningkatkan kesadaran lingkungan masyarakat\n- Memperluas area hijau di seluruh wilayah\n- Mendukung ketahanan pangan daerah\n- Membangun budaya peduli lingkungan",
+    "berita_popup_interval": 5,
+    "pohon_per_orang": 10  # target progress: jumlah_personil x pohon_per_orang
+}
+
+class SettingsCache:
+    """
+    In-process cache of the settings singleton (_id = SETTINGS_ID).
+    Loaded once, replaced with the document returned by each write, and
+    reloaded after SETTINGS_CACHE_TTL so other workers see admin changes.
+    """
+
+    def __init__(self, database, ttl: int = SETTINGS_CACHE_TTL):
+        self.db = database
+        self.ttl = ttl
+        self.value: Optional[dict] = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def version(self) -> int:
+        return (self.value or {}).get("version", 0)
+
+    def _store(self, doc: dict) -> dict:
+        self.value = doc
+        self._loaded_at = time.monotonic()
+        return doc
+
+    def invalidate(self):
+        self.value = None
+
+    def _fresh(self) -> bool:
+        return self.value is not None and time.monotonic() - self._loaded_at < self.ttl
+
+    async def _seed(self) -> dict:
+        # Migrasi dari dokumen settings lama (id uuid) jika masih ada
+        legacy = await self.db.settings.find_one({"_id": {"$ne": SETTINGS_ID}}, {"_id": 0})
+        return {**DEFAULT_SETTINGS, **(legacy or {}), "id": SETTINGS_ID, "version": 1}
+
+    async def _upsert(self, update: dict) -> dict:
+        try:
+            return await self.db.settings.find_one_and_update(
+                {"_id": SETTINGS_ID}, update, upsert=True,
+                return_document=ReturnDocument.AFTER, projection={"_id": 0}
+            )
+        except DuplicateKeyError:
+            # Upsert bersamaan dari request lain: dokumen sudah ada, ulangi sebagai update biasa
+            return await self.db.settings.find_one_and_update(
+                {"_id": SETTINGS_ID}, update,
+                return_document=ReturnDocument.AFTER, projection={"_id": 0}
+            )
+
+    async def get(self) -> dict:
+        if self._fresh():
+            return self.value
+        async with self._lock:
+            if self._fresh():
+                return self.value
+            doc = await self.db.settings.find_one({"_id": SETTINGS_ID}, {"_id": 0})
+            if doc is None:
+                doc = await self._upsert({"$setOnInsert": await self._seed()})
+            return self._store(doc)
+
+    async def update(self, fields: dict) -> dict:
+        seed = await self._seed() if self.value is None else {**DEFAULT_SETTINGS, "id": SETTINGS_ID}
+        seed.pop("version", None)
+        on_insert = {k: v for k, v in seed.items() if k not in fields}
+        update = {"$set": fields, "$inc": {"version": 1}}
+        if on_insert:
+            update["$setOnInsert"] = on_insert
+        async with self._lock:
+            return self._store(await self._upsert(update))
+
+def settings_etag(version: int) -> str:
+    return f'W/"settings-{version}"'
+
+def get_settings_cache(request: Request) -> SettingsCache:
+    return request.app.state.settings_cache
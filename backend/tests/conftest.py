@@ -0,0 +1,17 @@
+"""
+Shared setup for local (non-HTTP) backend tests.
+config.py reads the environment at import time, so provide safe defaults
+before any test module imports it. Tests build apps with
+create_app(database=...) and never connect to a real mongod.
+"""
+import os
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "agro_mopomulo_test")
+os.environ.setdefault("JWT_SECRET", "test-secret")
@@ -0,0 +1,99 @@
+"""
+Test for admission control on the public write endpoints
+- per-IP token bucket: 429 with Retry-After once the burst is spent, refills over time
+- the global bucket limits all clients together
+- uploads: 413 before the body is read, 429 when the in-flight byte budget is taken
+- resumable PATCH chunks: same byte budget and size limit, rate-limited by volume
+- other routes are never limited
+"""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+from admission import AdmissionController, TokenBucket, route_group
+from app_factory import create_app
+
+PESERTA = {
+    "nama_lengkap": "Peserta", "opd_id": "opd-a", "jumlah_pohon": 1, "jenis_pohon": "Mangga",
+    "sumber_bibit": "Swadaya", "lokasi_tanam": "Kwandang",
+}
+PNG = b"\x89PNG\r\n\x1a\n" + b"0" * 100
+
+
+def limited_app(name, **limits):
+    db = AsyncMongoMockClient()[name]
+    asyncio.run(db.opd.insert_one({"id": "opd-a", "nama": "Dinas A", "kategori": "OPD", "created_at": "2025-01-01"}))
+    now = [1000.0]
+    controller = AdmissionController(clock=lambda: now[0], workers=1, **limits)
+    return create_app(database=db, admission=controller), now
+
+
+def test_token_bucket_refill():
+    bucket = TokenBucket(rate=2, burst=2, now=0)
+    assert bucket.take(0) == 0 and bucket.take(0) == 0
+    assert bucket.take(0) == 0.5
+    assert bucket.take(0.5) == 0
+
+
+def test_per_ip_limit_with_retry_after():
+    app, now = limited_app("agro_admission_ip", ip_per_minute=6, ip_burst=2)
+    with TestClient(app) as client:
+        assert [client.post("/api/partisipasi", json=PESERTA).status_code for _ in range(2)] == [200, 200]
+        res = client.post("/api/partisipasi", json=PESERTA)
+        assert res.status_code == 429
+        assert res.headers["retry-after"] == "10"
+
+        other = client.post("/api/partisipasi", json=PESERTA, headers={"X-Forwarded-For": "10.0.0.2"})
+        assert other.status_code == 429  # header proxy tidak dipercaya tanpa RATE_LIMIT_FORWARDED_HOPS
+        assert client.get("/api/stats").status_code == 200
+
+        now[0] += 10
+        assert client.post("/api/partisipasi", json=PESERTA).status_code == 200
+
+
+def test_global_limit_and_forwarded_ip():
+    app, now = limited_app("agro_admission_global", global_per_second=1, global_burst=3, forwarded_hops=1)
+    with TestClient(app) as client:
+        codes = [
+            client.post("/api/partisipasi", json=PESERTA, headers={"X-Forwarded-For": f"10.0.0.{i}"}).status_code
+            for i in range(4)
+        ]
+        assert codes == [200, 200, 200, 429]
+
+
+def test_upload_size_and_inflight_budget():
+    app, _ = limited_app("agro_admission_upload", upload_max_bytes=1024)
+    with TestClient(app) as client:
+        res = client.post("/api/upload/image", files={"file": ("a.png", PNG, "image/png")})
+        assert res.status_code == 200
+
+        big = client.post("/api/upload/image", files={"file": ("b.png", PNG * 1000, "image/png")})
+        assert big.status_code == 413
+
+        app.state.admission.upload_inflight = app.state.admission.upload_inflight_limit
+        busy = client.post("/api/upload/image", files={"file": ("a.png", PNG, "image/png")})
+        assert busy.status_code == 429 and "retry-after" in busy.headers
+
+
+def test_resumable_chunks_are_admitted_by_volume():
+    assert route_group("PATCH", "/api/upload/resumable/abc") == "upload_chunk"
+    assert route_group("PATCH", "/api/upload/resumable/abc/finalize") is None
+    assert route_group("HEAD", "/api/upload/resumable/abc") is None
+
+    app, _ = limited_app("agro_admission_chunks", upload_max_bytes=1024, ip_burst=2, ip_per_minute=0.001)
+    chunk = {"Content-Type": "application/offset+octet-stream", "Tus-Resumable": "1.0.0"}
+    with TestClient(app) as client:
+        location = client.post("/api/upload/resumable", headers={"Upload-Length": "1024"}).headers["location"]
+        # Empat potongan 256 byte = satu token; token sesi dan potongan terpisah
+        for offset in range(0, 1024, 256):
+            res = client.patch(location, content=b"x" * 256, headers={**chunk, "Upload-Offset": str(offset)})
+            assert res.status_code == 204
+        assert app.state.admission.upload_inflight == 0
+
+        assert client.patch(location, content=b"x" * 4096, headers={**chunk, "Upload-Offset": "0"}).status_code == 413
+
+        app.state.admission.upload_inflight = app.state.admission.upload_inflight_limit
+        busy = client.patch(location, content=b"x", headers={**chunk, "Upload-Offset": "1024"})
+        assert busy.status_code == 429
@@ -0,0 +1,146 @@
+"""
+Test for scheduled agenda status transitions
+- tanggal parsing to local (WITA) midnight
+- AgendaStatusScheduler.run_once driven by a fake clock
+- /api/agenda/upcoming keeps agenda with an unparseable tanggal
+"""
+
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+from agenda_schedule import AgendaStatusScheduler, parse_tanggal, agenda_status_for
+from app_factory import create_app
+
+
+class FakeClock:
+    """Clock that only moves when the test says so"""
+
+    def __init__(self, now: datetime):
+        self.now = now
+
+    def __call__(self) -> datetime:
+        return self.now
+
+    def advance(self, **kwargs):
+        self.now += timedelta(**kwargs)
+
+
+def make_agenda(agenda_id, tanggal, status="upcoming"):
+    return {
+        "id": agenda_id,
+        "nama_kegiatan": f"Penanaman {agenda_id}",
+        "hari": "Senin",
+        "tanggal": tanggal,
+        "tanggal_date": parse_tanggal(tanggal),
+        "lokasi_kecamatan": "Kwandang",
+        "lokasi_desa": "Molingkapoto",
+        "status": status,
+        "created_at": "2026-01-01T00:00:00+00:00",
+    }
+
+
+async def statuses(database):
+    items = await database.agenda.find({}, {"_id": 0, "id": 1, "status": 1}).to_list(100)
+    return {i["id"]: i["status"] for i in items}
+
+
+class TestParseTanggal:
+
+    def test_iso_date_is_local_midnight(self):
+        # 2026-03-10 00:00 WITA == 2026-03-09 16:00 UTC
+        assert parse_tanggal("2026-03-10") == datetime(2026, 3, 9, 16, 0, tzinfo=timezone.utc)
+
+    def test_alternative_formats(self):
+        assert parse_tanggal("10/03/2026") == parse_tanggal("2026-03-10")
+        assert parse_tanggal("10-03-2026") == parse_tanggal("2026-03-10")
+
+    def test_unparseable(self):
+        assert parse_tanggal("besok pagi") is None
+        assert parse_tanggal("") is None
+
+    def test_status_for_date(self):
+        tanggal_date = parse_tanggal("2026-03-10")
+        # 23:30 WITA on the previous day
+        assert agenda_status_for(tanggal_date, datetime(2026, 3, 9, 15, 30, tzinfo=timezone.utc)) == "upcoming"
+        # 00:30 WITA on the day itself
+        assert agenda_status_for(tanggal_date, datetime(2026, 3, 9, 16, 30, tzinfo=timezone.utc)) == "ongoing"
+        assert agenda_status_for(tanggal_date, datetime(2026, 3, 11, 0, 0, tzinfo=timezone.utc)) == "completed"
+
+
+class TestAgendaStatusScheduler:
+
+    @pytest.fixture
+    def database(self):
+        return AsyncMongoMockClient()["agenda_scheduler_test"]
+
+    def test_transitions_follow_the_clock(self, database):
+        async def scenario():
+            await database.agenda.insert_many([
+                make_agenda("a1", "2026-03-10"),
+                make_agenda("a2", "2026-03-12"),
+                make_agenda("a3", "2026-03-01"),
+            ])
+            # 09:00 WITA, 2026-03-10
+            clock = FakeClock(datetime(2026, 3, 10, 1, 0, tzinfo=timezone.utc))
+            scheduler = AgendaStatusScheduler(database, clock=clock)
+
+            result = await scheduler.run_once()
+            assert result == {"completed": 1, "ongoing": 1}
+            assert await statuses(database) == {"a1": "ongoing", "a2": "upcoming", "a3": "completed"}
+
+            # Same day again: nothing left to do
+            assert await scheduler.run_once() == {"completed": 0, "ongoing": 0}
+
+            clock.advance(days=2)
+            await scheduler.run_once()
+            assert await statuses(database) == {"a1": "completed", "a2": "ongoing", "a3": "completed"}
+
+            clock.advance(days=1)
+            await scheduler.run_once()
+            assert await statuses(database) == {"a1": "completed", "a2": "completed", "a3": "completed"}
+
+        asyncio.run(scenario())
+
+    def test_manual_status_is_not_reverted(self, database):
+        async def scenario():
+            await database.agenda.insert_many([
+                make_agenda("done-early", "2026-04-01", status="completed"),
+                make_agenda("no-date", "segera"),
+            ])
+            clock = FakeClock(datetime(2026, 3, 20, tzinfo=timezone.utc))
+            scheduler = AgendaStatusScheduler(database, clock=clock)
+
+            await scheduler.run_once()
+            assert await statuses(database) == {"done-early": "completed", "no-date": "upcoming"}
+
+        asyncio.run(scenario())
+
+    def test_start_and_stop(self, database):
+        async def scenario():
+            scheduler = AgendaStatusScheduler(database, interval=3600)
+            scheduler.start()
+            await asyncio.sleep(0)
+            assert scheduler._task is not None
+            await scheduler.stop()
+            assert scheduler._task is None
+
+        asyncio.run(scenario())
+
+
+def test_upcoming_includes_undated_agenda():
+    database = AsyncMongoMockClient()["agro_agenda_upcoming"]
+    today = datetime.now(timezone.utc).date()
+    asyncio.run(database.agenda.insert_many([
+        make_agenda("besok", (today + timedelta(days=1)).isoformat()),
+        make_agenda("kemarin", (today - timedelta(days=1)).isoformat(), status="completed"),
+        make_agenda("segera", "minggu depan"),
+        make_agenda("selesai", "bulan lalu", status="completed"),
+    ]))
+    with TestClient(create_app(database=database)) as client:
+        res = client.get("/api/agenda/upcoming")
+        assert res.status_code == 200
+        assert [item["id"] for item in res.json()] == ["besok", "segera"]
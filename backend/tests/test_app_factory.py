@@ -0,0 +1,46 @@
+"""
+Test for the application factory
+- every router is mounted under /api
+- the lifespan wires the injected database into app.state and the handlers
+- apps built by create_app() do not share state
+"""
+
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+from app_factory import create_app
+
+
+def make_app(name="agro_factory_test"):
+    return create_app(database=AsyncMongoMockClient()[name])
+
+
+def test_routes_are_mounted_under_api():
+    paths = {route.path for route in make_app().routes}
+    for path in ["/api/health", "/api/auth/login", "/api/opd", "/api/partisipasi", "/api/settings",
+                 "/api/agenda/upcoming", "/api/search", "/api/stats", "/api/export/excel",
+                 "/api/deteksi-ganda", "/api/metrics"]:
+        assert path in paths
+
+
+def test_lifespan_uses_injected_database():
+    database = AsyncMongoMockClient()["agro_factory_db"]
+    app = create_app(database=database)
+    with TestClient(app) as client:
+        assert app.state.db is database
+        assert app.state.settings_cache.db is database
+        assert app.state.agenda_scheduler.db is database
+        assert client.get("/api/health").json()["status"] == "healthy"
+
+        opd = {"id": "opd-1", "nama": "Dinas Pertanian", "kategori": "OPD", "created_at": "2025-01-01T00:00:00+00:00"}
+        client.portal.call(database.opd.insert_one, opd)
+        response = client.get("/api/opd")
+        assert response.status_code == 200
+        assert [o["nama"] for o in response.json()] == ["Dinas Pertanian"]
+
+
+def test_apps_are_isolated():
+    first, second = make_app("agro_factory_a"), make_app("agro_factory_b")
+    with TestClient(first), TestClient(second):
+        assert first.state.db is not second.state.db
+        assert first.state.settings_cache is not second.state.settings_cache
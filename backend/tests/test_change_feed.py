@@ -0,0 +1,225 @@
+"""
+Test for the change feed that keeps caches and rollups in step with MongoDB
+- events are routed to the callbacks of their collection
+- polling fallback (standalone mongod / mongomock) reports changed collections
+- one leader per feed name: it polls for everyone and runs the leader-only callbacks
+- partisipasi events become exact deltas, or a resync when the pre-image is missing
+- resyncs from many such events are coalesced into one snapshot
+- change streams with resume tokens against a real replica set
+  (set MONGO_REPLSET_URL, e.g. a local single-node `mongod --replSet rs0`)
+"""
+
+import asyncio
+import os
+import uuid
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from change_feed import ChangeFeed, STATE_COLLECTION
+from live_stats import StatsBroadcaster, StatsDelta, RESYNC
+
+REPLSET_URL = os.environ.get("MONGO_REPLSET_URL")
+
+
+def make_db():
+    return AsyncMongoMockClient()["agro_change_feed_test"]
+
+
+def event(op, coll="partisipasi", **fields):
+    return {"operationType": op, "ns": {"db": "agro", "coll": coll}, **fields}
+
+
+def test_dispatch_routes_by_collection():
+    async def scenario():
+        feed = ChangeFeed(make_db())
+        seen = []
+
+        async def on_settings(change):
+            seen.append(("settings", change["operationType"]))
+
+        def broken(change):
+            raise RuntimeError("boom")
+
+        feed.subscribe("settings", broken)
+        feed.subscribe("settings", on_settings)
+        feed.subscribe("opd", lambda change: seen.append(("opd", change["operationType"])))
+        await feed.dispatch(event("update", "settings"))
+        await feed.invalidate_all()
+        assert seen == [("settings", "update"), ("opd", "invalidate"), ("settings", "invalidate")]
+
+    asyncio.run(scenario())
+
+
+def test_polling_reports_changed_collections():
+    async def scenario():
+        db = make_db()
+        feed = ChangeFeed(db, poll_interval=0.01)
+        seen = []
+        for collection in ("partisipasi", "opd"):
+            feed.subscribe(collection, lambda change: seen.append(change["ns"]["coll"]))
+
+        await feed.poll_once()
+        assert seen == []
+        await db.partisipasi.insert_one({"id": "p1", "opd_id": "a", "jumlah_pohon": 10})
+        await db.opd.insert_one({"id": "a", "nama": "Dinas"})
+        await feed.poll_once()
+        assert sorted(seen) == ["opd", "partisipasi"]
+        await feed.poll_once()
+        assert len(seen) == 2
+
+    asyncio.run(scenario())
+
+
+def test_single_leader_polls_for_all_workers():
+    async def scenario():
+        db = make_db()
+        first, second = ChangeFeed(db, name="lease"), ChangeFeed(db, name="lease")
+        seen, leader_only, gained = [], [], []
+        for feed in (first, second):
+            feed.subscribe("partisipasi", lambda change, feed=feed: seen.append((feed, change["after"][0])))
+            feed.subscribe("partisipasi", lambda change, feed=feed: leader_only.append(feed), leader_only=True)
+            feed.on_leader(lambda feed=feed: gained.append(feed))
+
+        await first.poll_once()
+        await second.poll_once()
+        assert (first.leader, second.leader) == (True, False)
+        assert gained == [first]
+
+        await db.partisipasi.insert_one({"id": "p1", "opd_id": "a", "jumlah_pohon": 10})
+        await first.poll_once()
+        await second.poll_once()
+        assert seen == [(first, 1), (second, 1)]
+        assert leader_only == [first]
+
+        # Leader berhenti: lease dilepas dan diambil alih worker lain
+        await first.stop()
+        await second.poll_once()
+        assert second.leader and gained == [first, second]
+
+    asyncio.run(scenario())
+
+
+def test_falls_back_to_polling_without_replica_set():
+    async def scenario():
+        feed = ChangeFeed(make_db(), poll_interval=0.01)
+        modes = []
+        feed.on_mode(modes.append)
+        feed.start()
+        await asyncio.sleep(0.05)
+        await feed.stop()
+        assert modes == ["polling"]
+
+    asyncio.run(scenario())
+
+
+def test_partisipasi_events_become_deltas():
+    async def scenario():
+        broadcaster = StatsBroadcaster(resync_delay=0)
+        broadcaster.use_change_stream(True)
+        subscription = broadcaster.subscribe()
+
+        broadcaster.apply_change(event("insert", fullDocument={"opd_id": "a", "jumlah_pohon": 10}))
+        assert subscription.queue.get_nowait()["opd"] == {"a": [10, 1]}
+
+        broadcaster.apply_change(event(
+            "update", updateDescription={"updatedFields": {"status": "verified"}, "removedFields": []}
+        ))
+        assert subscription.queue.empty()
+
+        broadcaster.apply_change(event(
+            "update", updateDescription={"updatedFields": {"opd_id": "b"}, "removedFields": []},
+            fullDocumentBeforeChange={"opd_id": "a", "jumlah_pohon": 10},
+            fullDocument={"opd_id": "b", "jumlah_pohon": 10},
+        ))
+        assert subscription.queue.get_nowait()["opd"] == {"a": [-10, -1], "b": [10, 1]}
+
+        broadcaster.apply_change(event("delete", fullDocumentBeforeChange={"opd_id": "b", "jumlah_pohon": 10}))
+        assert subscription.queue.get_nowait()["partisipan"] == -1
+
+        broadcaster.apply_change(event("delete"))
+        await asyncio.sleep(0.01)
+        assert subscription.queue.get_nowait() is RESYNC
+
+    asyncio.run(scenario())
+
+
+def test_resyncs_without_pre_images_are_coalesced():
+    async def scenario():
+        broadcaster = StatsBroadcaster(resync_delay=0.01)
+        broadcaster.use_change_stream(True)
+        subscription = broadcaster.subscribe()
+        invalidated = []
+        broadcaster.add_listener(invalidated.append)
+
+        changed = {"updatedFields": {"jumlah_pohon": 3}, "removedFields": []}
+        for _ in range(50):
+            broadcaster.apply_change(event("update", updateDescription=changed, fullDocument={"opd_id": "a"}))
+            broadcaster.apply_change(event("delete"))
+        assert subscription.queue.empty()
+        await asyncio.sleep(0.05)
+        assert subscription.queue.qsize() == 1 and subscription.queue.get_nowait() is RESYNC
+        assert invalidated == [None]
+
+    asyncio.run(scenario())
+
+
+def test_handler_deltas_are_skipped_while_following_change_stream():
+    async def scenario():
+        broadcaster = StatsBroadcaster()
+        subscription = broadcaster.subscribe()
+        delta = StatsDelta()
+        delta.add("a", 5, 1)
+        broadcaster.use_change_stream(True)
+        broadcaster.publish(delta)
+        assert subscription.queue.empty()
+        broadcaster.use_change_stream(False)
+        broadcaster.publish(delta)
+        assert subscription.queue.get_nowait()["pohon"] == 5
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.skipif(not REPLSET_URL, reason="MONGO_REPLSET_URL not set (needs a replica set)")
+def test_change_stream_resumes_from_saved_token():
+    from database import create_client
+
+    async def scenario():
+        client = create_client(REPLSET_URL)
+        db = client[f"agro_change_feed_{uuid.uuid4().hex[:8]}"]
+        try:
+            await db.create_collection("partisipasi")
+            seen = []
+            feed = ChangeFeed(db, name="test", token_save_interval=0)
+            feed.subscribe("partisipasi", lambda change: seen.append(change["operationType"]))
+            feed.start()
+            for _ in range(50):
+                if feed.mode == "change_stream":
+                    break
+                await asyncio.sleep(0.1)
+            assert feed.mode == "change_stream"
+            await db.partisipasi.insert_one({"id": "p1", "opd_id": "a", "jumlah_pohon": 3})
+            for _ in range(50):
+                if seen:
+                    break
+                await asyncio.sleep(0.1)
+            await feed.stop()
+            assert seen == ["insert"]
+            assert (await db[STATE_COLLECTION].find_one({"_id": "test"}))["resume_token"]
+
+            # Written while no consumer is running; picked up from the saved token
+            await db.partisipasi.update_one({"id": "p1"}, {"$set": {"jumlah_pohon": 4}})
+            resumed = ChangeFeed(db, name="test")
+            resumed.subscribe("partisipasi", lambda change: seen.append(change["operationType"]))
+            resumed.start()
+            for _ in range(50):
+                if len(seen) > 1:
+                    break
+                await asyncio.sleep(0.1)
+            await resumed.stop()
+            assert seen == ["insert", "update"]
+        finally:
+            await client.drop_database(db.name)
+            client.close()
+
+    asyncio.run(scenario())
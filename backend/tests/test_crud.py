@@ -0,0 +1,66 @@
+"""
+Test for the shared update helper behind the admin PUT handlers
+- the stored document comes back from the update itself
+- 404 for unknown ids, 400 for empty updates
+- OPD personil changes refresh progress_rasio in the same update
+"""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+from app_factory import create_app
+from auth import create_token
+
+AUTH = {"Authorization": f"Bearer {create_token('admin-1', 'admin@agro.local', 'admin')}"}
+
+
+def seeded_app(name):
+    db = AsyncMongoMockClient()[name]
+
+    async def seed():
+        await db.opd.insert_one({
+            "id": "opd-a", "nama": "Dinas A", "kategori": "OPD", "jumlah_personil": 4,
+            "pohon_tertanam": 20, "progress_rasio": 5, "created_at": "2025-01-01",
+        })
+        # Counter OPD dihitung ulang dari partisipasi saat change feed menjadi leader
+        await db.partisipasi.insert_one({"id": "p1", "opd_id": "opd-a", "jumlah_pohon": 20})
+        await db.berita.insert_one({
+            "id": "b1", "judul": "Lama", "deskripsi_singkat": "Ringkas", "link_berita": "https://example.com",
+            "gambar_type": "link", "is_active": True, "created_at": "2025-01-01",
+        })
+        await db.agenda.insert_one({
+            "id": "a1", "nama_kegiatan": "Tanam", "hari": "Senin", "tanggal": "2025-01-06",
+            "lokasi_kecamatan": "Kwandang", "lokasi_desa": "Molingkapoto", "status": "upcoming",
+            "created_at": "2025-01-01",
+        })
+
+    asyncio.run(seed())
+    return db, create_app(database=db)
+
+
+def test_updates_return_stored_document():
+    db, app = seeded_app("agro_crud_updates")
+    with TestClient(app) as client:
+        res = client.put("/api/berita/b1", json={"judul": "Baru", "is_active": False}, headers=AUTH)
+        assert res.status_code == 200
+        assert (res.json()["judul"], res.json()["is_active"]) == ("Baru", False)
+
+        res = client.put("/api/agenda/a1", json={"tanggal": "2025-01-07"}, headers=AUTH)
+        assert res.json()["tanggal"] == "2025-01-07"
+        assert "tanggal_date" not in res.json()
+
+        res = client.put("/api/opd/opd-a", json={"nama": "$nama", "jumlah_personil": 10}, headers=AUTH)
+        assert res.json()["nama"] == "$nama"
+        stored = client.portal.call(db.opd.find_one, {"id": "opd-a"})
+        assert stored["progress_rasio"] == 2
+
+
+def test_missing_and_empty_updates():
+    _, app = seeded_app("agro_crud_errors")
+    with TestClient(app) as client:
+        for path in ("/api/berita/x", "/api/edukasi/x", "/api/agenda/x", "/api/opd/x", "/api/partisipasi/x"):
+            assert client.put(path, json={"judul": "a", "nama": "a", "nama_kegiatan": "a", "nama_lengkap": "a"},
+                              headers=AUTH).status_code == 404, path
+            assert client.put(path, json={}, headers=AUTH).status_code == 400, path
@@ -0,0 +1,78 @@
+"""
+Test for the MongoDB client configuration
+- pool/timeout options come from the environment and unset ones are left to pymongo
+- unavailable wire compressors are dropped
+- public reads use the configured read preference
+- pool checkout wait is recorded per request and globally
+"""
+
+from types import SimpleNamespace
+
+from mongomock_motor import AsyncMongoMockClient
+from pymongo import ReadPreference
+
+import database
+import metrics
+
+
+def test_client_options_skip_unset_values(monkeypatch):
+    monkeypatch.setattr(database, "MONGO_MAX_POOL_SIZE", 50)
+    monkeypatch.setattr(database, "MONGO_SOCKET_TIMEOUT_MS", None)
+    monkeypatch.setattr(database, "MONGO_COMPRESSORS", ["zlib"])
+    options = database.client_options()
+    assert options["maxPoolSize"] == 50
+    assert "socketTimeoutMS" not in options
+    assert options["compressors"] == "zlib"
+
+
+def test_unknown_or_missing_compressors_are_dropped():
+    assert database.available_compressors(["lz4", "zlib"]) == ["zlib"]
+
+
+def test_create_client_applies_options(monkeypatch):
+    monkeypatch.setattr(database, "MONGO_MIN_POOL_SIZE", 5)
+    monkeypatch.setattr(database, "MONGO_SERVER_SELECTION_TIMEOUT_MS", 1500)
+    client = database.create_client("mongodb://localhost:27017")
+    try:
+        pool_options = client.delegate.options.pool_options
+        assert pool_options.min_pool_size == 5
+        assert client.delegate.options.server_selection_timeout == 1.5
+    finally:
+        client.close()
+
+
+def test_public_read_database_read_preference():
+    client = database.create_client("mongodb://localhost:27017")
+    try:
+        read_db = database.public_read_database(client["agro"], "secondaryPreferred")
+        assert read_db.read_preference == ReadPreference.SECONDARY_PREFERRED
+        assert client["agro"].read_preference == ReadPreference.PRIMARY
+    finally:
+        client.close()
+
+
+def test_primary_public_reads_share_the_database():
+    db = AsyncMongoMockClient()["agro"]
+    assert database.public_read_database(db, "primary") is db
+
+
+def test_pool_wait_is_recorded():
+    listener = metrics.DBPoolListener()
+    event = SimpleNamespace(address=("db", 27017), reason="timeout")
+    before = metrics.DB_POOL_WAIT.count()
+    stats = metrics.RequestDBStats()
+    token = metrics.request_db_stats.set(stats)
+    try:
+        listener.connection_check_out_started(event)
+        listener.connection_checked_out(event)
+    finally:
+        metrics.request_db_stats.reset(token)
+    assert metrics.DB_POOL_WAIT.count() == before + 1
+    assert metrics.DB_POOL_CHECKED_OUT.value(address="db:27017") == 1
+    assert stats.pool_wait_seconds >= 0
+
+    listener.connection_checked_in(event)
+    listener.connection_check_out_started(event)
+    listener.connection_check_out_failed(event)
+    assert metrics.DB_POOL_CHECKED_OUT.value(address="db:27017") == 0
+    assert metrics.DB_POOL_CHECKOUT_FAILURES.value(reason="timeout") == 1
@@ -0,0 +1,108 @@
+"""
+Test for created_at stored as BSON dates
+- legacy ISO strings are converted at startup, unreadable values are left alone
+- API responses keep ISO strings with an explicit UTC offset
+- from/to filters on partisipasi and berita, and berita cursors across dates
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+from app_factory import create_app
+from auth import create_token
+from dates import backfill_dates
+
+AUTH = {"Authorization": f"Bearer {create_token('admin-1', 'admin@agro.local', 'admin')}"}
+
+
+def berita(id, created_at):
+    return {
+        "id": id, "judul": f"Berita {id}", "deskripsi_singkat": "Ringkas", "link_berita": "https://example.com",
+        "gambar_type": "link", "is_active": True, "created_at": created_at,
+    }
+
+
+def participant(id, created_at):
+    return {
+        "id": id, "nama_lengkap": "Peserta", "opd_id": "opd-a", "jumlah_pohon": 1, "jenis_pohon": "Mangga",
+        "sumber_bibit": "Swadaya", "status": "pending", "created_at": created_at,
+    }
+
+
+def test_backfill_converts_legacy_strings():
+    db = AsyncMongoMockClient()["agro_dates_backfill"]
+
+    async def scenario():
+        await db.berita.insert_many([
+            berita("b1", "2025-01-02T03:04:05.678000+00:00"),
+            berita("b2", "bukan tanggal"),
+            berita("b3", datetime(2025, 1, 3, tzinfo=timezone.utc)),
+        ])
+        await db.opd.insert_one({"id": "opd-a", "nama": "Dinas A", "created_at": "2025-01-01"})
+        converted = await backfill_dates(db)
+        docs = {d["id"]: d["created_at"] for d in await db.berita.find({}, {"_id": 0}).to_list(None)}
+        opd = await db.opd.find_one({"id": "opd-a"})
+        return converted, docs, opd["created_at"]
+
+    converted, docs, opd_created = asyncio.run(scenario())
+    assert converted == 2
+    assert docs["b1"] == datetime(2025, 1, 2, 3, 4, 5, 678000)
+    assert docs["b2"] == "bukan tanggal"
+    assert opd_created == datetime(2025, 1, 1)
+
+
+def test_responses_keep_iso_strings():
+    db = AsyncMongoMockClient()["agro_dates_output"]
+    asyncio.run(db.opd.insert_one({"id": "opd-a", "nama": "Dinas A", "created_at": "2025-01-01T00:00:00+00:00"}))
+
+    with TestClient(create_app(database=db)) as client:
+        assert client.get("/api/opd/opd-a").json()["created_at"] == "2025-01-01T00:00:00+00:00"
+
+        created = client.post("/api/partisipasi", json={
+            "nama_lengkap": "Peserta", "opd_id": "opd-a", "jumlah_pohon": 3, "jenis_pohon": "Mangga",
+            "sumber_bibit": "Swadaya", "lokasi_tanam": "Kwandang",
+        }).json()
+        assert created["created_at"].endswith("+00:00")
+        stored = client.portal.call(db.partisipasi.find_one, {"id": created["id"]})
+        assert isinstance(stored["created_at"], datetime)
+
+        listed = client.get("/api/partisipasi", headers=AUTH).json()
+        assert listed[0]["created_at"].endswith("+00:00")
+
+
+def test_range_filters_and_cursor():
+    db = AsyncMongoMockClient()["agro_dates_range"]
+
+    async def seed():
+        await db.partisipasi.insert_many([
+            participant("p1", datetime(2025, 3, 1, 15, 59, tzinfo=timezone.utc)),  # 1 Maret WITA
+            participant("p2", datetime(2025, 3, 1, 16, 0, tzinfo=timezone.utc)),   # 2 Maret WITA
+            participant("p3", datetime(2025, 3, 3, 1, 0, tzinfo=timezone.utc)),
+        ])
+        await db.berita.insert_many([berita(f"b{i}", datetime(2025, 3, i, 4, 0, tzinfo=timezone.utc)) for i in range(1, 6)])
+
+    asyncio.run(seed())
+
+    with TestClient(create_app(database=db)) as client:
+        ids = lambda res: [item["id"] for item in res.json()]
+        res = client.get("/api/partisipasi", params={"from": "2025-03-02", "to": "2025-03-02"}, headers=AUTH)
+        assert ids(res) == ["p2"]
+        res = client.get("/api/partisipasi", params={"from": "2025-03-01T16:00:00+00:00"}, headers=AUTH)
+        assert sorted(ids(res)) == ["p2", "p3"]
+        assert client.get("/api/partisipasi", params={"from": "kemarin"}, headers=AUTH).status_code == 400
+        assert client.get(
+            "/api/partisipasi", params={"from": "2025-03-03", "to": "2025-03-01"}, headers=AUTH
+        ).status_code == 400
+
+        res = client.get("/api/berita", params={"from": "2025-03-02", "to": "2025-03-04", "limit": 2})
+        assert ids(res) == ["b4", "b3"]
+        res = client.get("/api/berita", params={
+            "from": "2025-03-02", "to": "2025-03-04", "limit": 2, "cursor": res.headers["X-Next-Cursor"]
+        })
+        assert ids(res) == ["b2"]
+
+        res = client.get("/api/berita", params={"fields": "judul", "to": "2025-03-01"})
+        assert res.json() == [{"id": "b1", "judul": "Berita b1", "created_at": "2025-03-01T04:00:00+00:00"}]
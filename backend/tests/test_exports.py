@@ -0,0 +1,187 @@
+"""
+Test for the participant exports (/api/export/csv, /api/export/ndjson, /api/export/parquet)
+- columns follow the Excel export layout, one lokasi group per lokasi_list entry
+- opd_id, kategori, status and from/to filters
+- bukti_url is never part of the export
+- rows are streamed in batches and the cursor is closed afterwards
+- parquet has typed columns, an exploded lokasi table and zstd compression
+- parquet records are built and encoded in the threadpool, not on the event loop
+"""
+
+import asyncio
+import csv
+import io
+import json
+import threading
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+import exports
+from app_factory import create_app
+from auth import create_token
+
+AUTH = {"Authorization": f"Bearer {create_token('admin-1', 'admin@agro.local', 'admin')}"}
+
+
+def peserta(nama, opd_id="desa-a", **extra):
+    return {
+        "id": nama, "nama_lengkap": nama, "nip": "", "alamat": "Jl. Pantai", "nomor_whatsapp": "0812",
+        "opd_id": opd_id, "kategori": "DESA", "status": "pending", "jumlah_pohon": 3, "jenis_pohon": "Mangga",
+        "sumber_bibit": "Swadaya", "lokasi_tanam": "Kwandang", "titik_lokasi": "0.85, 122.9",
+        "bukti_url": "data:image/png;base64,AAAA", "created_at": datetime(2025, 3, 1, 2, tzinfo=timezone.utc),
+        **extra,
+    }
+
+
+def seeded_app(name, docs):
+    db = AsyncMongoMockClient()[name]
+
+    async def seed():
+        await db.opd.insert_many([
+            {"id": "desa-a", "nama": "Desa A", "kategori": "DESA", "created_at": "2025-01-01"},
+            {"id": "dinas-b", "nama": "Dinas B", "kategori": "OPD", "created_at": "2025-01-01"},
+        ])
+        await db.partisipasi.insert_many(docs)
+
+    asyncio.run(seed())
+    return create_app(database=db)
+
+
+def read_csv(res):
+    return list(csv.reader(io.StringIO(res.text)))
+
+
+def test_csv_uses_excel_columns_and_flattens_lokasi():
+    app = seeded_app("agro_export_csv", [
+        peserta("Satu"),
+        peserta("Dua", opd_id="dinas-b", lokasi_list=[
+            {"lokasi_tanam": "Pantai", "titik_lokasi": "0.1, 122.1"},
+            {"lokasi_tanam": "Kebun", "titik_lokasi": ""},
+        ]),
+    ])
+    with TestClient(app) as client:
+        assert client.get("/api/export/csv").status_code in (401, 403)
+        res = client.get("/api/export/csv", headers=AUTH)
+        assert res.status_code == 200
+        assert res.headers["content-type"].startswith("text/csv")
+        assert "data_partisipasi_agro_mopomulo.csv" in res.headers["content-disposition"]
+    header, *rows = read_csv(res)
+    assert header == exports.export_headers(2)
+    assert header[8:] == ["Lokasi Tanam 1", "Latitude 1", "Longitude 1", "Lokasi Tanam 2", "Latitude 2", "Longitude 2"]
+    by_name = {row[0]: row for row in rows}
+    assert by_name["Satu"][4:6] == ["Desa A", "3"]
+    assert by_name["Satu"][8:] == ["Kwandang", "0.85", "122.9", "", "", ""]
+    assert by_name["Dua"][4] == "Dinas B"
+    assert by_name["Dua"][8:] == ["Pantai", "0.1", "122.1", "Kebun", "", ""]
+    assert "base64" not in res.text
+
+
+def test_filters_apply_to_both_formats():
+    app = seeded_app("agro_export_filter", [
+        peserta("Lama", created_at=datetime(2025, 1, 5, tzinfo=timezone.utc)),
+        peserta("Baru"),
+        peserta("Dinas", opd_id="dinas-b", kategori="OPD", status="verified"),
+    ])
+    with TestClient(app) as client:
+        names = lambda res: sorted(row[0] for row in read_csv(res)[1:])
+        assert names(client.get("/api/export/csv", params={"opd_id": "dinas-b"}, headers=AUTH)) == ["Dinas"]
+        assert names(client.get("/api/export/csv", params={"kategori": "DESA"}, headers=AUTH)) == ["Baru", "Lama"]
+        assert names(client.get("/api/export/csv", params={"status": "verified"}, headers=AUTH)) == ["Dinas"]
+        res = client.get("/api/export/csv", params={"from": "2025-02-01", "to": "2025-03-31"}, headers=AUTH)
+        assert names(res) == ["Baru", "Dinas"]
+        assert client.get("/api/export/csv", params={"from": "2025-04-01", "to": "2025-03-01"}, headers=AUTH).status_code == 400
+
+        res = client.get("/api/export/ndjson", params={"opd_id": "desa-a", "from": "2025-02-01"}, headers=AUTH)
+        assert res.status_code == 200
+        assert res.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in res.text.splitlines()]
+        assert lines == [dict(zip(exports.export_headers(1), [
+            "Baru", "", "Jl. Pantai", "0812", "Desa A", 3, "Mangga", "Swadaya", "Kwandang", "0.85", "122.9",
+        ]))]
+
+
+def test_empty_export_has_header_only():
+    app = seeded_app("agro_export_empty", [peserta("Satu")])
+    with TestClient(app) as client:
+        res = client.get("/api/export/csv", params={"opd_id": "tidak-ada"}, headers=AUTH)
+        assert read_csv(res) == [exports.export_headers(1)]
+        assert client.get("/api/export/ndjson", params={"opd_id": "tidak-ada"}, headers=AUTH).text == ""
+
+
+def test_rows_are_streamed_in_batches(monkeypatch):
+    monkeypatch.setattr(exports, "EXPORT_BATCH_ROWS", 2)
+    db = AsyncMongoMockClient()["agro_export_batches"]
+
+    async def run():
+        await db.partisipasi.insert_many([peserta(f"P{i}") for i in range(5)])
+        chunks = [chunk async for chunk in exports.csv_chunks(db, {}, 1, {"desa-a": "Desa A"})]
+        batches = [batch async for batch in exports.export_batches(db, {}, batch_rows=2)]
+        return chunks, batches
+
+    chunks, batches = asyncio.run(run())
+    assert [len(b) for b in batches] == [2, 2, 1]
+    assert all("bukti_url" not in doc for batch in batches for doc in batch)
+    assert len(b"".join(chunks).decode("utf-8").splitlines()) == 6
+
+
+def test_parquet_typed_tables():
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    app = seeded_app("agro_export_parquet", [
+        peserta("Satu", opd_id="dinas-b", kategori="OPD", lokasi_list=[
+            {"lokasi_tanam": "Pantai", "titik_lokasi": "0.1, 122.1", "bukti_url": "data:image/png;base64,AAAA"},
+            {"lokasi_tanam": "Kebun", "titik_lokasi": "bukan koordinat"},
+        ]),
+        peserta("Lama", lokasi_list=[]),
+    ])
+    with TestClient(app) as client:
+        assert client.get("/api/export/parquet", params={"table": "foto"}, headers=AUTH).status_code == 400
+        res = client.get("/api/export/parquet", headers=AUTH)
+        assert res.status_code == 200
+        assert "data_partisipasi_agro_mopomulo.parquet" in res.headers["content-disposition"]
+        lokasi_res = client.get("/api/export/parquet", params={"table": "lokasi"}, headers=AUTH)
+        filtered = client.get("/api/export/parquet", params={"kategori": "OPD"}, headers=AUTH)
+
+    parquet = pq.ParquetFile(io.BytesIO(res.content))
+    assert parquet.metadata.row_group(0).column(0).compression == "ZSTD"
+    table = parquet.read()
+    assert table.schema.field("jumlah_pohon").type == pa.int64()
+    assert table.schema.field("latitude").type == pa.float64()
+    assert table.schema.field("created_at").type == pa.timestamp("ms", tz="UTC")
+    assert "bukti_url" not in table.column_names
+    rows = {row["nama_lengkap"]: row for row in table.to_pylist()}
+    assert rows["Satu"]["opd_nama"] == "Dinas B"
+    assert rows["Satu"]["jumlah_lokasi"] == 2
+    assert (rows["Satu"]["latitude"], rows["Satu"]["longitude"]) == (0.1, 122.1)
+    assert rows["Lama"]["lokasi_tanam"] == "Kwandang"
+    assert rows["Lama"]["created_at"] == datetime(2025, 3, 1, 2, tzinfo=timezone.utc)
+
+    lokasi = pq.read_table(io.BytesIO(lokasi_res.content)).to_pylist()
+    assert sorted((r["partisipasi_id"], r["urutan"], r["lokasi_tanam"], r["latitude"]) for r in lokasi) == [
+        ("Lama", 1, "Kwandang", 0.85), ("Satu", 1, "Pantai", 0.1), ("Satu", 2, "Kebun", None),
+    ]
+    assert pq.read_table(io.BytesIO(filtered.content)).column("nama_lengkap").to_pylist() == ["Satu"]
+
+
+def test_parquet_records_are_built_off_the_loop(monkeypatch):
+    db = AsyncMongoMockClient()["agro_export_parquet_threads"]
+    threads = []
+    build = exports.partisipasi_record
+
+    def recording(p, names):
+        threads.append(threading.get_ident())
+        return build(p, names)
+
+    monkeypatch.setattr(exports, "partisipasi_record", recording)
+
+    async def scenario():
+        await db.partisipasi.insert_many([peserta(f"P{i}") for i in range(3)])
+        output = await exports.parquet_file(db, {}, "partisipasi", {})
+        output.close()
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert len(threads) == 3 and loop_thread not in threads
@@ -0,0 +1,112 @@
+"""
+Test for Idempotency-Key handling on the public write endpoints
+- a replay returns the original response and writes nothing new
+- a different body under the same key is 422
+- failed requests release the key; in-flight duplicates get 409, expired claims are taken over
+- a duplicate waits for the running original and gets its result
+- multipart boundaries do not affect the request fingerprint
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+import idempotency
+from app_factory import create_app
+from idempotency import BodyFingerprint, acquire
+
+PESERTA = {
+    "nama_lengkap": "Peserta", "opd_id": "opd-a", "jumlah_pohon": 3, "jenis_pohon": "Mangga",
+    "sumber_bibit": "Swadaya", "lokasi_tanam": "Kwandang",
+}
+
+
+def seeded_db(name):
+    db = AsyncMongoMockClient()[name]
+    asyncio.run(db.opd.insert_one({"id": "opd-a", "nama": "Dinas A", "kategori": "OPD", "created_at": "2025-01-01"}))
+    return db
+
+
+def test_replay_returns_original_response():
+    db = seeded_db("agro_idem_replay")
+    key = {"Idempotency-Key": "submit-1"}
+    with TestClient(create_app(database=db)) as client:
+        first = client.post("/api/partisipasi", json=PESERTA, headers=key)
+        again = client.post("/api/partisipasi", json=PESERTA, headers=key)
+        assert first.status_code == again.status_code == 200
+        assert again.json() == first.json()
+        assert again.headers["idempotent-replayed"] == "true"
+        assert "idempotent-replayed" not in first.headers
+
+        assert client.portal.call(db.partisipasi.count_documents, {}) == 1
+        opd = client.portal.call(db.opd.find_one, {"id": "opd-a"})
+        assert opd["pohon_tertanam"] == 3
+
+        changed = client.post("/api/partisipasi", json={**PESERTA, "jumlah_pohon": 4}, headers=key)
+        assert changed.status_code == 422
+
+        other = client.post("/api/partisipasi", json=PESERTA, headers={"Idempotency-Key": "submit-2"})
+        assert other.json()["id"] != first.json()["id"]
+        assert client.post("/api/partisipasi", json=PESERTA, headers={"Idempotency-Key": ""}).status_code == 400
+
+
+def test_failure_releases_key_and_in_flight_conflicts(monkeypatch):
+    monkeypatch.setattr(idempotency, "IDEMPOTENCY_WAIT_SECONDS", 0)
+    db = seeded_db("agro_idem_release")
+    key = {"Idempotency-Key": "submit-1"}
+    with TestClient(create_app(database=db)) as client:
+        bad = client.post("/api/partisipasi", json={**PESERTA, "opd_id": "hilang"}, headers=key)
+        assert bad.status_code == 400
+        assert client.post("/api/partisipasi", json=PESERTA, headers=key).status_code == 200
+
+        client.portal.call(db.idempotency_keys.insert_one, {
+            "_id": "POST /api/partisipasi busy", "state": "processing",
+            "lease_until": datetime.now(timezone.utc) + timedelta(minutes=1),
+        })
+        busy = client.post("/api/partisipasi", json=PESERTA, headers={"Idempotency-Key": "busy"})
+        assert busy.status_code == 409
+        assert busy.headers["retry-after"] == "1"
+
+        # Lease habis (worker mati): key diambil alih
+        client.portal.call(db.idempotency_keys.update_one, {"_id": "POST /api/partisipasi busy"},
+                           {"$set": {"lease_until": datetime.now(timezone.utc) - timedelta(seconds=1)}})
+        assert client.post("/api/partisipasi", json=PESERTA, headers={"Idempotency-Key": "busy"}).status_code == 200
+        assert client.portal.call(db.partisipasi.count_documents, {}) == 2
+
+
+def test_duplicate_waits_for_original():
+    db = AsyncMongoMockClient()["agro_idem_wait"]
+
+    async def scenario():
+        assert await acquire(db, "k") is None
+
+        async def finish():
+            await asyncio.sleep(0.2)
+            await db.idempotency_keys.update_one({"_id": "k"}, {"$set": {"state": "done", "status": 200}})
+
+        waiter = asyncio.ensure_future(acquire(db, "k", wait=2))
+        await finish()
+        done = await waiter
+        timed_out = await acquire(db, "k2") is None and await acquire(db, "k2", wait=0)
+        return done, timed_out
+
+    done, timed_out = asyncio.run(scenario())
+    assert done["state"] == "done"
+    assert timed_out["state"] == "processing"
+
+
+def test_multipart_boundary_ignored():
+    def digest(boundary, chunk_size):
+        body = (
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.png\"\r\n"
+            f"Content-Type: image/png\r\n\r\nPNGDATA\r\n--{boundary}--\r\n"
+        ).encode()
+        fingerprint = BodyFingerprint(f"multipart/form-data; boundary={boundary}")
+        for i in range(0, len(body), chunk_size):
+            fingerprint.update(body[i:i + chunk_size])
+        return fingerprint.hexdigest()
+
+    assert digest("aaaa1111", 7) == digest("bbbb2222", 5) == digest("cccc3333", 1000)
+    assert BodyFingerprint("application/json").hexdigest() != digest("aaaa1111", 7)
@@ -0,0 +1,129 @@
+"""
+Test for the live stats broadcaster behind /api/stats/stream
+- snapshot then deltas, formatted as SSE frames
+- slow subscribers get a resync snapshot instead of an unbounded backlog
+- heartbeats on idle streams, streams end on shutdown
+- participation writes publish deltas
+"""
+
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+from app_factory import create_app
+from live_stats import StatsBroadcaster, StatsDelta, RESYNC
+
+
+class FakeRequest:
+
+    def __init__(self):
+        self.disconnected = False
+
+    async def is_disconnected(self):
+        return self.disconnected
+
+
+def parse_frame(frame):
+    fields = dict(line.split(": ", 1) for line in frame.strip().splitlines() if not line.startswith("retry"))
+    return fields["event"], json.loads(fields["data"])
+
+
+def make_db():
+    return AsyncMongoMockClient()["agro_live_stats_test"]
+
+
+def test_delta_payload_drops_unchanged_opd():
+    delta = StatsDelta()
+    delta.add("a", -10, -1)
+    delta.add("b", 10, 0)
+    delta.add("c", 5, 1)
+    delta.add("c", -5, -1)
+    assert delta.payload() == {"pohon": 0, "partisipan": -1, "opd": {"a": [-10, -1], "b": [10, 0]}}
+    assert not StatsDelta()
+
+
+def test_stream_sends_snapshot_then_deltas():
+    async def scenario():
+        db = make_db()
+        await db.partisipasi.insert_many([{"jumlah_pohon": 10}, {"jumlah_pohon": 5}])
+        broadcaster = StatsBroadcaster(heartbeat=5)
+        stream = broadcaster.stream(FakeRequest(), db)
+
+        event, data = parse_frame(await stream.__anext__())
+        assert event == "snapshot"
+        assert (data["total_pohon"], data["total_partisipan"]) == (15, 2)
+
+        delta = StatsDelta()
+        delta.add("opd-1", 10, 1)
+        broadcaster.publish(delta, "created")
+        event, data = parse_frame(await stream.__anext__())
+        assert event == "delta"
+        assert data["pohon"] == 10 and data["opd"] == {"opd-1": [10, 1]}
+
+        snapshot = await broadcaster.snapshot(db)
+        assert (snapshot["total_pohon"], snapshot["total_partisipan"]) == (25, 3)
+        await stream.aclose()
+        assert broadcaster.subscriber_count == 0
+
+    asyncio.run(scenario())
+
+
+def test_slow_subscriber_is_resynced():
+    async def scenario():
+        broadcaster = StatsBroadcaster(queue_size=3)
+        slow = broadcaster.subscribe()
+        for _ in range(5):
+            delta = StatsDelta()
+            delta.add("opd-1", 1, 1)
+            broadcaster.publish(delta)
+        assert slow.queue.qsize() <= 3
+        items = [slow.queue.get_nowait() for _ in range(slow.queue.qsize())]
+        assert RESYNC in items
+
+    asyncio.run(scenario())
+
+
+def test_heartbeat_and_shutdown():
+    async def scenario():
+        broadcaster = StatsBroadcaster(heartbeat=0.01)
+        stream = broadcaster.stream(FakeRequest(), make_db())
+        await stream.__anext__()
+        assert await stream.__anext__() == ": ping\n\n"
+        broadcaster.close()
+        remaining = [frame async for frame in stream]
+        assert all(frame == ": ping\n\n" for frame in remaining)
+        assert broadcaster.subscriber_count == 0
+
+    asyncio.run(scenario())
+
+
+def test_disconnected_client_is_unsubscribed():
+    async def scenario():
+        request = FakeRequest()
+        broadcaster = StatsBroadcaster(heartbeat=0.01)
+        stream = broadcaster.stream(request, make_db())
+        await stream.__anext__()
+        request.disconnected = True
+        assert [frame async for frame in stream] == []
+        assert broadcaster.subscriber_count == 0
+
+    asyncio.run(scenario())
+
+
+def test_participation_writes_publish_deltas():
+    db = make_db()
+    app = create_app(database=db)
+    with TestClient(app) as client:
+        client.portal.call(db.opd.insert_one, {"id": "opd-1", "nama": "Dinas Pertanian", "kategori": "OPD"})
+        subscription = app.state.stats_broadcaster.subscribe()
+        response = client.post("/api/partisipasi", json={
+            "nama_lengkap": "Budi", "nip": "199001012020011001", "opd_id": "opd-1",
+            "alamat": "Kwandang", "nomor_whatsapp": "081234567890", "jumlah_pohon": 12,
+            "jenis_pohon": "Mangga", "sumber_bibit": "Swadaya", "lokasi_tanam": "Desa Molingkapoto",
+        })
+        assert response.status_code == 200, response.text
+        event = subscription.queue.get_nowait()
+        assert event["reason"] == "created"
+        assert event["opd"] == {"opd-1": [12, 1]}
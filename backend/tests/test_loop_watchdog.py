@@ -0,0 +1,69 @@
+"""
+Test for the event loop blocking detector
+- a handler that blocks the loop is reported with its endpoint and stack
+- awaiting handlers are not reported
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from loop_watchdog import BlockingDetector, BlockingDetectorMiddleware, LOOP_STALLS
+
+
+def make_app(detector):
+    @asynccontextmanager
+    async def lifespan(app):
+        detector.start()
+        yield
+        await detector.stop()
+
+    app = FastAPI(lifespan=lifespan)
+
+    @app.get("/blocking")
+    async def blocking_handler():
+        time.sleep(0.3)
+        return {"ok": True}
+
+    @app.get("/awaiting")
+    async def awaiting_handler():
+        await asyncio.sleep(0.3)
+        return {"ok": True}
+
+    app.add_middleware(BlockingDetectorMiddleware, detector=detector)
+    return app
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+
+def test_blocking_handler_is_reported():
+    detector = BlockingDetector(threshold=0.05)
+    before = LOOP_STALLS.value(endpoint="blocking_handler")
+    with TestClient(make_app(detector)) as client:
+        assert client.get("/blocking").status_code == 200
+        assert wait_for(lambda: len(detector.stalls) > 0)
+
+    stall = detector.stalls[0]
+    assert stall["endpoint"] == "blocking_handler"
+    assert stall["route"] == "GET /blocking"
+    assert stall["duration"] >= 0.2
+    assert "time.sleep(0.3)" in stall["stack"]
+    assert LOOP_STALLS.value(endpoint="blocking_handler") == before + 1
+
+
+def test_awaiting_handler_is_not_reported():
+    detector = BlockingDetector(threshold=0.05)
+    with TestClient(make_app(detector)) as client:
+        assert client.get("/awaiting").status_code == 200
+        time.sleep(0.1)
+    assert list(detector.stalls) == []
@@ -0,0 +1,85 @@
+"""
+Test for the instrumentation middleware and /api/metrics
+- DB commands are attributed to the request that issued them
+- route labels use path templates
+- Prometheus text rendering
+- /api/metrics needs the scraper token or an admin login
+"""
+
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+import metrics
+from app_factory import create_app
+from auth import create_token
+from routers import system
+
+
+def fake_command(name, micros):
+    return SimpleNamespace(command_name=name, duration_micros=micros)
+
+
+def make_app():
+    app = FastAPI()
+    listener = metrics.DBCommandListener()
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: str):
+        listener.succeeded(fake_command("find", 2000))
+        listener.succeeded(fake_command("find", 3000))
+        return {"id": item_id}
+
+    app.add_middleware(metrics.MetricsMiddleware)
+    return app
+
+
+def test_db_round_trips_are_reported_per_request():
+    client = TestClient(make_app())
+    response = client.get("/items/abc")
+    assert response.status_code == 200
+    assert response.headers["x-db-round-trips"] == "2"
+    assert response.headers["server-timing"].startswith("db;dur=5.0")
+
+
+def test_route_label_uses_template():
+    client = TestClient(make_app())
+    before = metrics.HTTP_REQUESTS.value(method="GET", route="/items/{item_id}", status="200")
+    client.get("/items/one")
+    client.get("/items/two")
+    after = metrics.HTTP_REQUESTS.value(method="GET", route="/items/{item_id}", status="200")
+    assert after - before == 2
+
+
+def test_listener_outside_request_only_updates_globals():
+    before = metrics.DB_COMMANDS.value(command="ping", outcome="success")
+    metrics.DBCommandListener().succeeded(fake_command("ping", 100))
+    assert metrics.DB_COMMANDS.value(command="ping", outcome="success") == before + 1
+
+
+def test_render_prometheus_text():
+    histogram = metrics.Histogram("test_render_seconds", "Render test", ("route",), buckets=(0.1, 1.0))
+    try:
+        histogram.observe(0.05, route="/a")
+        histogram.observe(0.5, route="/a")
+        text = histogram.render()
+        assert "# TYPE test_render_seconds histogram" in text
+        assert 'test_render_seconds_bucket{route="/a",le="0.1"} 1' in text
+        assert 'test_render_seconds_bucket{route="/a",le="+Inf"} 2' in text
+        assert 'test_render_seconds_count{route="/a"} 2' in text
+    finally:
+        metrics.REGISTRY.remove(histogram)
+
+
+def test_metrics_endpoint_is_not_public(monkeypatch):
+    monkeypatch.setattr(system, "METRICS_TOKEN", "rahasia-scraper")
+    admin = create_token("admin-1", "admin@agro.local", "admin")
+    with TestClient(create_app(database=AsyncMongoMockClient()["agro_metrics_auth"])) as client:
+        assert client.get("/api/metrics").status_code == 401
+        assert client.get("/api/metrics", headers={"Authorization": "Bearer salah"}).status_code == 403
+        for token in ("rahasia-scraper", admin):
+            res = client.get("/api/metrics", headers={"Authorization": f"Bearer {token}"})
+            assert res.status_code == 200
+            assert "http_requests_total" in res.text
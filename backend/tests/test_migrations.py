@@ -0,0 +1,74 @@
+"""
+Test for the one-off startup migrations
+- each migration runs once; later starts only read the marker document
+- a failing migration is not recorded and runs again at the next start
+- a worker that does not get the lease skips instead of waiting
+- the app lifespan records the built-in migrations
+"""
+
+import asyncio
+from datetime import datetime, timezone, timedelta
+
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+from app_factory import create_app
+from migrations import MIGRATIONS, STATE_ID, run_migrations
+
+
+def recording(calls, name, fail=False):
+    async def migrate(db):
+        calls.append(name)
+        if fail:
+            raise RuntimeError("gagal")
+    return migrate
+
+
+def test_migrations_run_once():
+    db = AsyncMongoMockClient()["agro_migrations_once"]
+    calls = []
+    migrations = [("a", recording(calls, "a"), "A gagal"), ("b", recording(calls, "b"), "B gagal")]
+
+    async def scenario():
+        assert await run_migrations(db, migrations) == ["a", "b"]
+        assert await run_migrations(db, migrations) == []
+        migrations.append(("c", recording(calls, "c"), "C gagal"))
+        assert await run_migrations(db, migrations) == ["c"]
+
+    asyncio.run(scenario())
+    assert calls == ["a", "b", "c"]
+
+
+def test_failed_migration_is_retried():
+    db = AsyncMongoMockClient()["agro_migrations_retry"]
+    calls = []
+
+    async def scenario():
+        assert await run_migrations(db, [("x", recording(calls, "x", fail=True), "X gagal")]) == []
+        assert await run_migrations(db, [("x", recording(calls, "x"), "X gagal")]) == ["x"]
+
+    asyncio.run(scenario())
+    assert calls == ["x", "x"]
+
+
+def test_held_lease_skips():
+    db = AsyncMongoMockClient()["agro_migrations_lease"]
+    calls = []
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    async def scenario():
+        await db.migrations.insert_one({"_id": STATE_ID, "applied": [], "lease_until": now + timedelta(minutes=5)})
+        migrations = [("a", recording(calls, "a"), "A gagal")]
+        assert await run_migrations(db, migrations, clock=lambda: now) == []
+        assert await run_migrations(db, migrations, clock=lambda: now + timedelta(minutes=10)) == ["a"]
+
+    asyncio.run(scenario())
+    assert calls == ["a"]
+
+
+def test_lifespan_records_migrations():
+    db = AsyncMongoMockClient()["agro_migrations_app"]
+    with TestClient(create_app(database=db)) as client:
+        state = client.portal.call(db.migrations.find_one, {"_id": STATE_ID})
+    assert sorted(state["applied"]) == sorted(name for name, _, _ in MIGRATIONS)
+    assert state["lease_until"] is None
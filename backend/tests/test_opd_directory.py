@@ -0,0 +1,146 @@
+"""
+Test for the in-process OPD directory
+- loaded once, reloaded only after a version bump
+- counter-only change events do not invalidate it
+- normalized name lookups (optionally per kategori) and reload on unknown ids
+- OPD writes through the API are visible to participant joins
+- participants carry opd_nama/kategori, backfilled and fanned out on OPD edits
+"""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+from app_factory import create_app
+from auth import create_token
+from opd_directory import OPDDirectory, backfill_participant_opd
+
+AUTH = {"Authorization": f"Bearer {create_token('admin-1', 'admin@agro.local', 'admin')}"}
+
+OPDS = [
+    {"id": "opd-a", "nama": "Dinas Pertanian", "kategori": "OPD", "created_at": "2025-01-01"},
+    {"id": "desa-b", "nama": "Desa Molingkapoto", "kategori": "DESA", "created_at": "2025-01-01"},
+]
+
+
+def seeded_db(name):
+    db = AsyncMongoMockClient()[name]
+    asyncio.run(db.opd.insert_many([dict(o) for o in OPDS]))
+    return db
+
+
+def test_reloads_only_after_bump():
+    db = seeded_db("agro_dir_bump")
+    directory = OPDDirectory(db)
+
+    async def scenario():
+        first = await directory.names()
+        await db.opd.insert_one({"id": "opd-c", "nama": "Dinas Pendidikan", "created_at": "2025-01-01"})
+        cached = await directory.names()
+        directory.bump()
+        return first, cached, await directory.names()
+
+    first, cached, reloaded = asyncio.run(scenario())
+    assert set(first) == {"opd-a", "desa-b"}
+    assert cached == first
+    assert reloaded["opd-c"] == "Dinas Pendidikan"
+
+
+def test_counter_updates_keep_directory():
+    directory = OPDDirectory(None)
+    counters = {"operationType": "update",
+                "updateDescription": {"updatedFields": {"pohon_tertanam": 5, "progress_rasio": 0.5}}}
+    directory.apply_change(counters)
+    assert directory.version == 0
+
+    rename = {"operationType": "update", "updateDescription": {"updatedFields": {"nama": "Dinas Baru"}}}
+    directory.apply_change(rename)
+    directory.apply_change({"operationType": "poll"})
+    assert directory.version == 2
+
+
+def test_name_lookup_and_reload_on_miss():
+    db = seeded_db("agro_dir_lookup")
+    directory = OPDDirectory(db)
+
+    async def scenario():
+        by_name = await directory.id_for_name("  dinas   PERTANIAN ")
+        wrong_kategori = await directory.id_for_name("Dinas Pertanian", "DESA")
+        await db.opd.insert_one({"id": "opd-new", "nama": "Dinas Baru", "created_at": "2025-01-01"})
+        without_reload = await directory.get("opd-new")
+        with_reload = await directory.get("opd-new", reload_on_miss=True)
+        return by_name, wrong_kategori, without_reload, with_reload
+
+    by_name, wrong_kategori, without_reload, with_reload = asyncio.run(scenario())
+    assert by_name == "opd-a"
+    assert wrong_kategori is None
+    assert without_reload is None
+    assert with_reload["nama"] == "Dinas Baru"
+
+
+def test_api_writes_refresh_joins():
+    db = seeded_db("agro_dir_api")
+    with TestClient(create_app(database=db)) as client:
+        created = client.post("/api/partisipasi", json={
+            "nama_lengkap": "Peserta", "opd_id": "opd-a", "jumlah_pohon": 3, "jenis_pohon": "Mangga",
+            "sumber_bibit": "Swadaya", "lokasi_tanam": "Kwandang",
+        })
+        assert created.json()["opd_nama"] == "Dinas Pertanian"
+
+        client.put("/api/opd/opd-a", json={"nama": "Dinas Pertanian dan Pangan"}, headers=AUTH)
+        listed = client.get("/api/partisipasi", headers=AUTH).json()
+        assert listed[0]["opd_nama"] == "Dinas Pertanian dan Pangan"
+
+        client.delete("/api/opd/opd-a", headers=AUTH)
+        assert client.get(f"/api/partisipasi/{created.json()['id']}", headers=AUTH).json()["opd_nama"] == "Unknown"
+
+
+def test_backfill_copies_opd_fields():
+    db = seeded_db("agro_dir_backfill")
+
+    async def scenario():
+        await db.partisipasi.insert_many([
+            {"id": "p1", "opd_id": "opd-a", "jumlah_pohon": 1},
+            {"id": "p2", "opd_id": "desa-b", "jumlah_pohon": 1},
+            {"id": "p3", "opd_id": "hilang", "jumlah_pohon": 1},
+            {"id": "p4", "opd_id": "opd-a", "opd_nama": "Nama Lama", "kategori": "OPD", "jumlah_pohon": 1},
+        ])
+        changed = await backfill_participant_opd(db)
+        docs = await db.partisipasi.find({}, {"_id": 0, "id": 1, "opd_nama": 1, "kategori": 1}).to_list(None)
+        return changed, {d["id"]: (d["opd_nama"], d["kategori"]) for d in docs}
+
+    changed, docs = asyncio.run(scenario())
+    assert changed == 3
+    assert docs == {
+        "p1": ("Dinas Pertanian", "OPD"),
+        "p2": ("Desa Molingkapoto", "DESA"),
+        "p3": ("Unknown", None),
+        "p4": ("Nama Lama", "OPD"),  # sudah terisi, tidak disentuh
+    }
+
+
+def test_participants_carry_opd_fields():
+    db = seeded_db("agro_dir_denormalized")
+    stored = lambda client, pid: client.portal.call(db.partisipasi.find_one, {"id": pid})
+
+    with TestClient(create_app(database=db)) as client:
+        ids = {}
+        for opd_id in ("opd-a", "desa-b"):
+            ids[opd_id] = client.post("/api/partisipasi", json={
+                "nama_lengkap": "Peserta", "opd_id": opd_id, "jumlah_pohon": 2, "jenis_pohon": "Mangga",
+                "sumber_bibit": "Swadaya", "lokasi_tanam": "Kwandang",
+            }).json()["id"]
+        assert stored(client, ids["desa-b"])["kategori"] == "DESA"
+
+        res = client.get("/api/partisipasi", params={"kategori": "DESA"}, headers=AUTH)
+        assert [p["id"] for p in res.json()] == [ids["desa-b"]]
+
+        client.put("/api/opd/desa-b", json={"nama": "Desa Baru", "kategori": "PUBLIK"}, headers=AUTH)
+        doc = stored(client, ids["desa-b"])
+        assert (doc["opd_nama"], doc["kategori"]) == ("Desa Baru", "PUBLIK")
+
+        moved = client.put(f"/api/partisipasi/{ids['opd-a']}", json={"opd_id": "desa-b"}, headers=AUTH)
+        assert (moved.json()["opd_nama"], moved.json()["kategori"]) == ("Desa Baru", "PUBLIK")
+        bad = client.put(f"/api/partisipasi/{ids['opd-a']}", json={"opd_id": "hilang"}, headers=AUTH)
+        assert bad.status_code == 400
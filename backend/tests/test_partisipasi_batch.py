@@ -0,0 +1,76 @@
+"""
+Test for POST /api/partisipasi/batch
+- valid items are stored with their OPD fields and counted on the OPD
+- invalid items and unknown OPDs are reported per index without failing the batch
+- rows rejected by the insert are reported and left out of the counters
+- empty and oversized batches are rejected
+"""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+from app_factory import create_app
+from config import PARTISIPASI_BATCH_MAX
+
+PESERTA = {
+    "nama_lengkap": "Peserta", "opd_id": "desa-a", "jumlah_pohon": 2, "jenis_pohon": "Mangga",
+    "sumber_bibit": "Swadaya", "lokasi_tanam": "Kwandang",
+}
+
+
+def seeded_app(name):
+    db = AsyncMongoMockClient()[name]
+    asyncio.run(db.opd.insert_one({"id": "desa-a", "nama": "Desa A", "kategori": "DESA", "created_at": "2025-01-01"}))
+    return db, create_app(database=db)
+
+
+def test_batch_stores_valid_items():
+    db, app = seeded_app("agro_batch_store")
+    items = [
+        PESERTA,
+        {**PESERTA, "nama_lengkap": "Kedua", "jumlah_pohon": 5},
+        {**PESERTA, "jumlah_pohon": "banyak"},
+        {**PESERTA, "opd_id": "hilang"},
+        {**PESERTA, "email": "bukan-email"},
+    ]
+    with TestClient(app) as client:
+        res = client.post("/api/partisipasi/batch", json={"items": items})
+        assert res.status_code == 200
+        body = res.json()
+        assert body["created"] == 2
+        results = body["results"]
+        assert [r["index"] for r in results] == [0, 1, 2, 3, 4]
+        assert all(r["id"] and r["error"] is None for r in results[:2])
+        assert results[2]["id"] is None and "jumlah_pohon" in results[2]["error"]
+        assert results[3]["error"] == "OPD tidak ditemukan"
+        assert "Format email tidak valid" in results[4]["error"]
+
+        stored = client.portal.call(db.partisipasi.find_one, {"id": results[1]["id"]})
+        assert (stored["opd_nama"], stored["kategori"], stored["jumlah_pohon"]) == ("Desa A", "DESA", 5)
+        assert client.portal.call(db.opd.find_one, {"id": "desa-a"})["pohon_tertanam"] == 7
+
+
+def test_batch_reports_rejected_inserts():
+    db, app = seeded_app("agro_batch_write_errors")
+    # Index unik pada nama memaksa BulkWriteError untuk satu baris saja
+    asyncio.run(db.partisipasi.create_index("nama_lengkap", unique=True))
+    asyncio.run(db.partisipasi.insert_one({"id": "lama", "nama_lengkap": "Sudah Ada", "opd_id": "lain"}))
+    items = [PESERTA, {**PESERTA, "nama_lengkap": "Sudah Ada", "jumlah_pohon": 40}, {**PESERTA, "nama_lengkap": "Ketiga"}]
+    with TestClient(app) as client:
+        res = client.post("/api/partisipasi/batch", json={"items": items})
+        assert res.status_code == 200
+        body = res.json()
+        assert body["created"] == 2
+        assert [r["id"] is not None for r in body["results"]] == [True, False, True]
+        assert body["results"][1]["error"] == "Gagal menyimpan data"
+        assert client.portal.call(db.opd.find_one, {"id": "desa-a"})["pohon_tertanam"] == 4
+
+
+def test_batch_size_limits():
+    _, app = seeded_app("agro_batch_limits")
+    with TestClient(app) as client:
+        assert client.post("/api/partisipasi/batch", json={"items": []}).status_code == 400
+        res = client.post("/api/partisipasi/batch", json={"items": [PESERTA] * (PARTISIPASI_BATCH_MAX + 1)})
+        assert res.status_code == 422
@@ -0,0 +1,214 @@
+"""
+Test for /api/progress served from per-OPD counters
+- participation writes keep opd.pohon_tertanam in step
+- legacy OPDs are backfilled at startup
+- kategori/limit filtering, ordering and the cached summary
+- the trees-per-person multiplier comes from settings
+- OPDCounterSync repairs counters after writes that bypass the handlers
+- events without pre-images recompute one OPD or share one debounced full recompute
+"""
+
+import asyncio
+
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+from app_factory import create_app
+from auth import create_token
+from live_stats import StatsDelta
+from progress import OPDCounterSync
+from settings_store import SETTINGS_ID
+
+AUTH = {"Authorization": f"Bearer {create_token('admin-1', 'admin@agro.local', 'admin')}"}
+
+LEGACY_OPD = [
+    {"id": "opd-a", "nama": "Dinas A", "kategori": "OPD", "jumlah_personil": 10, "created_at": "2025-01-01"},
+    {"id": "opd-b", "nama": "Dinas B", "jumlah_personil": 5, "created_at": "2025-01-01"},
+    {"id": "desa-c", "nama": "Desa C", "kategori": "DESA", "jumlah_personil": 20, "created_at": "2025-01-01"},
+]
+
+
+def participant(opd_id, jumlah):
+    return {
+        "nama_lengkap": "Peserta", "nip": "199001012020011001", "opd_id": opd_id, "alamat": "Kwandang",
+        "nomor_whatsapp": "081234567890", "jumlah_pohon": jumlah, "jenis_pohon": "Mangga",
+        "sumber_bibit": "Swadaya", "lokasi_tanam": "Desa Molingkapoto",
+    }
+
+
+def make_client():
+    db = AsyncMongoMockClient()["agro_progress_test"]
+    app = create_app(database=db)
+    return db, app
+
+
+def counters(client, db):
+    docs = client.portal.call(lambda: db.opd.find({}, {"_id": 0, "id": 1, "pohon_tertanam": 1}).to_list(None))
+    return {d["id"]: d.get("pohon_tertanam") for d in docs}
+
+
+def test_counters_backfill_and_follow_writes():
+    db, app = make_client()
+
+    async def seed():
+        await db.opd.insert_many([dict(o) for o in LEGACY_OPD])
+        await db.partisipasi.insert_one({"id": "old", "opd_id": "opd-a", "jumlah_pohon": 30})
+
+    asyncio.run(seed())
+
+    with TestClient(app) as client:
+        assert counters(client, db) == {"opd-a": 30, "opd-b": 0, "desa-c": 0}
+
+        created = client.post("/api/partisipasi", json=participant("opd-b", 20)).json()
+        assert counters(client, db)["opd-b"] == 20
+
+        client.put(f"/api/partisipasi/{created['id']}", json={"opd_id": "desa-c", "jumlah_pohon": 50}, headers=AUTH)
+        assert counters(client, db) == {"opd-a": 30, "opd-b": 0, "desa-c": 50}
+
+        client.delete("/api/partisipasi/old", headers=AUTH)
+        assert counters(client, db)["opd-a"] == 0
+
+
+def test_progress_filters_sorts_and_summarises():
+    db, app = make_client()
+    with TestClient(app) as client:
+        client.portal.call(db.opd.insert_many, [dict(o) for o in LEGACY_OPD])
+        for opd in LEGACY_OPD:
+            client.portal.call(db.opd.update_one, {"id": opd["id"]}, {"$set": {"pohon_tertanam": 0}})
+        client.post("/api/partisipasi", json=participant("opd-b", 25))
+        client.post("/api/partisipasi", json=participant("opd-a", 20))
+        client.post("/api/partisipasi", json=participant("desa-c", 40))
+
+        body = client.get("/api/progress").json()
+        assert [p["opd_id"] for p in body["progress_list"]] == ["opd-b", "desa-c", "opd-a"]
+        assert body["progress_list"][0]["progress_persen"] == 50.0
+        assert body["summary"] == {"total_personil": 35, "total_target": 350,
+                                   "total_tertanam": 85, "overall_progress": 24.3}
+
+        opd_only = client.get("/api/progress", params={"kategori": "OPD"}).json()
+        assert [p["opd_id"] for p in opd_only["progress_list"]] == ["opd-b", "opd-a"]
+        assert opd_only["progress_list"][0]["kategori"] == "OPD"
+        assert opd_only["summary"]["total_tertanam"] == 45
+
+        top = client.get("/api/progress", params={"limit": 1}).json()
+        assert len(top["progress_list"]) == 1
+        assert top["summary"]["total_personil"] == 35
+
+
+def test_multiplier_comes_from_settings():
+    db, app = make_client()
+    with TestClient(app) as client:
+        client.portal.call(db.opd.insert_one, {**LEGACY_OPD[0], "pohon_tertanam": 30})
+        assert client.get("/api/progress").json()["progress_list"][0]["target_pohon"] == 100
+
+        response = client.put("/api/settings", json={"pohon_per_orang": 5}, headers=AUTH)
+        assert response.status_code == 200, response.text
+        body = client.get("/api/progress").json()
+        assert body["progress_list"][0]["target_pohon"] == 50
+        assert body["summary"]["overall_progress"] == 60.0
+        assert client.portal.call(db.settings.find_one, {"_id": SETTINGS_ID})["pohon_per_orang"] == 5
+
+
+def test_counter_sync_recomputes_touched_opds():
+    db = AsyncMongoMockClient()["agro_progress_sync"]
+
+    async def counters():
+        return {o["id"]: o["pohon_tertanam"] for o in await db.opd.find({}, {"_id": 0}).to_list(None)}
+
+    async def scenario():
+        await db.opd.insert_many([
+            {"id": "a", "jumlah_personil": 1, "pohon_tertanam": 99},
+            {"id": "b", "jumlah_personil": 1, "pohon_tertanam": 99},
+        ])
+        sync = OPDCounterSync(db, resync_delay=0)
+
+        async def settle():
+            if sync._resync_task:
+                await sync._resync_task
+
+        await db.partisipasi.insert_one({"id": "p1", "opd_id": "a", "jumlah_pohon": 4})
+        await sync.apply_change({"operationType": "insert", "fullDocument": {"opd_id": "a", "jumlah_pohon": 4}})
+        assert await counters() == {"a": 4, "b": 99}
+
+        await sync.apply_change({
+            "operationType": "update", "updateDescription": {"updatedFields": {"status": "ok"}, "removedFields": []},
+        })
+        assert await counters() == {"a": 4, "b": 99}
+
+        # Tanpa pre-image tidak diketahui OPD mana yang berubah: semua dihitung ulang
+        await sync.apply_change({"operationType": "delete"})
+        await settle()
+        assert await counters() == {"a": 4, "b": 0}
+
+        # Polling: hanya dokumen baru setelah _id terakhir, selain itu hitung ulang semua
+        newest = (await db.partisipasi.find_one({"id": "p1"}))["_id"]
+        await db.partisipasi.insert_one({"id": "p2", "opd_id": "b", "jumlah_pohon": 3})
+        await db.opd.update_one({"id": "a"}, {"$set": {"pohon_tertanam": 99}})
+        await sync.apply_change({"operationType": "poll", "before": [1, newest], "after": [2, None]})
+        assert await counters() == {"a": 99, "b": 3}
+        await sync.apply_change({"operationType": "poll", "before": [3, newest], "after": [2, None]})
+        await settle()
+        assert await counters() == {"a": 4, "b": 3}
+
+        delta = StatsDelta()
+        delta.add("a", 1, 1)
+        sync.use_change_stream(True)
+        await sync.apply(delta)
+        assert (await counters())["a"] == 4
+        sync.use_change_stream(False)
+        await sync.apply(delta)
+        assert (await counters())["a"] == 5
+
+    asyncio.run(scenario())
+
+
+def test_updates_without_pre_images_share_one_recompute(monkeypatch):
+    import progress
+
+    db = AsyncMongoMockClient()["agro_progress_no_pre_images"]
+    calls = []
+    recompute = progress.recompute_opd_counters
+
+    async def counting(database, opd_ids=None):
+        calls.append(None if opd_ids is None else sorted(opd_ids))
+        return await recompute(database, opd_ids)
+
+    monkeypatch.setattr(progress, "recompute_opd_counters", counting)
+
+    async def scenario():
+        await db.opd.insert_many([{"id": "a", "jumlah_personil": 1}, {"id": "b", "jumlah_personil": 1}])
+        await db.partisipasi.insert_many([{"id": f"p{i}", "opd_id": "a", "jumlah_pohon": 2} for i in range(20)])
+        sync = OPDCounterSync(db, resync_delay=0.01)
+
+        # updateLookup: jumlah_pohon berubah, opd_id tetap -> cukup OPD dokumen itu
+        changed = {"updatedFields": {"jumlah_pohon": 2}, "removedFields": []}
+        await sync.apply_change({"operationType": "update", "updateDescription": changed,
+                                 "fullDocument": {"opd_id": "a", "jumlah_pohon": 2}})
+        assert calls == [["a"]]
+
+        # Pindah OPD atau hapus tanpa pre-image: satu hitung ulang penuh untuk semuanya
+        moved = {"updatedFields": {"opd_id": "b"}, "removedFields": []}
+        for _ in range(10):
+            await sync.apply_change({"operationType": "update", "updateDescription": moved,
+                                     "fullDocument": {"opd_id": "b", "jumlah_pohon": 2}})
+            await sync.apply_change({"operationType": "delete"})
+        assert calls == [["a"]]
+        await asyncio.sleep(0.05)
+        assert calls == [["a"], None]
+        assert (await db.opd.find_one({"id": "a"}))["pohon_tertanam"] == 40
+        await sync.stop()
+
+    asyncio.run(scenario())
+
+
+def test_direct_database_writes_are_corrected():
+    db, app = make_client()
+    with TestClient(app) as client:
+        client.portal.call(db.opd.insert_one, {**LEGACY_OPD[0], "pohon_tertanam": 0})
+        feed = app.state.change_feed
+        client.portal.call(feed.poll_once)
+        # Ditulis langsung (mongosh / skrip), bukan lewat endpoint
+        client.portal.call(db.partisipasi.insert_one, {"id": "luar", "opd_id": "opd-a", "jumlah_pohon": 7})
+        client.portal.call(feed.poll_once)
+        stored = client.portal.call(db.opd.find_one, {"id": "opd-a"})
+        assert stored["pohon_tertanam"] == 7
@@ -0,0 +1,115 @@
+"""
+Test for resumable (tus-style) photo uploads
+- create, PATCH chunks at offsets, HEAD for the offset, finalize to a short reference
+- POST /api/partisipasi turns the reference into the stored photo and removes the upload
+- wrong offsets are 409 with the server offset; oversized uploads are 413
+- finalize refuses incomplete uploads and non-images; expired uploads are swept
+"""
+
+import asyncio
+import base64
+import os
+
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+from app_factory import create_app
+from resumable_uploads import ResumableUploadStore
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 4
+PESERTA = {
+    "nama_lengkap": "Peserta", "opd_id": "opd-a", "jumlah_pohon": 1, "jenis_pohon": "Mangga",
+    "sumber_bibit": "Swadaya", "lokasi_tanam": "Kwandang",
+}
+CHUNK = {"Content-Type": "application/offset+octet-stream", "Tus-Resumable": "1.0.0"}
+
+
+def metadata(**values):
+    return ",".join(f"{k} {base64.b64encode(v.encode()).decode()}" for k, v in values.items())
+
+
+def use_store(client, tmp_path):
+    client.app.state.resumable_uploads = ResumableUploadStore(str(tmp_path), max_bytes=4096)
+    return client.app.state.resumable_uploads
+
+
+def test_chunked_upload_resumes_from_offset(tmp_path):
+    with TestClient(create_app(database=AsyncMongoMockClient()["agro_resumable_flow"])) as client:
+        use_store(client, tmp_path)
+        res = client.post("/api/upload/resumable", headers={
+            "Upload-Length": str(len(PNG)), "Upload-Metadata": metadata(filename="bukti.png", filetype="image/png"),
+        })
+        assert res.status_code == 201
+        location = res.headers["location"]
+        assert location == f"/api/upload/resumable/{res.json()['id']}"
+
+        res = client.patch(location, content=PNG[:300], headers={**CHUNK, "Upload-Offset": "0"})
+        assert res.status_code == 204 and res.headers["upload-offset"] == "300"
+
+        # Klien mengira potongan pertama hilang dan mengirim ulang dari 0
+        stale = client.patch(location, content=PNG[:300], headers={**CHUNK, "Upload-Offset": "0"})
+        assert stale.status_code == 409 and stale.headers["upload-offset"] == "300"
+
+        head = client.head(location)
+        assert (head.headers["upload-offset"], head.headers["upload-length"]) == ("300", str(len(PNG)))
+        assert client.post(f"{location}/finalize").status_code == 409
+
+        res = client.patch(location, content=PNG[300:], headers={**CHUNK, "Upload-Offset": "300"})
+        assert res.headers["upload-offset"] == str(len(PNG))
+
+        ref = client.post(f"{location}/finalize").json()["ref"]
+        assert ref == f"upload:{location.rsplit('/', 1)[1]}"
+        assert client.post(f"{location}/finalize").json()["ref"] == ref  # finalize diulang: hasil sama
+
+        assert client.delete(location).status_code == 204
+        assert client.head(location).status_code == 404
+
+
+def test_partisipasi_resolves_upload_reference(tmp_path):
+    db = AsyncMongoMockClient()["agro_resumable_ref"]
+    asyncio.run(db.opd.insert_one({"id": "opd-a", "nama": "Dinas A", "kategori": "OPD", "created_at": "2025-01-01"}))
+    with TestClient(create_app(database=db)) as client:
+        use_store(client, tmp_path)
+        location = client.post("/api/upload/resumable", headers={"Upload-Length": str(len(PNG))}).headers["location"]
+        client.patch(location, content=PNG, headers={**CHUNK, "Upload-Offset": "0"})
+        ref = client.post(f"{location}/finalize").json()["ref"]
+
+        lokasi = {"lokasi_tanam": "Kwandang", "bukti_url": ref}
+        res = client.post("/api/partisipasi", json={**PESERTA, "lokasi_list": [lokasi]})
+        assert res.status_code == 200
+        stored = client.portal.call(db.partisipasi.find_one, {"id": res.json()["id"]})
+        photo = "data:image/png;base64," + base64.b64encode(PNG).decode()
+        assert stored["bukti_url"] == stored["lokasi_list"][0]["bukti_url"] == photo
+        assert client.head(location).status_code == 404  # upload dihapus setelah dipakai
+
+        # Referensi yang sudah dipakai atau kedaluwarsa ditolak, tidak disimpan mentah
+        again = client.post("/api/partisipasi", json={**PESERTA, "bukti_url": ref})
+        assert again.status_code == 400
+        batch = client.post("/api/partisipasi/batch", json={"items": [{**PESERTA, "bukti_url": ref}]})
+        assert batch.json()["created"] == 0
+        assert "kedaluwarsa" in batch.json()["results"][0]["error"]
+
+
+def test_rejections_and_sweep(tmp_path):
+    with TestClient(create_app(database=AsyncMongoMockClient()["agro_resumable_reject"])) as client:
+        store = use_store(client, tmp_path)
+        assert client.post("/api/upload/resumable", headers={"Upload-Length": "5000"}).status_code == 413
+        assert client.post("/api/upload/resumable", headers={"Upload-Length": "x"}).status_code == 400
+        assert client.post("/api/upload/resumable", headers={
+            "Upload-Length": "10", "Upload-Metadata": metadata(filetype="text/html"),
+        }).status_code == 400
+
+        location = client.post("/api/upload/resumable", headers={"Upload-Length": "20"}).headers["location"]
+        too_long = client.patch(location, content=b"x" * 21, headers={**CHUNK, "Upload-Offset": "0"})
+        assert too_long.status_code == 413
+        assert too_long.json()["detail"] == "Data melebihi Upload-Length yang dideklarasikan (20 byte)"
+        assert client.patch(location, content=b"x", headers={"Upload-Offset": "0"}).status_code == 415
+
+        client.patch(location, content=b"<html>" + b"x" * 14, headers={**CHUNK, "Upload-Offset": "0"})
+        assert client.post(f"{location}/finalize").status_code == 400
+        assert client.head("/api/upload/resumable/../../etc").status_code == 404
+
+        kept = client.post("/api/upload/resumable", headers={"Upload-Length": "10"}).json()["id"]
+        assert store.sweep(now=os.path.getmtime(tmp_path / f"{kept}.json") + 10, force=True) == 0
+        assert store.sweep(now=os.path.getmtime(tmp_path / f"{kept}.json") + store.ttl + 10, force=True) == 1
+        assert os.listdir(tmp_path) == []
@@ -0,0 +1,109 @@
+"""
+Test for GET /api/search
+- anonymous callers never reach partisipasi, so nip, nomor_whatsapp and alamat stay hidden
+- an expired or invalid token is treated as anonymous instead of a 401
+- admins can search partisipasi
+- page depth is bounded
+
+mongomock has no $text support, so the read database is replaced by a
+collection double that records each pipeline and returns canned matches.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import jwt
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+from app_factory import create_app
+from auth import create_token
+from config import JWT_ALGORITHM, JWT_SECRET
+from database import get_read_db
+from routers.search import SEARCH_MAX_PAGE
+
+ADMIN = {"Authorization": f"Bearer {create_token('admin-1', 'admin@agro.local', 'admin')}"}
+PII = ("nip", "nomor_whatsapp", "alamat")
+
+
+class RecordedAggregate:
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return self.docs[:length]
+
+
+class RecordingDB:
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.pipelines = {}
+
+    def __getitem__(self, name):
+        db = self
+
+        class Collection:
+            def aggregate(self, pipeline):
+                db.pipelines[name] = pipeline
+                return RecordedAggregate(db.docs.get(name, []))
+
+        return Collection()
+
+
+def search_app():
+    db = RecordingDB({
+        "berita": [{"id": "b1", "title": "Tanam Mangga", "snippet": "", "score": 2.0}],
+        "partisipasi": [{"id": "p1", "title": "Budi", "snippet": "1987", "score": 3.0}],
+    })
+    app = create_app(database=AsyncMongoMockClient()["agro_search"])
+    app.dependency_overrides[get_read_db] = lambda: db
+    return db, app
+
+
+def assert_public_only(db, body):
+    assert "partisipasi" not in db.pipelines
+    assert [r["type"] for r in body["results"]] == ["berita"]
+    assert db.pipelines["berita"][0]["$match"]["is_active"] is True
+    for pipeline in db.pipelines.values():
+        assert not any(f"${field}" in str(pipeline) for field in PII)
+
+
+def test_anonymous_search_hides_participants():
+    db, app = search_app()
+    with TestClient(app) as client:
+        res = client.get("/api/search", params={"q": "mangga"})
+        assert res.status_code == 200
+        assert_public_only(db, res.json())
+        assert client.get("/api/search", params={"q": "budi", "types": "partisipasi"}).status_code == 403
+
+
+def test_stale_token_falls_back_to_anonymous():
+    expired = jwt.encode(
+        {"user_id": "admin-1", "role": "admin", "exp": datetime.now(timezone.utc) - timedelta(hours=1)},
+        JWT_SECRET, algorithm=JWT_ALGORITHM,
+    )
+    for token in (expired, "bukan.token.jwt"):
+        db, app = search_app()
+        with TestClient(app) as client:
+            res = client.get("/api/search", params={"q": "mangga"}, headers={"Authorization": f"Bearer {token}"})
+            assert res.status_code == 200
+            assert_public_only(db, res.json())
+
+
+def test_admin_search_includes_participants():
+    db, app = search_app()
+    with TestClient(app) as client:
+        res = client.get("/api/search", params={"q": "budi"}, headers=ADMIN)
+        assert res.status_code == 200
+        assert [r["type"] for r in res.json()["results"]] == ["partisipasi", "berita"]
+        assert "is_active" not in db.pipelines["berita"][0]["$match"]
+
+
+def test_page_depth_is_bounded():
+    db, app = search_app()
+    with TestClient(app) as client:
+        res = client.get("/api/search", params={"q": "mangga", "page": SEARCH_MAX_PAGE, "limit": 50})
+        assert res.status_code == 200
+        assert db.pipelines["berita"][2]["$limit"] == SEARCH_MAX_PAGE * 50 + 1
+        assert client.get("/api/search", params={"q": "mangga", "page": SEARCH_MAX_PAGE + 1}).status_code == 422
@@ -0,0 +1,63 @@
+"""
+Test for the cached settings singleton
+- concurrent first reads create exactly one document
+- legacy settings documents are migrated into the singleton
+- writes bump the version and refresh the cache
+"""
+
+import asyncio
+
+from mongomock_motor import AsyncMongoMockClient
+
+from settings_store import SettingsCache, SETTINGS_ID
+
+
+def make_cache():
+    return SettingsCache(AsyncMongoMockClient()["settings_cache_test"])
+
+
+def test_concurrent_first_reads_create_one_document():
+    async def scenario():
+        cache = make_cache()
+        results = await asyncio.gather(*[cache.get() for _ in range(10)])
+        assert all(r["id"] == SETTINGS_ID for r in results)
+        assert await cache.db.settings.count_documents({}) == 1
+        assert cache.version == 1
+
+    asyncio.run(scenario())
+
+
+def test_legacy_document_is_migrated():
+    async def scenario():
+        cache = make_cache()
+        await cache.db.settings.insert_one({"id": "uuid-lama", "hero_title": "Judul Lama", "hero_subtitle": "Sub"})
+        settings = await cache.get()
+        assert settings["id"] == SETTINGS_ID
+        assert settings["hero_title"] == "Judul Lama"
+        assert settings["berita_popup_interval"] == 5
+
+    asyncio.run(scenario())
+
+
+def test_update_refreshes_cache_and_version():
+    async def scenario():
+        cache = make_cache()
+        await cache.get()
+        updated = await cache.update({"hero_title": "Baru", "berita_popup_interval": 10})
+        assert updated["hero_title"] == "Baru"
+        assert cache.version == 2
+        # Served from cache, no re-read needed
+        assert (await cache.get())["berita_popup_interval"] == 10
+
+    asyncio.run(scenario())
+
+
+def test_update_before_first_read_upserts_defaults():
+    async def scenario():
+        cache = make_cache()
+        updated = await cache.update({"logo_url": "data:image/png;base64,AAAA"})
+        assert updated["logo_url"].startswith("data:image/png")
+        assert updated["hero_title"] == "Gerakan Agro Mopomulo"
+        assert await cache.db.settings.count_documents({"_id": SETTINGS_ID}) == 1
+
+    asyncio.run(scenario())
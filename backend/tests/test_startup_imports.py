@@ -0,0 +1,21 @@
+"""
+Test that importing the app stays light
+- openpyxl, reportlab, pandas, pyarrow and bcrypt load on first use, not at boot
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+HEAVY = ("openpyxl", "reportlab", "pandas", "numpy", "pyarrow", "bcrypt")
+
+
+def test_heavy_libraries_not_imported_at_boot():
+    probe = "import sys, server; print(','.join(m for m in %r if m in sys.modules))" % (HEAVY,)
+    result = subprocess.run(
+        [sys.executable, "-c", probe], cwd=BACKEND_DIR, env=dict(os.environ),
+        capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == ""
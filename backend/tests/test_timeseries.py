@@ -0,0 +1,144 @@
+"""
+Test for the daily snapshot job and /api/stats/timeseries
+- participants are bucketed by local (WITA) day, per OPD and jenis_pohon
+- later runs only rebuild the days touched by new participants
+- a second worker is kept out by the lease
+- the endpoint fills empty periods, rolls up weeks and carries running totals
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+from app_factory import create_app
+from timeseries import DailySnapshotJob
+
+
+NOW = datetime(2025, 3, 5, 4, 0, tzinfo=timezone.utc)  # 5 Maret 12:00 WITA
+
+
+def row(id, created_at, jumlah, opd_id="opd-a", jenis="Mangga"):
+    return {"id": id, "opd_id": opd_id, "jenis_pohon": jenis, "jumlah_pohon": jumlah,
+            "created_at": datetime.fromisoformat(created_at)}
+
+
+SEED = [
+    row("p1", "2025-03-01T15:59:00+00:00", 5),               # 1 Maret 23:59 WITA
+    row("p2", "2025-03-01T16:00:00+00:00", 7),               # 2 Maret 00:00 WITA
+    row("p3", "2025-03-02T03:00:00+00:00", 3, jenis="Durian"),
+    row("p4", "2025-03-02T05:00:00+00:00", 4, opd_id="opd-b"),
+    row("p5", "2025-02-20T01:00:00+00:00", 10),
+]
+
+
+def daily(db):
+    async def load():
+        docs = await db.stats_daily.find({}, {"_id": 0, "updated_at": 0, "run": 0}).to_list(None)
+        return sorted(
+            (d["day"].strftime("%Y-%m-%dT%H:%M"), d["opd_id"], d["jenis_pohon"], d["pohon"], d["partisipan"])
+            for d in docs
+        )
+    return asyncio.run(load())
+
+
+def seeded_db(name):
+    db = AsyncMongoMockClient()[name]
+    asyncio.run(db.partisipasi.insert_many([dict(doc) for doc in SEED]))
+    return db
+
+
+def test_snapshot_buckets_by_local_day():
+    db = seeded_db("agro_ts_buckets")
+    result = asyncio.run(DailySnapshotJob(db, clock=lambda: NOW).run_once())
+
+    assert result["skipped"] is False
+    assert daily(db) == [
+        ("2025-02-19T16:00", "opd-a", "Mangga", 10, 1),
+        ("2025-02-28T16:00", "opd-a", "Mangga", 5, 1),
+        ("2025-03-01T16:00", "opd-a", "Durian", 3, 1),
+        ("2025-03-01T16:00", "opd-a", "Mangga", 7, 1),
+        ("2025-03-01T16:00", "opd-b", "Mangga", 4, 1),
+    ]
+
+
+def test_incremental_run_rebuilds_only_new_days():
+    db = seeded_db("agro_ts_incremental")
+    job = DailySnapshotJob(db, clock=lambda: NOW)
+    asyncio.run(job.run_once())
+
+    # Perubahan langsung pada hari lama tidak terlihat oleh run inkremental...
+    asyncio.run(db.partisipasi.update_one({"id": "p5"}, {"$set": {"jumlah_pohon": 99}}))
+    asyncio.run(db.partisipasi.insert_one(row("p6", "2025-03-04T02:00:00+00:00", 8)))
+    result = asyncio.run(job.run_once())
+
+    rows = daily(db)
+    assert ("2025-03-03T16:00", "opd-a", "Mangga", 8, 1) in rows
+    assert ("2025-02-19T16:00", "opd-a", "Mangga", 10, 1) in rows
+    # hari p6 + hari dari watermark + hari ini dan kemarin
+    assert result["days"] <= 4
+
+    # ...tetapi rebuild penuh membaca ulang seluruh riwayat
+    asyncio.run(job.run_once(full=True))
+    assert ("2025-02-19T16:00", "opd-a", "Mangga", 99, 1) in daily(db)
+
+
+def test_rebuilt_day_drops_removed_groups():
+    db = seeded_db("agro_ts_removed")
+    job = DailySnapshotJob(db, clock=lambda: NOW)
+    asyncio.run(job.run_once())
+    asyncio.run(db.partisipasi.delete_one({"id": "p4"}))
+    asyncio.run(job.rebuild_day(datetime(2025, 3, 1, 16, 0, tzinfo=timezone.utc)))
+
+    assert all(r[1] != "opd-b" for r in daily(db))
+
+
+def test_lease_keeps_second_worker_out():
+    db = seeded_db("agro_ts_lease")
+    first = DailySnapshotJob(db, clock=lambda: NOW)
+    second = DailySnapshotJob(db, clock=lambda: NOW)
+
+    async def scenario():
+        assert await first._acquire() is not None
+        skipped = await second.run_once()
+        await first._release(None)
+        ran = await second.run_once()
+        return skipped, ran
+
+    skipped, ran = asyncio.run(scenario())
+    assert skipped["skipped"] is True
+    assert ran["skipped"] is False
+
+
+def test_timeseries_endpoint():
+    db = seeded_db("agro_ts_endpoint")
+    asyncio.run(DailySnapshotJob(db, clock=lambda: NOW).run_once())
+
+    with TestClient(create_app(database=db)) as client:
+        res = client.get("/api/stats/timeseries", params={"from": "2025-03-01", "to": "2025-03-03"})
+        assert res.status_code == 200
+        points = res.json()["points"]
+        assert [p["period"] for p in points] == ["2025-03-01", "2025-03-02", "2025-03-03"]
+        assert [p["pohon"] for p in points] == [5, 14, 0]
+        # total berjalan termasuk riwayat sebelum 'from'
+        assert [p["total_pohon"] for p in points] == [15, 29, 29]
+        assert [p["total_partisipan"] for p in points] == [2, 5, 5]
+
+        res = client.get("/api/stats/timeseries", params={
+            "from": "2025-02-17", "to": "2025-03-05", "granularity": "week", "opd_id": "opd-a"
+        })
+        assert [(p["period"], p["pohon"]) for p in res.json()["points"]] == [
+            ("2025-02-17", 10), ("2025-02-24", 15), ("2025-03-03", 0)
+        ]
+
+        res = client.get("/api/stats/timeseries", params={
+            "from": "2025-01-01", "to": "2025-03-31", "granularity": "month", "jenis_pohon": "Durian"
+        })
+        assert [(p["period"], p["pohon"]) for p in res.json()["points"]] == [
+            ("2025-01-01", 0), ("2025-02-01", 0), ("2025-03-01", 3)
+        ]
+
+        assert client.get("/api/stats/timeseries", params={"granularity": "year"}).status_code == 400
+        assert client.get("/api/stats/timeseries", params={"from": "01-03-2025"}).status_code == 400
+        assert client.get("/api/stats/timeseries", params={"from": "2025-03-05", "to": "2025-03-01"}).status_code == 400
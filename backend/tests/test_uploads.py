@@ -0,0 +1,128 @@
+"""
+Test for streaming multipart uploads
+- images are checked by declared type and magic bytes, and returned as a data URL of the detected type
+- oversized files are cut off with 413 while streaming
+- malformed or truncated multipart bodies are 400, not 500
+- Excel imports are read from the spooled file (read-only workbook) with their form fields
+- workbook rows are parsed in a worker thread, a batch at a time
+- OPD import skips names already present in the kategori, ignoring case and spacing
+"""
+
+import asyncio
+import io
+import threading
+
+from fastapi.testclient import TestClient
+from mongomock_motor import AsyncMongoMockClient
+
+from app_factory import create_app
+from auth import create_token
+from config import UPLOAD_MAX_BYTES
+
+AUTH = {"Authorization": f"Bearer {create_token('admin-1', 'admin@agro.local', 'admin')}"}
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 64
+JPEG = b"\xff\xd8\xff\xe0" + b"\x00" * 64
+
+
+def xlsx(rows):
+    from openpyxl import Workbook
+    wb = Workbook()
+    for row in rows:
+        wb.active.append(row)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def test_image_checks():
+    with TestClient(create_app(database=AsyncMongoMockClient()["agro_upload_image"])) as client:
+        post = lambda name, data, content_type: client.post(
+            "/api/upload/image", files={"file": (name, data, content_type)}
+        )
+        res = post("foto.png", JPEG, "image/png")
+        assert res.status_code == 200
+        assert res.json()["url"].startswith("data:image/jpeg;base64,")
+
+        assert post("foto.png", b"<svg onload=alert(1)>" + b" " * 64, "image/png").status_code == 400
+        assert post("foto.txt", PNG, "text/plain").status_code == 400
+        assert post("kecil.png", b"\x89PN", "image/png").status_code == 400
+        assert client.post("/api/upload/image", json={"file": "x"}).status_code == 400
+
+        big = PNG + b"\x00" * UPLOAD_MAX_BYTES
+        assert post("besar.png", big, "image/png").status_code == 413
+
+
+def test_malformed_multipart_body():
+    with TestClient(create_app(database=AsyncMongoMockClient()["agro_upload_malformed"])) as client:
+        post = lambda body: client.post(
+            "/api/upload/image", content=body, headers={"Content-Type": "multipart/form-data; boundary=xyz"}
+        )
+        res = post(b"--abc\r\nContent-Disposition: form-data; name=\"file\"\r\n\r\n" + PNG)
+        assert res.status_code == 400 and res.json()["detail"] == "Format multipart tidak valid"
+
+        part = b'--xyz\r\nContent-Disposition: form-data; name="file"; filename="a.png"\r\n'
+        truncated = post(part + b"Content-Type: image/png\r\n\r\n" + PNG)
+        assert truncated.status_code == 400 and truncated.json()["detail"] == "Body multipart tidak lengkap"
+
+
+def test_excel_imports_stream_from_spool():
+    db = AsyncMongoMockClient()["agro_upload_excel"]
+    asyncio.run(db.opd.insert_one({"id": "opd-a", "nama": "Dinas A", "kategori": "OPD", "created_at": "2025-01-01"}))
+    with TestClient(create_app(database=db)) as client:
+        opd_file = xlsx([["Nama", "Kode"], ["Dinas B", "B1"], ["Dinas A", "A1"]])
+        res = client.post("/api/opd/import", files={"file": ("opd.xlsx", opd_file)}, data={"kategori": "OPD"},
+                          headers=AUTH)
+        assert res.json()["imported"] == 1
+        assert client.post("/api/opd/import", files={"file": ("opd.xlsx", opd_file)}, headers=AUTH).status_code == 400
+
+        rows = [
+            ["Nama", "NIP", "Alamat", "No. WhatsApp", "OPD", "Jumlah Pohon", "Jenis Pohon", "Sumber Bibit",
+             "Lokasi Tanam", "Latitude", "Longitude"],
+            ["Peserta", "1", "Jl. A", "0812", "Dinas A", 4, "Mangga", "Swadaya", "Kwandang", 0.9, 122.8],
+        ]
+        res = client.post("/api/import/excel", files={"file": ("data.xlsx", xlsx(rows))}, headers=AUTH)
+        assert res.json() == {"imported": 1, "errors": []}
+
+        bad = client.post("/api/import/excel", files={"file": ("data.xlsx", PNG)}, headers=AUTH)
+        assert bad.status_code == 400
+
+
+def test_workbook_rows_are_read_in_batches_off_the_loop(monkeypatch):
+    from openpyxl import load_workbook
+    from routers import reports
+
+    monkeypatch.setattr(reports, "IMPORT_ROW_BATCH", 2)
+    ws = load_workbook(io.BytesIO(xlsx([["Nama"]] + [[f"P{i}"] for i in range(5)])), read_only=True).active
+    threads = set()
+    original = ws.iter_rows
+
+    def iter_rows(*args, **kwargs):
+        for row in original(*args, **kwargs):
+            threads.add(threading.get_ident())
+            yield row
+
+    ws.iter_rows = iter_rows
+
+    async def collect():
+        return [row async for row in reports.workbook_rows(ws)], threading.get_ident()
+
+    rows, loop_thread = asyncio.run(collect())
+    assert [row[0] for row in rows] == ["P0", "P1", "P2", "P3", "P4"]
+    assert threads and loop_thread not in threads
+
+
+def test_opd_import_dedups_normalized_names():
+    db = AsyncMongoMockClient()["agro_upload_opd_dedup"]
+    asyncio.run(db.opd.insert_one({"id": "opd-x", "nama": "Dinas X", "kategori": "OPD", "created_at": "2025-01-01"}))
+    with TestClient(create_app(database=db)) as client:
+        rows = [["Nama"], ["dinas  x"], ["Dinas Y"], ["DINAS Y "], ["Dinas X"]]
+        res = client.post("/api/opd/import", files={"file": ("opd.xlsx", xlsx(rows))}, data={"kategori": "OPD"},
+                          headers=AUTH)
+        assert (res.json()["imported"], res.json()["skipped"]) == (1, 3)
+
+        # Kategori lain bukan duplikat
+        res = client.post("/api/opd/import", files={"file": ("opd.xlsx", xlsx(rows[:2]))}, data={"kategori": "DESA"},
+                          headers=AUTH)
+        assert res.json()["imported"] == 1
+        names = sorted((o["nama"], o["kategori"]) for o in client.portal.call(db.opd.find({}).to_list, None))
+        assert names == [("Dinas X", "OPD"), ("Dinas Y", "OPD"), ("dinas  x", "DESA")]
@@ -0,0 +1,225 @@
+"""
+Daily planting history for trend charts (/api/stats/timeseries).
+
+`stats_daily` holds one small document per local (WITA) day, OPD and
+jenis_pohon with the trees and participants registered that day. A
+background job keeps it current incrementally: it reads only participants
+created since its watermark, collects the days they fall on (plus today and
+yesterday, for late inserts and same-day edits) and rebuilds just those days
+from partisipasi. Rebuilding a day is idempotent, so a crash or a rerun
+never double counts. A lease in `stats_daily_state` lets one worker at a
+time run the job.
+
+Edits to participants from earlier days are picked up by a full rebuild
+(`python timeseries.py --rebuild`).
+"""
+import asyncio
+import logging
+import uuid
+from datetime import date, datetime, timezone, timedelta
+from typing import List, Optional
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from agenda_schedule import AGENDA_TZ, local_day_start
+from config import TIMESERIES_INTERVAL
+from dates import as_utc, parse_datetime
+
+logger = logging.getLogger(__name__)
+
+STATE_ID = "stats_daily"
+SCAN_BATCH = 5000
+LEASE = timedelta(minutes=5)
+GRANULARITIES = ("day", "week", "month")
+
+class DailySnapshotJob:
+
+    def __init__(self, database, clock=lambda: datetime.now(timezone.utc), interval: int = TIMESERIES_INTERVAL):
+        self.db = database
+        self.clock = clock
+        self.interval = interval
+        self.owner = uuid.uuid4().hex
+        self._task: Optional[asyncio.Task] = None
+
+    # ---- lease ----
+
+    async def _acquire(self) -> Optional[dict]:
+        now = self.clock()
+        try:
+            return await self.db.stats_daily_state.find_one_and_update(
+                {"_id": STATE_ID, "$or": [
+                    {"lease_until": {"$lt": now}}, {"lease_until": None}, {"owner": self.owner}
+                ]},
+                {"$set": {"lease_until": now + LEASE, "owner": self.owner}},
+                upsert=True, return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            return None  # worker lain sedang memegang lease
+
+    async def _release(self, watermark: Optional[datetime]):
+        update = {"lease_until": None, "updated_at": self.clock()}
+        if watermark is not None:
+            update["watermark"] = watermark
+        await self.db.stats_daily_state.update_one({"_id": STATE_ID, "owner": self.owner}, {"$set": update})
+
+    # ---- rebuild ----
+
+    async def rebuild_day(self, day: datetime):
+        """Recompute one local day of stats_daily from partisipasi."""
+        run = uuid.uuid4().hex
+        rows = await self.db.partisipasi.aggregate([
+            {"$match": {"created_at": {"$gte": day, "$lt": day + timedelta(days=1)}}},
+            {"$group": {
+                "_id": {"opd_id": "$opd_id", "jenis_pohon": "$jenis_pohon"},
+                "pohon": {"$sum": "$jumlah_pohon"},
+                "partisipan": {"$sum": 1},
+            }}
+        ]).to_list(None)
+        ops = [
+            UpdateOne(
+                {"day": day, "opd_id": row["_id"].get("opd_id"), "jenis_pohon": row["_id"].get("jenis_pohon")},
+                {"$set": {"pohon": row["pohon"], "partisipan": row["partisipan"],
+                          "run": run, "updated_at": self.clock()}},
+                upsert=True
+            )
+            for row in rows
+        ]
+        if ops:
+            await self.db.stats_daily.bulk_write(ops, ordered=False)
+        # Kombinasi OPD/jenis yang tidak ada lagi di hari itu
+        await self.db.stats_daily.delete_many({"day": day, "run": {"$ne": run}})
+
+    async def _new_days(self, watermark: Optional[datetime]):
+        """Local days of participants created at or after the watermark, and the new watermark."""
+        days = set()
+        watermark = as_utc(watermark) if watermark else None
+        query = {"created_at": {"$gte": watermark}} if watermark else {}
+        cursor = self.db.partisipasi.find(query, {"_id": 0, "created_at": 1}).sort("created_at", 1)
+        async for doc in cursor.batch_size(SCAN_BATCH):
+            created = parse_datetime(doc.get("created_at"))
+            if created is not None:
+                days.add(local_day_start(created))
+                watermark = max(watermark, created) if watermark else created
+        return days, watermark
+
+    async def run_once(self, full: bool = False) -> dict:
+        state = await self._acquire()
+        if state is None:
+            return {"skipped": True, "days": 0}
+        watermark = None
+        try:
+            if full:
+                await self.db.stats_daily.delete_many({})
+            days, watermark = await self._new_days(None if full else state.get("watermark"))
+            today = local_day_start(self.clock())
+            days.update({today, today - timedelta(days=1)})
+            for day in sorted(days):
+                await self.rebuild_day(day)
+            return {"skipped": False, "days": len(days)}
+        finally:
+            await self._release(watermark)
+
+    # ---- lifecycle ----
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.warning(f"Gagal memperbarui statistik harian: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+# ============== QUERY ==============
+
+def local_midnight(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day, tzinfo=AGENDA_TZ).astimezone(timezone.utc)
+
+def period_start(day: date, granularity: str) -> date:
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())  # minggu dimulai hari Senin
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+def periods(start: date, end: date, granularity: str) -> List[date]:
+    result = []
+    current = period_start(start, granularity)
+    while current <= end:
+        result.append(current)
+        if granularity == "month":
+            current = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+        else:
+            current += timedelta(days=7 if granularity == "week" else 1)
+    return result
+
+async def load_timeseries(db, start: date, end: date, granularity: str = "day",
+                          opd_id: Optional[str] = None, jenis_pohon: Optional[str] = None) -> dict:
+    """Trees/participants per period between two local dates (inclusive), with running totals."""
+    filters = {}
+    if opd_id:
+        filters["opd_id"] = opd_id
+    if jenis_pohon:
+        filters["jenis_pohon"] = jenis_pohon
+    range_start, range_end = local_midnight(start), local_midnight(end + timedelta(days=1))
+
+    rows = await db.stats_daily.aggregate([
+        {"$match": {**filters, "day": {"$gte": range_start, "$lt": range_end}}},
+        {"$group": {"_id": "$day", "pohon": {"$sum": "$pohon"}, "partisipan": {"$sum": "$partisipan"}}},
+    ]).to_list(None)
+    base = await db.stats_daily.aggregate([
+        {"$match": {**filters, "day": {"$lt": range_start}}},
+        {"$group": {"_id": None, "pohon": {"$sum": "$pohon"}, "partisipan": {"$sum": "$partisipan"}}},
+    ]).to_list(1)
+
+    buckets = {p: {"pohon": 0, "partisipan": 0} for p in periods(start, end, granularity)}
+    for row in rows:
+        local_day = as_utc(row["_id"]).astimezone(AGENDA_TZ).date()
+        bucket = buckets.setdefault(period_start(local_day, granularity), {"pohon": 0, "partisipan": 0})
+        bucket["pohon"] += row["pohon"]
+        bucket["partisipan"] += row["partisipan"]
+
+    total_pohon = base[0]["pohon"] if base else 0
+    total_partisipan = base[0]["partisipan"] if base else 0
+    points = []
+    for period in sorted(buckets):
+        total_pohon += buckets[period]["pohon"]
+        total_partisipan += buckets[period]["partisipan"]
+        points.append({
+            "period": period.isoformat(),
+            "pohon": buckets[period]["pohon"],
+            "partisipan": buckets[period]["partisipan"],
+            "total_pohon": total_pohon,
+            "total_partisipan": total_partisipan,
+        })
+    return {"from": start.isoformat(), "to": end.isoformat(), "granularity": granularity, "points": points}
+
+if __name__ == "__main__":
+    # python timeseries.py [--rebuild]  -> jalankan job sekali (--rebuild: hitung ulang seluruh riwayat)
+    import sys
+
+    from config import MONGO_URL, DB_NAME
+    from database import create_client
+
+    async def main():
+        client = create_client(MONGO_URL)
+        try:
+            result = await DailySnapshotJob(client[DB_NAME]).run_once(full="--rebuild" in sys.argv)
+            print(f"Statistik harian: {result}")
+        finally:
+            client.close()
+
+    asyncio.run(main())
@@ -0,0 +1,243 @@
+"""
+Streaming multipart uploads.
+
+Handlers read the request stream themselves instead of taking an
+UploadFile, so a bad upload is refused as soon as it can be recognised:
+
+- the part's declared type (content type or file extension) is checked
+  when its headers arrive, before any file bytes are read
+- the first bytes must match a known signature of that kind (magic bytes)
+- reading stops with 413 as soon as the file passes its size limit
+
+File bytes go into a SpooledTemporaryFile that moves to disk past
+UPLOAD_SPOOL_BYTES, so peak memory per request stays small and large Excel
+imports can be parsed from the temporary file.
+"""
+import base64
+from tempfile import SpooledTemporaryFile
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+from multipart.exceptions import MultipartParseError
+from multipart.multipart import MultipartParser, MultipartState, parse_options_header
+from starlette.concurrency import run_in_threadpool
+
+from config import UPLOAD_SPOOL_BYTES
+
+HEAD_BYTES = 16  # cukup untuk semua signature di bawah
+MAX_FIELD_BYTES = 64 * 1024  # field teks biasa (mis. kategori)
+
+# (offset, bytes) yang harus cocok semuanya
+Signature = Tuple[Tuple[int, bytes], ...]
+
+IMAGE_SIGNATURES: Dict[str, List[Signature]] = {
+    "image/png": [((0, b"\x89PNG\r\n\x1a\n"),)],
+    "image/jpeg": [((0, b"\xff\xd8\xff"),)],
+    "image/gif": [((0, b"GIF87a"),), ((0, b"GIF89a"),)],
+    "image/webp": [((0, b"RIFF"), (8, b"WEBP"))],
+    "image/bmp": [((0, b"BM"),)],
+    "image/heic": [((4, b"ftypheic"),), ((4, b"ftypheix"),), ((4, b"ftypmif1"),)],
+    "image/avif": [((4, b"ftypavif"),)],
+}
+EXCEL_SIGNATURES: Dict[str, List[Signature]] = {
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": [((0, b"PK\x03\x04"),)],
+    "application/vnd.ms-excel": [((0, b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"),)],
+}
+
+class UploadKind:
+    """What a file field may contain: accepted declarations and content signatures."""
+
+    def __init__(self, signatures: Dict[str, List[Signature]], declared: Callable[[str, str], bool], error: str):
+        self.signatures = signatures
+        self.declared = declared
+        self.error = error
+
+    def sniff(self, head: bytes) -> Optional[str]:
+        for content_type, options in self.signatures.items():
+            for signature in options:
+                if all(head[offset:offset + len(magic)] == magic for offset, magic in signature):
+                    return content_type
+        return None
+
+IMAGE = UploadKind(
+    IMAGE_SIGNATURES,
+    lambda filename, content_type: content_type.startswith("image/"),
+    "File harus berupa gambar",
+)
+EXCEL = UploadKind(
+    EXCEL_SIGNATURES,
+    lambda filename, content_type: filename.lower().endswith((".xlsx", ".xls")),
+    "File harus berformat Excel (.xlsx atau .xls)",
+)
+
+def image_data_url(content: bytes, content_type: str) -> str:
+    """The stored form of an uploaded image (gambar disimpan sebagai data URL)."""
+    return f"data:{content_type};base64,{base64.b64encode(content).decode('utf-8')}"
+
+def too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Ukuran file maksimal {max_bytes // (1024 * 1024)}MB")
+
+class StreamedUpload:
+    """A received file (rewound, ready to read) plus the form's text fields."""
+
+    def __init__(self, filename: str, content_type: str, size: int, file, fields: Dict[str, str]):
+        self.filename = filename
+        self.content_type = content_type  # hasil deteksi magic bytes, bukan yang dikirim klien
+        self.size = size
+        self.file = file
+        self.fields = fields
+
+    def data_url(self) -> str:
+        self.file.seek(0)
+        return image_data_url(self.file.read(), self.content_type)
+
+    def close(self):
+        self.file.close()
+
+class _Part:
+
+    def __init__(self):
+        self.header_name = b""
+        self.header_value = b""
+        self.headers: Dict[bytes, bytes] = {}
+        self.name = ""
+        self.filename: Optional[str] = None
+        self.data = b""
+
+class _UploadParser:
+    """python-multipart callbacks; file bytes are queued and written after each parser.write."""
+
+    def __init__(self, field: str, kind: UploadKind, max_bytes: int):
+        self.field = field
+        self.kind = kind
+        self.max_bytes = max_bytes
+        self.part = _Part()
+        self.fields: Dict[str, str] = {}
+        self.pending: List[bytes] = []
+        self.receiving = False  # sedang di dalam part file yang diminta
+        self.filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self.head = b""
+        self.size = 0
+
+    def on_part_begin(self):
+        self.part = _Part()
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self.part.header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self.part.header_value += data[start:end]
+
+    def on_header_end(self):
+        self.part.headers[self.part.header_name.lower()] = self.part.header_value
+        self.part.header_name = self.part.header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self.part.headers.get(b"content-disposition", b""))
+        self.part.name = options.get(b"name", b"").decode("utf-8", "replace")
+        if b"filename" in options:
+            self.part.filename = options[b"filename"].decode("utf-8", "replace")
+        if self.part.name == self.field and self.part.filename is not None:
+            if self.filename is not None:
+                raise HTTPException(status_code=400, detail="Hanya satu file yang boleh diupload")
+            declared = self.part.headers.get(b"content-type", b"").decode("latin-1").lower()
+            if not self.kind.declared(self.part.filename, declared):
+                raise HTTPException(status_code=400, detail=self.kind.error)
+            self.filename = self.part.filename
+            self.receiving = True
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self.receiving:
+            self.size += end - start
+            if self.size > self.max_bytes:
+                raise too_large(self.max_bytes)
+            self.pending.append(data[start:end])
+        elif self.part.filename is None:
+            self.part.data += data[start:end]
+            if len(self.part.data) > MAX_FIELD_BYTES:
+                raise HTTPException(status_code=400, detail="Field form terlalu besar")
+        # File lain di luar field yang diminta diabaikan tanpa disimpan
+
+    def on_part_end(self):
+        if self.receiving:
+            self.receiving = False
+            self.check_head(final=True)
+        elif self.part.filename is None and self.part.name:
+            self.fields[self.part.name] = self.part.data.decode("utf-8", "replace")
+
+    def check_head(self, final: bool = False):
+        """Match the magic bytes once enough of the file (or all of it) is in."""
+        if self.content_type is not None:
+            return
+        if len(self.head) < HEAD_BYTES:
+            for chunk in self.pending:
+                self.head += chunk[:HEAD_BYTES - len(self.head)]
+                if len(self.head) >= HEAD_BYTES:
+                    break
+        if len(self.head) >= HEAD_BYTES or final:
+            self.content_type = self.kind.sniff(self.head)
+            if self.content_type is None:
+                raise HTTPException(status_code=400, detail=self.kind.error)
+
+async def read_upload(
+    request: Request,
+    kind: UploadKind,
+    max_bytes: int,
+    field: str = "file",
+    spool_bytes: int = UPLOAD_SPOOL_BYTES,
+) -> StreamedUpload:
+    """
+    Stream a multipart body, keeping the file in `field` (checked against
+    `kind`, at most `max_bytes`) and the small text fields. The caller closes
+    the returned upload.
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    if content_type.lower() != b"multipart/form-data" or b"boundary" not in options:
+        raise HTTPException(status_code=400, detail="Permintaan harus multipart/form-data")
+
+    state = _UploadParser(field, kind, max_bytes)
+    parser = MultipartParser(options[b"boundary"], {
+        "on_part_begin": state.on_part_begin,
+        "on_part_data": state.on_part_data,
+        "on_part_end": state.on_part_end,
+        "on_header_field": state.on_header_field,
+        "on_header_value": state.on_header_value,
+        "on_header_end": state.on_header_end,
+        "on_headers_finished": state.on_headers_finished,
+    })
+    spool = SpooledTemporaryFile(max_size=spool_bytes)
+    try:
+        try:
+            async for chunk in request.stream():
+                parser.write(chunk)
+                if state.pending:
+                    state.check_head()
+                    for data in state.pending:
+                        # Setelah pindah ke disk, tulis di threadpool agar event loop tidak tertahan
+                        if getattr(spool, "_rolled", False):
+                            await run_in_threadpool(spool.write, data)
+                        else:
+                            spool.write(data)
+                    state.pending.clear()
+            parser.finalize()
+        except MultipartParseError:
+            raise HTTPException(status_code=400, detail="Format multipart tidak valid")
+        if parser.state != MultipartState.END:
+            raise HTTPException(status_code=400, detail="Body multipart tidak lengkap")
+        if state.filename is None:
+            raise HTTPException(status_code=400, detail="File tidak ditemukan dalam form")
+        state.check_head(final=True)
+    except Exception:
+        spool.close()
+        raise
+    spool.seek(0)
+    return StreamedUpload(state.filename, state.content_type, state.size, spool, state.fields)
+
+def multipart_openapi(*fields: str, file_field: str = "file") -> dict:
+    """openapi_extra for handlers that stream their multipart body (keeps /docs usable)."""
+    properties = {file_field: {"type": "string", "format": "binary"}}
+    properties.update({name: {"type": "string"} for name in fields})
+    return {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+        "type": "object", "properties": properties, "required": list(properties),
+    }}}}}
@@ -2,6 +2,12 @@ import axios from 'axios';
 
 const API = process.env.REACT_APP_BACKEND_URL;
 
+// Idempotency-Key: mengirim ulang dengan key yang sama tidak membuat data ganda
+export const newIdempotencyKey = () =>
+  window.crypto?.randomUUID
+    ? window.crypto.randomUUID()
+    : `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+
 // OPD API
 export const opdApi = {
   getAll: () => axios.get(`${API}/opd`),
@@ -23,7 +29,12 @@ export const opdApi = {
 export const partisipasiApi = {
   getAll: () => axios.get(`${API}/partisipasi`),
   getById: (id) => axios.get(`${API}/partisipasi/${id}`),
-  create: (data) => axios.post(`${API}/partisipasi`, data),
+  create: (data, idempotencyKey) => axios.post(`${API}/partisipasi`, data, {
+    headers: idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {}
+  }),
+  createBatch: (items, idempotencyKey) => axios.post(`${API}/partisipasi/batch`, { items }, {
+    headers: idempotencyKey ? { 'Idempotency-Key': idempotencyKey } : {}
+  }),
   update: (id, data) => {
     const token = localStorage.getItem('token');
     return axios.put(`${API}/partisipasi/${id}`, data, {
@@ -51,16 +62,22 @@ export const settingsApi = {
   },
 };
 
+// Cursor for the next page of a paginated listing (null on the last page)
+export const nextCursor = (res) => res.headers['x-next-cursor'] || null;
+
 // Gallery API
 export const galleryApi = {
-  getAll: () => axios.get(`${API}/gallery`),
+  // params: { limit, cursor, fields } - next cursor is returned in the X-Next-Cursor header
+  getAll: (params) => axios.get(`${API}/gallery`, { params }),
   create: (data) => axios.post(`${API}/gallery`, data),
   delete: (id) => axios.delete(`${API}/gallery/${id}`),
 };
 
 // Edukasi API
 export const edukasiApi = {
-  getAll: () => axios.get(`${API}/edukasi`),
+  // params: { limit, cursor, fields, excerpt } - next cursor is returned in the X-Next-Cursor header
+  getAll: (params) => axios.get(`${API}/edukasi`, { params }),
+  getById: (id) => axios.get(`${API}/edukasi/${id}`),
   create: (data) => axios.post(`${API}/edukasi`, data),
   update: (id, data) => axios.put(`${API}/edukasi/${id}`, data),
   delete: (id) => axios.delete(`${API}/edukasi/${id}`),
@@ -68,7 +85,8 @@ export const edukasiApi = {
 
 // Agenda API
 export const agendaApi = {
-  getAll: () => axios.get(`${API}/agenda`),
+  // params: { limit, cursor, fields } - next cursor is returned in the X-Next-Cursor header
+  getAll: (params) => axios.get(`${API}/agenda`, { params }),
   getUpcoming: () => axios.get(`${API}/agenda/upcoming`),
   create: (data) => axios.post(`${API}/agenda`, data),
   update: (id, data) => axios.put(`${API}/agenda/${id}`, data),
@@ -77,7 +95,8 @@ export const agendaApi = {
 
 // Berita API
 export const beritaApi = {
-  getAll: () => axios.get(`${API}/berita`),
+  // params: { limit, cursor, fields, excerpt } - next cursor is returned in the X-Next-Cursor header
+  getAll: (params) => axios.get(`${API}/berita`, { params }),
   getActive: () => axios.get(`${API}/berita/active`),
   getById: (id) => axios.get(`${API}/berita/${id}`),
   create: (data) => axios.post(`${API}/berita`, data),
@@ -88,7 +107,9 @@ export const beritaApi = {
 // Stats API
 export const statsApi = {
   get: () => axios.get(`${API}/stats`),
-  getProgress: () => axios.get(`${API}/progress`),
+  getProgress: (params = {}) => axios.get(`${API}/progress`, { params }),
+  // Server-Sent Events: 'snapshot' (total_pohon, total_partisipan) lalu 'delta' (pohon, partisipan, opd)
+  stream: () => new EventSource(`${API}/stats/stream`),
 };
 
 // Export API
@@ -0,0 +1,62 @@
+// Upload foto bertahap (resumable) ke /api/upload/resumable.
+// File dikirim per potongan; jika koneksi putus, upload dilanjutkan dari offset
+// terakhir yang diterima server, bukan diulang dari awal. Hasilnya referensi
+// pendek ("upload:<id>") untuk bukti_url; server mengambil fotonya sendiri
+// saat partisipasi disimpan.
+import axios from 'axios';
+
+const TUS_VERSION = '1.0.0';
+const CHUNK_SIZE = 256 * 1024;
+const MAX_RETRIES = 6;
+
+const encodeMetadata = (value) => window.btoa(unescape(encodeURIComponent(value)));
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+const retryable = (error) => {
+  const status = error.response?.status;
+  // Tanpa respons = jaringan putus; 409/423 = offset berubah atau potongan lain masih ditulis
+  return !status || status >= 500 || status === 409 || status === 423;
+};
+
+export const uploadImageResumable = async (apiBase, file, onProgress) => {
+  const metadata = [`filename ${encodeMetadata(file.name)}`];
+  if (file.type) metadata.push(`filetype ${encodeMetadata(file.type)}`);
+  const created = await axios.post(`${apiBase}/upload/resumable`, null, {
+    headers: {
+      'Tus-Resumable': TUS_VERSION,
+      'Upload-Length': String(file.size),
+      'Upload-Metadata': metadata.join(','),
+    },
+  });
+  const url = `${apiBase}/upload/resumable/${created.data.id}`;
+
+  let offset = 0;
+  let retries = 0;
+  while (offset < file.size) {
+    try {
+      const res = await axios.patch(url, file.slice(offset, offset + CHUNK_SIZE), {
+        headers: {
+          'Tus-Resumable': TUS_VERSION,
+          'Content-Type': 'application/offset+octet-stream',
+          'Upload-Offset': String(offset),
+        },
+      });
+      offset = parseInt(res.headers['upload-offset'], 10);
+      retries = 0;
+      if (onProgress) onProgress(offset / file.size);
+    } catch (error) {
+      if (!retryable(error) || retries >= MAX_RETRIES) throw error;
+      retries += 1;
+      await sleep(Math.min(1000 * 2 ** retries, 15000));
+      try {
+        const head = await axios.head(url, { headers: { 'Tus-Resumable': TUS_VERSION } });
+        offset = parseInt(head.headers['upload-offset'], 10);
+      } catch (headError) {
+        // Masih offline: coba lagi pada putaran berikutnya
+      }
+    }
+  }
+
+  const finalized = await axios.post(`${url}/finalize`);
+  return finalized.data.ref;
+};
@@ -77,14 +77,12 @@ export const AdminLaporanPage = () => {
 
   const loadData = useCallback(async () => {
     try {
-      const [statsRes, partisipasiRes, progressRes] = await Promise.all([
+      const [statsRes, partisipasiRes] = await Promise.all([
         statsApi.get(),
-        partisipasiApi.getAll(),
-        statsApi.getProgress()
+        partisipasiApi.getAll()
       ]);
       setStats(statsRes.data);
       setPartisipasi(partisipasiRes.data);
-      setProgress(progressRes.data);
     } catch (error) {
       console.error('Failed to load data:', error);
     } finally {
@@ -96,6 +94,14 @@ export const AdminLaporanPage = () => {
     loadData();
   }, [loadData]);
 
+  // Progress difilter per kategori di server (list + ringkasan)
+  useEffect(() => {
+    const params = kategoriFilter === 'all' ? {} : { kategori: kategoriFilter };
+    statsApi.getProgress(params)
+      .then((res) => setProgress(res.data))
+      .catch((error) => console.error('Failed to load progress:', error));
+  }, [kategoriFilter]);
+
   const handleExportExcel = useCallback(async () => {
     setExporting(true);
     try {
@@ -146,30 +152,10 @@ export const AdminLaporanPage = () => {
     setKategoriFilter(value);
   }, []);
 
-  // Filter progress data by kategori
   const filteredProgress = useMemo(() => {
     if (!progress?.progress_list) return { progress_list: [], summary: null };
-    
-    const filteredList = kategoriFilter === 'all' 
-      ? progress.progress_list 
-      : progress.progress_list.filter(item => item.kategori === kategoriFilter);
-    
-    // Recalculate summary based on filtered data
-    const totalPersonil = filteredList.reduce((sum, item) => sum + (item.jumlah_personil || 0), 0);
-    const totalTarget = filteredList.reduce((sum, item) => sum + (item.target_pohon || 0), 0);
-    const totalTertanam = filteredList.reduce((sum, item) => sum + (item.pohon_tertanam || 0), 0);
-    const overallProgress = totalTarget > 0 ? Math.round((totalTertanam / totalTarget) * 1000) / 10 : 0;
-    
-    return {
-      progress_list: filteredList,
-      summary: {
-        total_personil: totalPersonil,
-        total_target: totalTarget,
-        total_tertanam: totalTertanam,
-        overall_progress: overallProgress
-      }
-    };
-  }, [progress, kategoriFilter]);
+    return progress;
+  }, [progress]);
 
   const chartColors = ['#059669', '#10B981', '#34D399', '#F59E0B', '#64748B', '#8B5CF6'];
 
@@ -3,26 +3,33 @@ import { Calendar, MapPin, Clock, Filter } from 'lucide-react';
 import { Card, CardContent } from '../../components/ui/card';
 import { Button } from '../../components/ui/button';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '../../components/ui/select';
-import { agendaApi } from '../../lib/api';
+import { agendaApi, nextCursor } from '../../lib/api';
 import { motion } from 'framer-motion';
 
+const PAGE_SIZE = 30;
+
 export const AgendaPage = () => {
   const [agenda, setAgenda] = useState([]);
   const [loading, setLoading] = useState(true);
   const [filter, setFilter] = useState('all');
+  const [cursor, setCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     loadAgenda();
   }, []);
 
-  const loadAgenda = async () => {
+  const loadAgenda = async (after = null) => {
     try {
-      const res = await agendaApi.getAll();
-      setAgenda(res.data);
+      if (after) setLoadingMore(true);
+      const res = await agendaApi.getAll({ limit: PAGE_SIZE, ...(after && { cursor: after }) });
+      setAgenda((prev) => (after ? [...prev, ...res.data] : res.data));
+      setCursor(nextCursor(res));
     } catch (error) {
       console.error('Failed to load agenda:', error);
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
@@ -151,6 +158,13 @@ export const AgendaPage = () => {
               </CardContent>
             </Card>
           )}
+          {!loading && cursor && (
+            <div className="flex justify-center mt-10">
+              <Button variant="outline" onClick={() => loadAgenda(cursor)} disabled={loadingMore}>
+                {loadingMore ? 'Memuat...' : 'Muat lebih banyak'}
+              </Button>
+            </div>
+          )}
         </div>
       </section>
     </div>
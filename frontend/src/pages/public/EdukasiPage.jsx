@@ -1,26 +1,48 @@
 import { useState, useEffect } from 'react';
 import { BookOpen, ChevronRight, Calendar } from 'lucide-react';
 import { Card, CardContent } from '../../components/ui/card';
-import { edukasiApi } from '../../lib/api';
+import { Button } from '../../components/ui/button';
+import { edukasiApi, nextCursor } from '../../lib/api';
 import { motion } from 'framer-motion';
 
+const PAGE_SIZE = 12;
+
 export const EdukasiPage = () => {
   const [edukasi, setEdukasi] = useState([]);
   const [loading, setLoading] = useState(true);
   const [selectedArticle, setSelectedArticle] = useState(null);
+  const [cursor, setCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     loadEdukasi();
   }, []);
 
-  const loadEdukasi = async () => {
+  // Daftar hanya memuat ringkasan konten (excerpt); artikel lengkap diambil saat dibuka
+  const loadEdukasi = async (after = null) => {
     try {
-      const res = await edukasiApi.getAll();
-      setEdukasi(res.data);
+      if (after) setLoadingMore(true);
+      const res = await edukasiApi.getAll({ limit: PAGE_SIZE, excerpt: true, ...(after && { cursor: after }) });
+      setEdukasi((prev) => (after ? [...prev, ...res.data] : res.data));
+      setCursor(nextCursor(res));
     } catch (error) {
       console.error('Failed to load edukasi:', error);
     } finally {
       setLoading(false);
+      setLoadingMore(false);
+    }
+  };
+
+  const openArticle = async (item) => {
+    if (edukasi.length === 0) {
+      setSelectedArticle(item); // artikel bawaan sudah lengkap
+      return;
+    }
+    try {
+      const res = await edukasiApi.getById(item.id);
+      setSelectedArticle(res.data);
+    } catch (error) {
+      console.error('Failed to load article:', error);
     }
   };
 
@@ -176,7 +198,7 @@ Pilihlah jenis pohon yang sesuai dengan kondisi tanah dan iklim daerah Anda.`,
               >
                 <Card 
                   className="stat-card overflow-hidden cursor-pointer group h-full"
-                  onClick={() => setSelectedArticle(item)}
+                  onClick={() => openArticle(item)}
                 >
                   <CardContent className="p-0 flex flex-col h-full">
                     {item.gambar_url && (
@@ -215,6 +237,13 @@ Pilihlah jenis pohon yang sesuai dengan kondisi tanah dan iklim daerah Anda.`,
             ))}
           </div>
         )}
+        {!selectedArticle && cursor && (
+          <div className="flex justify-center mt-10">
+            <Button variant="outline" onClick={() => loadEdukasi(cursor)} disabled={loadingMore}>
+              {loadingMore ? 'Memuat...' : 'Muat lebih banyak'}
+            </Button>
+          </div>
+        )}
       </div>
     </div>
   );
@@ -1,26 +1,35 @@
 import { useState, useEffect } from 'react';
 import { Image, X } from 'lucide-react';
 import { Card, CardContent } from '../../components/ui/card';
-import { galleryApi } from '../../lib/api';
+import { Button } from '../../components/ui/button';
+import { galleryApi, nextCursor } from '../../lib/api';
 import { motion, AnimatePresence } from 'framer-motion';
 
+const PAGE_SIZE = 12;
+
 export const GaleriPage = () => {
   const [gallery, setGallery] = useState([]);
   const [loading, setLoading] = useState(true);
   const [selectedImage, setSelectedImage] = useState(null);
+  const [cursor, setCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     loadGallery();
   }, []);
 
-  const loadGallery = async () => {
+  // Foto galeri berukuran besar: ambil per halaman, bukan seluruh koleksi sekaligus
+  const loadGallery = async (after = null) => {
     try {
-      const res = await galleryApi.getAll();
-      setGallery(res.data);
+      if (after) setLoadingMore(true);
+      const res = await galleryApi.getAll({ limit: PAGE_SIZE, ...(after && { cursor: after }) });
+      setGallery((prev) => (after ? [...prev, ...res.data] : res.data));
+      setCursor(nextCursor(res));
     } catch (error) {
       console.error('Failed to load gallery:', error);
     } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
@@ -108,6 +117,13 @@ export const GaleriPage = () => {
             ))}
           </div>
         )}
+        {cursor && (
+          <div className="flex justify-center mt-10">
+            <Button variant="outline" onClick={() => loadGallery(cursor)} disabled={loadingMore}>
+              {loadingMore ? 'Memuat...' : 'Muat lebih banyak'}
+            </Button>
+          </div>
+        )}
       </div>
 
       {/* Lightbox */}
@@ -353,6 +353,31 @@ export const HomePage = () => {
     loadData();
   }, [loadData]);
 
+  // Counter live: terapkan snapshot/delta dari /api/stats/stream tanpa polling
+  useEffect(() => {
+    if (typeof EventSource === 'undefined') return undefined;
+    const source = statsApi.stream();
+    const onSnapshot = (e) => {
+      const data = JSON.parse(e.data);
+      setStats((prev) => prev && {
+        ...prev,
+        total_pohon: data.total_pohon,
+        total_partisipan: data.total_partisipan,
+      });
+    };
+    const onDelta = (e) => {
+      const data = JSON.parse(e.data);
+      setStats((prev) => prev && {
+        ...prev,
+        total_pohon: (prev.total_pohon || 0) + data.pohon,
+        total_partisipan: (prev.total_partisipan || 0) + data.partisipan,
+      });
+    };
+    source.addEventListener('snapshot', onSnapshot);
+    source.addEventListener('delta', onDelta);
+    return () => source.close();
+  }, []);
+
   const formatNumber = useCallback((num) => {
     return new Intl.NumberFormat('id-ID').format(num || 0);
   }, []);
@@ -8,10 +8,10 @@ import { Label } from '../../components/ui/label';
 import { Textarea } from '../../components/ui/textarea';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '../../components/ui/select';
 import { Progress } from '../../components/ui/progress';
-import { opdApi, partisipasiApi } from '../../lib/api';
+import { opdApi, partisipasiApi, newIdempotencyKey } from '../../lib/api';
 import { motion, AnimatePresence } from 'framer-motion';
 import { toast } from 'sonner';
-import axios from 'axios';
+import { uploadImageResumable } from '../../lib/resumableUpload';
 import { SuccessIcon, TreeIcon } from '../../components/EnvironmentIcons';
 import { validateLocationInGorontaloUtara } from '../../lib/gorontaloUtaraBoundary';
 
@@ -33,6 +33,8 @@ export const PartisipasiPage = () => {
   const [currentStep, setCurrentStep] = useState(1);
   const [selectedKategori, setSelectedKategori] = useState('');
   const fileInputRef = useRef(null);
+  // Satu key per pendaftaran; dipakai ulang saat submit diulang setelah koneksi gagal
+  const submitKeyRef = useRef(null);
   
   // Flag untuk mencegah auto-submit saat navigasi antar step
   const [isNavigating, setIsNavigating] = useState(false);
@@ -69,7 +71,8 @@ export const PartisipasiPage = () => {
     lokasi_tanam: '',
     latitude: '',
     longitude: '',
-    bukti_url: ''
+    bukti_url: '',
+    bukti_ref: ''
   });
 
   const kategoriOptions = [
@@ -175,7 +178,8 @@ export const PartisipasiPage = () => {
       lokasi_tanam: '',
       latitude: '',
       longitude: '',
-      bukti_url: ''
+      bukti_url: '',
+      bukti_ref: ''
     });
     setLocationValidation({ valid: null, message: '' });
     
@@ -279,13 +283,10 @@ export const PartisipasiPage = () => {
 
     setUploading(true);
     try {
-      const formDataUpload = new FormData();
-      formDataUpload.append('file', file);
-      const res = await axios.post(`${API}/upload/image`, formDataUpload, {
-        headers: { 'Content-Type': 'multipart/form-data' }
-      });
-      // Update currentLokasi instead of formData
-      setCurrentLokasi(prev => ({ ...prev, bukti_url: res.data.url }));
+      // Upload bertahap: koneksi lemah di lokasi tanam tidak memaksa kirim ulang dari awal
+      const ref = await uploadImageResumable(API, file);
+      // Pratinjau dari file lokal; yang dikirim ke server hanya referensi uploadnya
+      setCurrentLokasi(prev => ({ ...prev, bukti_url: URL.createObjectURL(file), bukti_ref: ref }));
       toast.success('Bukti berhasil diupload');
     } catch (error) {
       console.error('Upload failed:', error);
@@ -296,7 +297,7 @@ export const PartisipasiPage = () => {
   };
 
   const removeBukti = () => {
-    setCurrentLokasi(prev => ({ ...prev, bukti_url: '' }));
+    setCurrentLokasi(prev => ({ ...prev, bukti_url: '', bukti_ref: '' }));
     if (fileInputRef.current) fileInputRef.current.value = '';
   };
 
@@ -409,12 +410,13 @@ export const PartisipasiPage = () => {
     }
 
     setLoading(true);
+    if (!submitKeyRef.current) submitKeyRef.current = newIdempotencyKey();
     try {
       // Prepare lokasi_list array
       const preparedLokasiList = allLocations.map(loc => ({
         lokasi_tanam: loc.lokasi_tanam,
         titik_lokasi: loc.titik_lokasi || '',
-        bukti_url: loc.bukti_url || ''
+        bukti_url: loc.bukti_ref || ''
       }));
 
       // Kirim satu request dengan semua lokasi dalam array
@@ -429,12 +431,14 @@ export const PartisipasiPage = () => {
         jenis_pohon: formData.jenis_pohon || '',
         sumber_bibit: formData.sumber_bibit || '',
         lokasi_list: preparedLokasiList
-      });
+      }, submitKeyRef.current);
       
       setSubmitted(true);
       toast.success(`Partisipasi berhasil didaftarkan dengan ${allLocations.length} lokasi!`);
     } catch (error) {
       console.error('Failed to submit:', error);
+      // Server sudah menjawab (bukan koneksi putus): submit berikutnya memakai key baru
+      if (error.response && error.response.status !== 409) submitKeyRef.current = null;
       // Handle error response properly - it might be an object or array
       let errorMessage = 'Gagal mendaftarkan partisipasi';
       if (error.response?.data?.detail) {